@@ -0,0 +1,91 @@
+"""
+Shared setup for benchmark scripts.
+
+Benchmarks run outside NiFi and outside pytest, so this module puts the
+processor directories on sys.path (like tests/conftest.py does) and
+installs the strict nifiapi stubs from tests/stab_test/nifiapi_stub.py.
+"""
+
+import sys
+import time
+import types
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+STUB_DIR = REPO_ROOT / "tests" / "stab_test"
+
+
+def setup_paths() -> None:
+    """Make processor packages and their top-level modules importable."""
+    for path in (SRC_DIR, *sorted(p for p in SRC_DIR.iterdir() if p.is_dir())):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+
+def install_nifiapi_stub() -> None:
+    """Register tests/stab_test/nifiapi_stub.py as the 'nifiapi' package."""
+    if "nifiapi" in sys.modules:
+        return
+
+    if str(STUB_DIR) not in sys.path:
+        sys.path.insert(0, str(STUB_DIR))
+    import nifiapi_stub as stub
+
+    modules = {
+        "nifiapi.flowfiletransform": ("FlowFileTransform", "FlowFileTransformResult"),
+        "nifiapi.flowfilesource": ("FlowFileSource", "FlowFileSourceResult"),
+        "nifiapi.recordtransform": ("RecordTransform", "RecordTransformResult"),
+        "nifiapi.relationship": ("Relationship",),
+        "nifiapi.properties": (
+            "PropertyDescriptor", "StandardValidators", "ExpressionLanguageScope",
+        ),
+    }
+    sys.modules["nifiapi"] = types.ModuleType("nifiapi")
+    for name, attrs in modules.items():
+        mod = types.ModuleType(name)
+        for attr in attrs:
+            setattr(mod, attr, getattr(stub, attr))
+        sys.modules[name] = mod
+
+
+class FakeFlowFile:
+    """FlowFile with in-memory content and attributes."""
+
+    def __init__(self, data: bytes, attributes=None):
+        self._data = data
+        self._attributes = dict(attributes or {})
+
+    def getContentsAsBytes(self) -> bytes:
+        return self._data
+
+    def getAttribute(self, name: str):
+        return self._attributes.get(name)
+
+    def getAttributes(self):
+        return dict(self._attributes)
+
+    def getSize(self) -> int:
+        return len(self._data)
+
+
+class FakeContext:
+    """ProcessContext returning plain string property values."""
+
+    def __init__(self, properties=None):
+        self._properties = dict(properties or {})
+
+    def getProperty(self, name: str):
+        return self._properties.get(name, "")
+
+
+def timed(fn, *args, **kwargs):
+    """Return (result, elapsed seconds) of fn(*args, **kwargs)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def percentile(ordered, p: float) -> float:
+    """p-th percentile of an ascending sequence of samples."""
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
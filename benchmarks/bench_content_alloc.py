@@ -0,0 +1,124 @@
+"""
+Peak traced memory per FlowFile of the content path, before and after content_io.
+
+tracemalloc peak above the FlowFile content itself, for one FlowFile,
+as KB and as a multiple of the content size:
+
+  - JsonKeyValueSwap, "before": decode to str, json.loads(str),
+    json.dumps() to str and the UTF-8 encode NiFi does on str contents;
+    "after": JsonKeyValueSwap.transform() (bytes in, bytes out).
+  - LLMRequestProcessor, "before": decode, token estimate on an encoded
+    copy, call_llm(), encode of the str result; "after": read_content() /
+    decode_text(), estimate_tokens(), call_llm(), to_contents().
+    Both call the same call_llm() against an in-process fake session
+    that returns a prebuilt echo of the prompt, so only the client side
+    is measured and only the content handling differs.
+
+Usage:
+    python benchmarks/bench_content_alloc.py [--sizes 1024,65536,1048576]
+"""
+
+import argparse
+import json
+import tracemalloc
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, setup_paths
+
+setup_paths()
+install_nifiapi_stub()
+
+from content_io import decode_text, read_content, to_contents  # noqa: E402
+from demo_processor import JsonKeyValueSwap  # noqa: E402
+from json_codec import dumps  # noqa: E402
+from llm_client import call_llm  # noqa: E402
+from llm_tokens import BYTES_PER_TOKEN, estimate_tokens  # noqa: E402
+from swap import swap_top_level  # noqa: E402
+
+
+class _EchoResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class _EchoSession:
+    """requests.Session stand-in answering a prebuilt response body."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return _EchoResponse(self.body)
+
+
+def swap_before(flowfile):
+    text = flowfile.getContentsAsBytes().decode("utf-8")
+    out = json.dumps(swap_top_level(json.loads(text)), ensure_ascii=False)
+    return out.encode("utf-8")
+
+
+def swap_after(flowfile):
+    return JsonKeyValueSwap().transform(FakeContext({"Streaming Threshold": "0"}), flowfile).contents
+
+
+def llm_before(flowfile):
+    text = flowfile.getContentsAsBytes().decode("utf-8")
+    -(-len(text.encode("utf-8")) // BYTES_PER_TOKEN)
+    result = call_llm("localhost", "8000", "", 0.7, text, session=flowfile.session)
+    return result.encode("utf-8")
+
+
+def llm_after(flowfile):
+    text = decode_text(read_content(flowfile))
+    estimate_tokens(text)
+    return to_contents(call_llm("localhost", "8000", "", 0.7, text, session=flowfile.session))
+
+
+def json_document(size: int) -> bytes:
+    count = max(size // 32, 1)
+    return json.dumps({f"key-{i:08d}": f"value-{i:010d}" for i in range(count)}).encode("utf-8")
+
+
+def text_document(size: int) -> bytes:
+    return ("lorem ipsum " * (size // 12 + 1))[:size].encode("utf-8")
+
+
+def peak_kb(fn, flowfile) -> float:
+    fn(flowfile)  # warm up imports and caches
+    tracemalloc.start()
+    try:
+        fn(flowfile)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1024,65536,1048576")
+    args = parser.parse_args()
+
+    cases = (
+        ("swap", json_document, swap_before, swap_after),
+        ("llm", text_document, llm_before, llm_after),
+    )
+    print(f"{'path':>5} {'content KB':>11} {'before KB':>10} {'x':>5} {'after KB':>9} {'x':>5}")
+    for name, build, before, after in cases:
+        for size in map(int, args.sizes.split(",")):
+            flowfile = FakeFlowFile(build(size))
+            flowfile.session = _EchoSession(
+                dumps({"response": flowfile.getContentsAsBytes().decode("utf-8")})
+            )
+            content_kb = len(flowfile.getContentsAsBytes()) / 1024
+            # The old swap output had ", " / ": " separators: compare parsed
+            same = (json.loads if name == "swap" else bytes)
+            assert same(before(flowfile)) == same(after(flowfile))
+            b, a = peak_kb(before, flowfile), peak_kb(after, flowfile)
+            print(f"{name:>5} {content_kb:>11.1f} {b:>10.1f} {b / content_kb:>5.1f} "
+                  f"{a:>9.1f} {a / content_kb:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Tail latency of LLMRequestProcessor with and without hedged requests.
+
+Two stub replicas answer in --fast seconds, except for a --slow-share of
+requests that take --slow seconds (a replica stalling now and then).
+8 NiFi tasks push FlowFiles through one processor instance; per
+configuration the per-FlowFile latency percentiles and the share of
+hedged FlowFiles are reported.
+
+Usage:
+    python benchmarks/bench_hedging.py [--flowfiles 800] [--slow-share 0.05]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, percentile, setup_paths
+
+setup_paths()
+install_nifiapi_stub()
+
+from llm_processor import LLMRequestProcessor  # noqa: E402
+from llm_stub_server import StubLLMServer  # noqa: E402
+
+TASKS = 8
+
+CONFIGS = {
+    "off": {},
+    "p95 / 10%": {"Hedge Percentile": "95", "Max Hedge Rate": "0.1", "Hedge Min Delay": "10"},
+    "p90 / 20%": {"Hedge Percentile": "90", "Max Hedge Rate": "0.2", "Hedge Min Delay": "10"},
+}
+
+
+def run(servers, properties: dict, flowfiles: int):
+    proc = LLMRequestProcessor()
+    context = FakeContext(dict(
+        properties,
+        HOST=", ".join(f"{s.host}:{s.port}" for s in servers),
+        PORT="1",
+        **{"Max In-Flight Requests": str(TASKS)},
+    ))
+    proc.onScheduled(context)
+    latencies, hedged = [], []
+    per_task = flowfiles // TASKS
+
+    def nifi_task():
+        for i in range(per_task):
+            started = time.perf_counter()
+            result = proc.transform(context, FakeFlowFile(f"doc {i}".encode("utf-8")))
+            latencies.append(time.perf_counter() - started)
+            hedged.append("llm.hedged" in result.attributes)
+
+    threads = [threading.Thread(target=nifi_task) for _ in range(TASKS)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        proc.onStopped(context)
+    return sorted(latencies), sum(hedged) / len(hedged)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flowfiles", type=int, default=800)
+    parser.add_argument("--fast", type=float, default=0.02)
+    parser.add_argument("--slow", type=float, default=0.5)
+    parser.add_argument("--slow-share", type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    def latency():
+        return args.slow if rng.random() < args.slow_share else args.fast
+
+    print(f"fast={args.fast * 1000:.0f} ms, slow={args.slow * 1000:.0f} ms "
+          f"for {args.slow_share:.0%} of requests, {TASKS} tasks")
+    print(f"{'hedging':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hedged':>7}")
+    with StubLLMServer(latency=latency) as one, StubLLMServer(latency=latency) as two:
+        for name, properties in CONFIGS.items():
+            ordered, share = run((one, two), properties, args.flowfiles)
+            print(f"{name:>10} {percentile(ordered, 50) * 1000:>8.1f} "
+                  f"{percentile(ordered, 95) * 1000:>8.1f} "
+                  f"{percentile(ordered, 99) * 1000:>8.1f} {share:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+FlowFiles/sec and connections of LLMRequestProcessor per HTTP client.
+
+16 NiFi tasks share one processor instance (Max In-Flight Requests = 16)
+against the local stub server with a fixed simulated latency:
+
+  - requests: blocking pooled session, one connection per request in flight;
+  - httpx: the async client on its event loop thread over HTTP/1.1;
+  - httpx+h2: the same over HTTP/2 (h2c stub server, needs 'h2'),
+    all requests multiplexed over one connection.
+
+Usage:
+    python benchmarks/bench_http_clients.py [--latency 0.05] [--flowfiles 400]
+"""
+
+import argparse
+import threading
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, setup_paths, timed
+
+setup_paths()
+install_nifiapi_stub()
+
+from llm_async_client import HTTP2_AVAILABLE  # noqa: E402
+from llm_processor import LLMRequestProcessor  # noqa: E402
+from llm_stub_server import StubH2LLMServer, StubLLMServer  # noqa: E402
+
+TASKS = 16
+
+CLIENTS = {
+    "requests": (StubLLMServer, {"HTTP Client": "requests"}),
+    "httpx": (StubLLMServer, {"HTTP Client": "httpx"}),
+    "httpx+h2": (StubH2LLMServer, {"HTTP Client": "httpx", "HTTP/2": "true"}),
+}
+
+
+def run(server, properties: dict, flowfiles: int) -> float:
+    proc = LLMRequestProcessor()
+    context = FakeContext(dict(
+        properties,
+        HOST=server.host,
+        PORT=str(server.port),
+        **{"Max In-Flight Requests": str(TASKS), "Max Queued Requests": str(TASKS)},
+    ))
+    proc.onScheduled(context)
+    per_task = flowfiles // TASKS
+
+    def nifi_task():
+        for i in range(per_task):
+            result = proc.transform(context, FakeFlowFile(f"doc {i}".encode("utf-8")))
+            assert result.relationship == "success", result.attributes
+
+    threads = [threading.Thread(target=nifi_task) for _ in range(TASKS)]
+
+    def start_and_join():
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    try:
+        _, elapsed = timed(start_and_join)
+    finally:
+        proc.onStopped(context)
+    return per_task * TASKS / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency, seconds")
+    parser.add_argument("--flowfiles", type=int, default=400)
+    args = parser.parse_args()
+
+    print(f"stub latency={args.latency * 1000:.0f} ms, flowfiles={args.flowfiles}, tasks={TASKS}")
+    print(f"{'client':>9} {'ff/s':>8} {'connections':>12}")
+    for name, (server_class, properties) in CLIENTS.items():
+        if server_class is StubH2LLMServer and not HTTP2_AVAILABLE:
+            print(f"{name:>9} {'skipped (no h2 package)':>21}")
+            continue
+        with server_class(latency=args.latency) as server:
+            ffs = run(server, properties, args.flowfiles)
+            print(f"{name:>9} {ffs:>8.1f} {server.connections:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Startup benchmark: import time of the processor packages (-X importtime).
+
+NiFi starts a Python process per processor and imports its package before
+the processor can be scheduled, so the import time of a package is paid
+on every NiFi start, restart and venv rebuild. Each package is imported
+in a fresh interpreter with -X importtime; only the imports made by the
+package itself are counted (the interpreter's own startup and the nifiapi
+stub are excluded). Reported: median total import time over --repeat runs
+and the modules with the largest cumulative time.
+
+A first, uncounted run writes the bytecode caches (even when
+PYTHONDONTWRITEBYTECODE is set), so the numbers are those of a process
+whose __pycache__ is warm; --no-bytecode measures compiling from source
+on every start instead (read-only deployments).
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--top 15] [--no-bytecode]
+        [--output imports.json] [module ...]    # default: every package under src/
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from bench_common import SRC_DIR, setup_paths
+
+# Written to stderr right before the measured import
+MARKER = "--- bench_import: measured import starts ---"
+
+CHILD_CODE = f"""
+import sys
+sys.path.insert(0, {str(Path(__file__).resolve().parent)!r})
+from bench_common import install_nifiapi_stub, setup_paths
+setup_paths()
+install_nifiapi_stub()
+sys.stderr.write({MARKER!r} + "\\n")
+sys.stderr.flush()
+import {{module}}
+"""
+
+
+class ImportedModule(NamedTuple):
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(stderr: str) -> List[ImportedModule]:
+    """Modules imported after MARKER, in -X importtime order (children first)."""
+    modules = []
+    lines = stderr.splitlines()
+    start = lines.index(MARKER) + 1 if MARKER in lines else 0
+    for line in lines[start:]:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append(ImportedModule(name.strip(), depth, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(module: str, bytecode: bool = True) -> List[ImportedModule]:
+    """Import `module` in a fresh interpreter; the modules it pulled in."""
+    env = dict(os.environ)
+    if bytecode:
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+    else:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+    flags = [] if bytecode else ["-B"]
+    proc = subprocess.run(
+        [sys.executable, *flags, "-X", "importtime", "-c", CHILD_CODE.format(module=module)],
+        capture_output=True, text=True, check=False, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    return parse_importtime(proc.stderr)
+
+
+def total_ms(modules: List[ImportedModule]) -> float:
+    return sum(m.self_us for m in modules) / 1000.0
+
+
+def run(module: str, repeat: int, bytecode: bool = True) -> Dict:
+    """Median import time of `module` over `repeat` fresh interpreters."""
+    if bytecode:
+        # Writes the __pycache__ files the measured runs load
+        measure(module)
+    runs = [measure(module, bytecode) for _ in range(repeat)]
+    totals = [total_ms(modules) for modules in runs]
+    median = statistics.median(totals)
+    # Module breakdown of the run closest to the median
+    modules = min(runs, key=lambda r: abs(total_ms(r) - median))
+    return {
+        "module": module,
+        "import_ms": median,
+        "min_ms": min(totals),
+        "max_ms": max(totals),
+        "modules": [m._asdict() for m in modules],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", help="packages to import (default: all under src/)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="heaviest modules to list")
+    parser.add_argument("--no-bytecode", action="store_true",
+                        help="compile from source on every import (no __pycache__)")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    args = parser.parse_args()
+
+    setup_paths()
+    names = args.modules or sorted(
+        p.name for p in SRC_DIR.iterdir() if (p / "__init__.py").is_file()
+    )
+    rows = []
+    for name in names:
+        row = run(name, args.repeat, bytecode=not args.no_bytecode)
+        rows.append(row)
+        print(f"{name}: {row['import_ms']:.1f} ms "
+              f"(min {row['min_ms']:.1f}, max {row['max_ms']:.1f}, "
+              f"{len(row['modules'])} modules)")
+        heaviest = sorted(row["modules"], key=lambda m: -m["cumulative_us"])[:args.top]
+        for m in heaviest:
+            print(f"    {m['cumulative_us'] / 1000.0:8.2f} ms  {'  ' * m['depth']}{m['name']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+FlowFiles/sec of LLMRequestProcessor versus in-flight concurrency.
+
+Runs against the local stub server with a fixed simulated inference
+latency, so the numbers show how well the processor hides latency:
+
+  1) one Python worker thread submitting FlowFile texts to the
+     InFlightDispatcher (Max In-Flight Requests = N) and waiting for all;
+  2) 16 NiFi tasks sharing one processor instance in one Python process,
+     capped by Max In-Flight Requests.
+
+Usage:
+    python benchmarks/bench_inflight.py [--latency 0.05] [--flowfiles 200]
+"""
+
+import argparse
+import threading
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, setup_paths, timed
+
+setup_paths()
+install_nifiapi_stub()
+
+from dispatcher import InFlightDispatcher  # noqa: E402
+from llm_client import call_llm, create_session  # noqa: E402
+from llm_processor import LLMRequestProcessor  # noqa: E402
+from llm_stub_server import StubLLMServer  # noqa: E402
+
+LEVELS = (1, 2, 4, 8, 16, 32)
+
+
+def bench_single_worker(server, flowfiles: int, in_flight: int) -> float:
+    session = create_session(pool_maxsize=in_flight)
+    dispatcher = InFlightDispatcher(in_flight, max_queued=flowfiles)
+
+    def one(i):
+        return call_llm(server.host, str(server.port), "", 0.0, f"doc {i}", session=session)
+
+    def run():
+        futures = [dispatcher.submit(one, i) for i in range(flowfiles)]
+        return [f.result() for f in futures]
+
+    try:
+        _, elapsed = timed(run)
+    finally:
+        dispatcher.shutdown()
+        session.close()
+    return flowfiles / elapsed
+
+
+def bench_shared_processor(server, flowfiles: int, in_flight: int, tasks: int = 16) -> float:
+    proc = LLMRequestProcessor()
+    context = FakeContext({
+        "HOST": server.host,
+        "PORT": str(server.port),
+        "Max In-Flight Requests": str(in_flight),
+        "Max Queued Requests": str(tasks),
+    })
+    proc.onScheduled(context)
+
+    per_task = flowfiles // tasks
+
+    def nifi_task():
+        for i in range(per_task):
+            proc.transform(context, FakeFlowFile(f"doc {i}".encode("utf-8")))
+
+    threads = [threading.Thread(target=nifi_task) for _ in range(tasks)]
+
+    def run():
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    try:
+        _, elapsed = timed(run)
+    finally:
+        proc.onStopped(context)
+    return per_task * tasks / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency, seconds")
+    parser.add_argument("--flowfiles", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubLLMServer(latency=args.latency) as server:
+        print(f"stub latency={args.latency * 1000:.0f} ms, flowfiles={args.flowfiles}")
+        print(f"{'in-flight':>10} {'1 worker ff/s':>14} {'16 tasks ff/s':>14}")
+        for level in LEVELS:
+            single = bench_single_worker(server, args.flowfiles, level)
+            shared = bench_shared_processor(server, args.flowfiles, level)
+            print(f"{level:>10} {single:>14.1f} {shared:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of the JSON codec backends (json_codec.py).
+
+Payloads mirror the processors' hot paths:
+  - llm-response: a /generate response body (~1 KB, non-ASCII text);
+  - llm-batch: a batched response with 32 results;
+  - swap-N: a flat object of N string pairs, as swapped by JsonKeyValueSwap.
+
+For each payload and available backend, prints loads and dumps
+throughput (MB/s of JSON) and the speedup over the stdlib.
+
+Usage:
+    python benchmarks/bench_json_codec.py [--seconds 0.5]
+"""
+
+import argparse
+import time
+
+from bench_common import setup_paths
+
+setup_paths()
+
+from json_codec import available_codecs, get_codec  # noqa: E402
+
+
+def payloads():
+    text = "Ответ модели: краткое резюме документа. " * 25
+    yield "llm-response", {"response": text, "tokens": 100, "model": "stub"}
+    yield "llm-batch", {"results": [{"text": text} for _ in range(32)]}
+    for n in (100, 10_000, 1_000_000):
+        yield f"swap-{n}", {f"value-{i}": f"ключ-{i:08d}" for i in range(n)}
+
+
+def rate(fn, arg, seconds: float) -> float:
+    """Calls per second of fn(arg), measured for about `seconds`."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(arg)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    codecs = [get_codec(name) for name in available_codecs()]
+    baseline = get_codec("json")
+
+    print(f"{'payload':>14} {'KB':>9} {'codec':>8} "
+          f"{'loads MB/s':>11} {'x':>5} {'dumps MB/s':>11} {'x':>5}")
+    for name, obj in payloads():
+        data = baseline.dumps(obj)
+        mb = len(data) / (1024 * 1024)
+        base_loads = rate(baseline.loads, data, args.seconds)
+        base_dumps = rate(baseline.dumps, obj, args.seconds)
+
+        for codec in codecs:
+            assert codec.dumps(obj) == data
+            loads = base_loads if codec is baseline else rate(codec.loads, data, args.seconds)
+            dumps = base_dumps if codec is baseline else rate(codec.dumps, obj, args.seconds)
+            print(f"{name:>14} {len(data) / 1024:>9.1f} {codec.name:>8} "
+                  f"{loads * mb:>11.1f} {loads / base_loads:>5.1f} "
+                  f"{dumps * mb:>11.1f} {dumps / base_dumps:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Peak memory and throughput of JsonKeyValueSwap: in-memory vs streaming.
+
+Each mode runs in a fresh child process (ru_maxrss is a high-water mark
+and never goes down) which builds the same JSON document, records its RSS
+and then swaps it once through the processor. Reported:
+
+  - extra peak RSS over the process with the document already loaded;
+  - MB/s of input content.
+
+Two documents are used: all values unique (the swap index is as large as
+the output) and values from a small set (many collisions, small output).
+
+Usage:
+    python benchmarks/bench_json_swap.py [--size-mb 100] [--value-len 24] [--distinct 1000]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, setup_paths, timed
+
+MODES = {
+    "in-memory": "0",   # Streaming Threshold 0 = never stream
+    "streaming": "1",
+}
+
+
+def build_document(size_mb: int, value_len: int, distinct: int = 0) -> bytearray:
+    """
+    Top-level object of scalar values, roughly size_mb large; values are
+    unique, or taken from `distinct` different ones.
+
+    Written pair by pair, so building it does not raise the peak RSS
+    above the document itself.
+    """
+    pair = value_len + 24
+    count = size_mb * 1024 * 1024 // pair
+    data = bytearray(b"{")
+    for i in range(count):
+        if i:
+            data += b", "
+        value = i % distinct if distinct else i
+        data += f'"key-{i:012d}": "{value:0{value_len}d}"'.encode("utf-8")
+    data += b"}"
+    return data
+
+
+def _max_rss_mb() -> float:
+    # Linux reports KiB, macOS bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_child(mode: str, size_mb: int, value_len: int, distinct: int) -> None:
+    setup_paths()
+    install_nifiapi_stub()
+    from demo_processor import JsonKeyValueSwap
+
+    data = build_document(size_mb, value_len, distinct)
+    flowfile = FakeFlowFile(data)
+    context = FakeContext({"Streaming Threshold": MODES[mode]})
+    proc = JsonKeyValueSwap()
+
+    baseline = _max_rss_mb()
+    result, elapsed = timed(proc.transform, context, flowfile)
+    assert result.relationship == "success", result.attributes
+
+    print(json.dumps({
+        "mode": mode,
+        "input_mb": len(data) / (1024 * 1024),
+        "extra_peak_rss_mb": _max_rss_mb() - baseline,
+        "mb_per_sec": len(data) / (1024 * 1024) / elapsed,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--value-len", type=int, default=24)
+    parser.add_argument("--distinct", type=int, default=1000)
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_child(args.mode, args.size_mb, args.value_len, args.distinct)
+        return
+
+    print(f"{'values':>14} {'mode':>10} {'input MB':>9} {'extra peak RSS MB':>18} {'MB/s':>8}")
+    for distinct in (0, args.distinct):
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode,
+                 "--size-mb", str(args.size_mb), "--value-len", str(args.value_len),
+                 "--distinct", str(distinct)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            row = json.loads(out)
+            label = f"{distinct} distinct" if distinct else "unique"
+            print(f"{label:>14} {mode:>10} {row['input_mb']:>9.1f} "
+                  f"{row['extra_peak_rss_mb']:>18.1f} {row['mb_per_sec']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+JVM round-trips (getProperty / getAttribute) per FlowFile of LLMRequestProcessor.
+
+Over Py4J every context.getProperty() and flowfile.getAttribute() call
+crosses into the JVM. This benchmark runs FlowFiles through the processor
+against the local stub server with counting context/FlowFile wrappers and
+reports, per configuration:
+
+  - getProperty() calls in onScheduled() and per FlowFile;
+  - getAttribute() calls per FlowFile;
+  - JVM time per FlowFile if every call cost --jvm-us microseconds.
+
+Configurations: static System Prompt/Temperature, a System Prompt with
+${attribute} references (only those attributes are read per FlowFile),
+and the same plus a Prompt Template sharing one of the attributes (read
+once all the same).
+
+Usage:
+    python benchmarks/bench_jvm_calls.py [--flowfiles 200] [--jvm-us 50]
+"""
+
+import argparse
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, setup_paths
+
+setup_paths()
+install_nifiapi_stub()
+
+from llm_processor import LLMRequestProcessor  # noqa: E402
+from llm_stub_server import StubLLMServer  # noqa: E402
+
+CONFIGS = {
+    "static": {"System Prompt": "Ответь кратко.", "Temperature": "0.2"},
+    "${attrs}": {"System Prompt": "Тип: ${doc.type}, язык: ${lang}.", "Temperature": "0.2"},
+    "template": {
+        "System Prompt": "Тип: ${doc.type}, язык: ${lang}.",
+        "Prompt Template": "${content}\n\n(${doc.type})",
+    },
+}
+
+
+class CountingContext(FakeContext):
+    def __init__(self, properties=None):
+        super().__init__(properties)
+        self.calls = 0
+
+    def getProperty(self, name: str):
+        self.calls += 1
+        return super().getProperty(name)
+
+
+class CountingFlowFile(FakeFlowFile):
+    calls = 0
+
+    def getAttribute(self, name: str):
+        CountingFlowFile.calls += 1
+        return super().getAttribute(name)
+
+
+def run(server: StubLLMServer, properties: dict, flowfiles: int):
+    """(getProperty calls in onScheduled, per FlowFile; getAttribute per FlowFile)."""
+    ctx = CountingContext(dict(properties, HOST=server.host, PORT=str(server.port)))
+    proc = LLMRequestProcessor()
+    proc.onScheduled(ctx)
+    scheduled = ctx.calls
+    CountingFlowFile.calls = 0
+    try:
+        for i in range(flowfiles):
+            flowfile = CountingFlowFile(b"hello", {"doc.type": f"t{i % 3}", "lang": "ru"})
+            result = proc.transform(ctx, flowfile)
+            assert result.relationship == "success", result.attributes
+    finally:
+        proc.onStopped(ctx)
+    return scheduled, (ctx.calls - scheduled) / flowfiles, CountingFlowFile.calls / flowfiles
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--flowfiles", type=int, default=200)
+    parser.add_argument("--jvm-us", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"{'config':>9} {'onScheduled':>12} {'getProperty/FF':>15} "
+          f"{'getAttribute/FF':>16} {'JVM us/FF':>10}")
+    with StubLLMServer() as server:
+        for name, properties in CONFIGS.items():
+            scheduled, per_ff, attrs_per_ff = run(server, properties, args.flowfiles)
+            print(f"{name:>9} {scheduled:>12} {per_ff:>15.1f} {attrs_per_ff:>16.1f} "
+                  f"{(per_ff + attrs_per_ff) * args.jvm_us:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Load generator: drive LLMRequestProcessor through the local stub LLM server.
+
+--tasks NiFi tasks (threads) share one processor instance, like a
+processor with that many Concurrent Tasks, and push FlowFiles through
+transform() until --flowfiles are done or --duration seconds have
+passed. The stub server takes every option of llm_stub_server.py, so
+latency distributions, throughput limits, injected 429/503 and replayed
+recordings can be combined with any processor properties:
+
+    python benchmarks/bench_load.py --latency lognormal:0.05,0.5 --error-rate 0.05 \\
+        --retry-after 0.1 --property "Max In-Flight Requests=8" --property "Max Retries=3"
+
+Reported: FlowFiles/sec, p50/p95/p99 transform() latency, FlowFiles per
+relationship and the server's counters (requests, connections, injected
+errors, 429 rejections, peak concurrency). --output saves them as JSON.
+
+Usage:
+    python benchmarks/bench_load.py [--tasks 16] [--flowfiles 1000 | --duration 10]
+        [--corpus DIR|FILE.ndjson] [--property NAME=VALUE] [--backends 1]
+        [stub server options, see llm_stub_server.py --help] [--output load.json]
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+
+from bench_common import FakeContext, FakeFlowFile, install_nifiapi_stub, percentile, setup_paths
+
+setup_paths()
+install_nifiapi_stub()
+
+from bench_processors import load_corpus, parse_properties  # noqa: E402
+from llm_processor import LLMRequestProcessor  # noqa: E402
+from llm_stub_server import add_server_arguments, server_from_args  # noqa: E402
+
+PROCESSOR = "LLMRequestProcessor"
+
+
+def run(servers, properties: dict, corpus, tasks: int, flowfiles: int, duration: float) -> dict:
+    """Push FlowFiles through one processor from `tasks` threads and return the numbers."""
+    endpoints = ",".join(f"{s.host}:{s.port}" for s in servers)
+    context = FakeContext(dict({"HOST": endpoints, "PORT": ""}, **properties))
+    proc = LLMRequestProcessor()
+    proc.onScheduled(context)
+
+    numbers = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    relationships = {}
+    deadline = time.monotonic() + duration if duration else None
+
+    def nifi_task():
+        while True:
+            i = next(numbers)
+            if (flowfiles and i >= flowfiles) or (deadline and time.monotonic() >= deadline):
+                return
+            flowfile = FakeFlowFile(corpus[i % len(corpus)])
+            started = time.perf_counter()
+            result = proc.transform(context, flowfile)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                relationships[result.relationship] = relationships.get(result.relationship, 0) + 1
+
+    threads = [threading.Thread(target=nifi_task) for _ in range(tasks)]
+    started = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        proc.onStopped(context)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "flowfiles": len(latencies),
+        "seconds": elapsed,
+        "flowfiles_per_sec": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "relationships": relationships,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=16, help="concurrent NiFi tasks")
+    parser.add_argument("--flowfiles", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=0.0,
+                        help="seconds to run instead of a FlowFile count")
+    parser.add_argument("--corpus", type=Path, help="directory or .ndjson file (default: short texts)")
+    parser.add_argument("--property", action="append", default=[],
+                        metavar="NAME=VALUE", help="LLMRequestProcessor property")
+    parser.add_argument("--backends", type=int, default=1,
+                        help="stub server replicas (listed in HOST)")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = (load_corpus(args.corpus) if args.corpus
+              else [f"Document {i}: summarize me.".encode("utf-8") for i in range(100)])
+    properties = parse_properties(args.property, PROCESSOR)
+    flowfiles = 0 if args.duration else args.flowfiles
+
+    servers = [server_from_args(args).start() for _ in range(args.backends)]
+    try:
+        row = run(servers, properties, corpus, args.tasks, flowfiles, args.duration)
+    finally:
+        for server in servers:
+            server.stop()
+    server_stats = [server.stats() for server in servers]
+    row["server"] = {key: sum(s[key] for s in server_stats) for key in server_stats[0]}
+    row["server"]["peak_active"] = max(s["peak_active"] for s in server_stats)
+
+    print(f"{row['flowfiles']} FlowFiles in {row['seconds']:.2f}s: "
+          f"{row['flowfiles_per_sec']:.1f} FF/s, p50 {row['p50_ms']:.1f} ms, "
+          f"p95 {row['p95_ms']:.1f} ms, p99 {row['p99_ms']:.1f} ms")
+    print(f"relationships: {row['relationships']}")
+    print(f"server: {row['server']}")
+
+    if args.output:
+        args.output.write_text(json.dumps(dict(row, args={
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+        }), indent=2))
+
+
+if __name__ == "__main__":
+    main()
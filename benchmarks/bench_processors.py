@@ -0,0 +1,271 @@
+"""
+Offline throughput, latency and memory of every processor, outside NiFi.
+
+Processors are discovered like the contract test does: every FlowFileTransform
+subclass defined in src/<pkg>/__init__.py or src/<pkg>/*.py. A corpus of
+FlowFiles is replayed through transform() on the strict nifiapi stubs:
+
+  - a directory: every file is one FlowFile (sorted by name);
+  - an .ndjson / .jsonl file: every non-empty line is one FlowFile;
+  - any other file: the whole file is one FlowFile;
+  - no --corpus: a built-in corpus of small flat JSON objects.
+
+Each processor runs in a fresh child process (ru_maxrss is a high-water
+mark and never goes down), with the default values of its property
+descriptors overridden by --property. Processors with a HOST property are
+pointed at a local StubLLMServer unless HOST is given.
+
+Reported per processor: FlowFiles/sec, input bytes/sec, p50/p95/p99
+transform() latency, extra peak RSS and FlowFiles per relationship.
+--output saves the results as JSON; --compare prints the change against
+such a file from an earlier run.
+
+Usage:
+    python benchmarks/bench_processors.py [--corpus DIR|FILE.ndjson] [--repeat 3]
+        [--warmup 20] [--processor NAME] [--property [PROCESSOR:]NAME=VALUE]
+        [--llm-latency 0.0] [--output run.json] [--compare old.json]
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from bench_common import (
+    SRC_DIR,
+    FakeContext,
+    FakeFlowFile,
+    install_nifiapi_stub,
+    percentile,
+    setup_paths,
+)
+
+# Processors declaring this property talk to the LLM server (stub started for them)
+STUB_SERVER_PROPERTY = "HOST"
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def iter_module_names(src_root: Path = SRC_DIR) -> Iterable[str]:
+    """'<pkg>' and '<pkg>.<module>' of src/<pkg>/, as in the contract test."""
+    for pkg_dir in sorted(src_root.iterdir()):
+        if not pkg_dir.is_dir() or pkg_dir.name.startswith(("_", ".")):
+            continue
+        if (pkg_dir / "__init__.py").is_file():
+            yield pkg_dir.name
+        for py in sorted(pkg_dir.glob("*.py")):
+            if not py.name.startswith("_"):
+                yield f"{pkg_dir.name}.{py.stem}"
+
+
+def discover_processors(src_root: Path = SRC_DIR) -> Dict[str, type]:
+    """FlowFileTransform classes by class name (nifiapi must be importable)."""
+    from nifiapi.flowfiletransform import FlowFileTransform
+
+    found = {}
+    for mod_name in iter_module_names(src_root):
+        try:
+            mod = importlib.import_module(mod_name)
+        except Exception as e:
+            print(f"skipping {mod_name}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        for _, cls in inspect.getmembers(mod, inspect.isclass):
+            if cls.__module__ == mod.__name__ and issubclass(cls, FlowFileTransform):
+                found.setdefault(cls.__name__, cls)
+    return found
+
+
+def load_corpus(path: Optional[Path]) -> List[bytes]:
+    """FlowFile contents from a directory, an NDJSON file or a single file."""
+    if path is None:
+        return default_corpus()
+    if path.is_dir():
+        return [p.read_bytes() for p in sorted(path.iterdir())
+                if p.is_file() and not p.name.startswith(".")]
+    if path.suffix in NDJSON_SUFFIXES:
+        return [line for line in path.read_bytes().splitlines() if line.strip()]
+    return [path.read_bytes()]
+
+
+def default_corpus(count: int = 200, keys: int = 20) -> List[bytes]:
+    """Flat JSON objects of `keys` string values (valid input for every processor)."""
+    return [
+        json.dumps({f"key-{i}-{k}": f"value {i}.{k}" for k in range(keys)}).encode("utf-8")
+        for i in range(count)
+    ]
+
+
+def parse_properties(items: Iterable[str], processor: str) -> Dict[str, str]:
+    """
+    --property values for one processor: NAME=VALUE applies to every
+    processor, PROCESSOR:NAME=VALUE only to that one.
+    """
+    properties = {}
+    for item in items:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"--property {item!r}: expected NAME=VALUE")
+        scope, sep, name = name.rpartition(":")
+        if not sep or scope == processor:
+            properties[name] = value
+    return properties
+
+
+def _max_rss_mb() -> float:
+    # Linux reports KiB, macOS bytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_processor(cls: type, corpus: List[bytes], properties: Dict[str, str],
+                  repeat: int = 1, warmup: int = 0) -> dict:
+    """
+    Replay the corpus `repeat` times through one processor instance (after
+    `warmup` untimed FlowFiles) and return its numbers.
+
+    properties override the descriptor defaults. Peak RSS is measured in
+    this process, so it is only meaningful in a fresh one.
+    """
+    proc = cls()
+    defaults = {
+        pd.name: pd.default_value for pd in proc.getPropertyDescriptors()
+        if getattr(pd, "default_value", None) is not None
+    }
+    context = FakeContext(dict(defaults, **properties))
+
+    baseline = _max_rss_mb()
+    if hasattr(proc, "onScheduled"):
+        proc.onScheduled(context)
+    relationships: Dict[str, int] = {}
+    latencies = []
+    try:
+        for data in corpus[:warmup]:
+            proc.transform(context, FakeFlowFile(data))
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for data in corpus:
+                t0 = time.perf_counter()
+                result = proc.transform(context, FakeFlowFile(data))
+                latencies.append(time.perf_counter() - t0)
+                relationships[result.relationship] = relationships.get(result.relationship, 0) + 1
+        elapsed = time.perf_counter() - started
+    finally:
+        if hasattr(proc, "onStopped"):
+            proc.onStopped(context)
+
+    latencies.sort()
+    flowfiles = len(latencies)
+    size = sum(len(data) for data in corpus) * repeat
+    return {
+        "flowfiles": flowfiles,
+        "bytes": size,
+        "seconds": elapsed,
+        "flowfiles_per_sec": flowfiles / elapsed if elapsed else 0.0,
+        "bytes_per_sec": size / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else 0.0,
+        "extra_peak_rss_mb": _max_rss_mb() - baseline,
+        "relationships": relationships,
+    }
+
+
+def run_child(name: str, args) -> None:
+    cls = discover_processors()[name]
+    corpus = load_corpus(args.corpus)
+    properties = parse_properties(args.property, name)
+    names = {pd.name for pd in cls().getPropertyDescriptors()}
+
+    server = None
+    if STUB_SERVER_PROPERTY in names and STUB_SERVER_PROPERTY not in properties:
+        from llm_stub_server import StubLLMServer
+
+        server = StubLLMServer(latency=args.llm_latency).start()
+        properties.update(HOST=server.host, PORT=str(server.port))
+    try:
+        row = run_processor(cls, corpus, properties, args.repeat, args.warmup)
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(row))
+
+
+def print_comparison(results: Dict[str, dict], previous: dict) -> None:
+    print(f"\n{'vs ' + previous.get('started', 'previous run'):>24} "
+          f"{'FF/s':>8} {'p50':>8} {'p99':>8}")
+    for name, row in results.items():
+        old = previous.get("results", {}).get(name)
+        if old is None:
+            print(f"{name:>24} {'(new)':>8}")
+            continue
+
+        def change(key):
+            return f"{(row[key] / old[key] - 1) * 100:+.1f}%" if old[key] else "-"
+
+        print(f"{name:>24} {change('flowfiles_per_sec'):>8} "
+              f"{change('p50_ms'):>8} {change('p99_ms'):>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, help="directory, .ndjson file or single file")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed FlowFiles first")
+    parser.add_argument("--processor", action="append", default=[], help="only these (by class)")
+    parser.add_argument("--property", action="append", default=[],
+                        metavar="[PROCESSOR:]NAME=VALUE")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub latency, seconds")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    setup_paths()
+    install_nifiapi_stub()
+    if args.child:
+        run_child(args.child, args)
+        return
+
+    names = sorted(discover_processors())
+    if args.processor:
+        names = [name for name in names if name in args.processor]
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    results = {}
+    print(f"{'processor':>24} {'FF/s':>9} {'MB/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'peak MB':>8}  relationships")
+    for name in names:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", name, *sys.argv[1:]],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        row = results[name] = json.loads(out.splitlines()[-1])
+        print(f"{name:>24} {row['flowfiles_per_sec']:>9.1f} "
+              f"{row['bytes_per_sec'] / (1024 * 1024):>8.2f} {row['p50_ms']:>8.3f} "
+              f"{row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['extra_peak_rss_mb']:>8.1f}  "
+              f"{row['relationships']}")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "started": started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": str(args.corpus) if args.corpus else "built-in",
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "properties": args.property,
+            "results": results,
+        }, indent=2))
+    if args.compare:
+        print_comparison(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
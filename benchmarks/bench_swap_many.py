@@ -0,0 +1,63 @@
+"""
+Records/sec of the batch swap API versus the scalar loop.
+
+Compares, on the same parsed records:
+  - loop: [swap_top_level(r) for r in records];
+  - swap_many(records): bulk validation/stringification per record;
+  - swap_columns(columns): the same rows in columnar form.
+
+Two record shapes: all-string values (typical after JSON parsing of
+text fields) and mixed scalars (int/float/bool/None/str).
+
+Usage:
+    python benchmarks/bench_swap_many.py [--records 100000] [--keys 10]
+"""
+
+import argparse
+
+from bench_common import setup_paths, timed
+
+setup_paths()
+
+from swap import swap_columns, swap_many, swap_top_level  # noqa: E402
+
+
+def make_records(count: int, keys: int, mixed: bool):
+    scalars = (lambda i: i, lambda i: i / 3, lambda i: i % 2 == 0, lambda i: None, str)
+    records = []
+    for i in range(count):
+        if mixed:
+            records.append({f"k{j}": scalars[j % len(scalars)](i + j) for j in range(keys)})
+        else:
+            records.append({f"k{j}": f"v{(i + j) % 1000}" for j in range(keys)})
+    return records
+
+
+def to_columns(records):
+    return {name: [r[name] for r in records] for name in records[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'shape':>7} {'method':>13} {'records/s':>12} {'x':>5}")
+    for mixed in (False, True):
+        shape = "mixed" if mixed else "str"
+        records = make_records(args.records, args.keys, mixed)
+        columns = to_columns(records)
+
+        expected, loop_s = timed(lambda: [swap_top_level(r) for r in records])
+        many, many_s = timed(swap_many, records)
+        cols, cols_s = timed(swap_columns, columns)
+        assert many == expected and cols == expected
+
+        for method, seconds in (("loop", loop_s), ("swap_many", many_s), ("swap_columns", cols_s)):
+            print(f"{shape:>7} {method:>13} {args.records / seconds:>12,.0f} "
+                  f"{loop_s / seconds:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
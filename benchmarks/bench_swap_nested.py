@@ -0,0 +1,104 @@
+"""
+Leaves/sec and peak traced memory of the nested (deep) swap.
+
+Compares, on the same parsed documents:
+  - eager: a recursive flatten into a {path: leaf} dict, then the flat
+    swap of that dict (the flattened document is built in full);
+  - swap_deep: iterative, lazy walk straight into the swap.
+
+Two document shapes: deep (one chain of nested objects, deeper than the
+recursion limit by default) and wide (many top-level keys, each holding
+a list of small objects). Paths grow with depth, so the output of the
+deep document is O(depth^2) characters whatever the method.
+
+Usage:
+    python benchmarks/bench_swap_nested.py [--depth 5000] [--width 20000] [--items 10]
+"""
+
+import argparse
+import tracemalloc
+
+from bench_common import setup_paths, timed
+
+setup_paths()
+
+from swap import swap_top_level  # noqa: E402
+from swap_nested import iter_leaves, swap_deep  # noqa: E402
+
+
+def deep_document(depth: int) -> dict:
+    doc = leaf = {}
+    for i in range(depth):
+        leaf["k"] = {"v": i}
+        leaf = leaf["k"]
+    return doc
+
+
+def wide_document(width: int, items: int) -> dict:
+    return {
+        f"key-{i}": [{"id": i * items + j, "name": f"n{j}", "ok": j % 2 == 0} for j in range(items)]
+        for i in range(width)
+    }
+
+
+def eager_swap(doc: dict) -> dict:
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict) and value:
+            for key, child in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, child)
+        elif isinstance(value, list) and value:
+            for i, child in enumerate(value):
+                walk(f"{prefix}[{i}]", child)
+        else:
+            flat[prefix] = value
+
+    walk("", doc)
+    return swap_top_level(flat)
+
+
+def measure(fn, doc):
+    """
+    (result, seconds, peak traced MB) of fn(doc), or (error, None, None).
+
+    Timed and traced in separate runs: tracemalloc slows down every
+    allocation and would skew the comparison.
+    """
+    try:
+        result, seconds = timed(fn, doc)
+    except RecursionError as e:
+        return e, None, None
+    del result
+    tracemalloc.start()
+    try:
+        result = fn(doc)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=5_000)
+    parser.add_argument("--width", type=int, default=20_000)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'shape':>6} {'method':>10} {'leaves/s':>12} {'peak MB':>9}")
+    for shape, doc in (("deep", deep_document(args.depth)),
+                       ("wide", wide_document(args.width, args.items))):
+        deep = swap_deep(doc).swapped
+        leaves = sum(1 for _ in iter_leaves(doc))
+        for method, fn in (("eager", eager_swap), ("swap_deep", lambda d: swap_deep(d).swapped)):
+            result, seconds, peak = measure(fn, doc)
+            if seconds is None:
+                print(f"{shape:>6} {method:>10} {type(result).__name__:>12} {'-':>9}")
+                continue
+            assert result == deep
+            print(f"{shape:>6} {method:>10} {leaves / seconds:>12,.0f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
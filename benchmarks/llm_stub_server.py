@@ -0,0 +1,603 @@
+"""
+Local stand-in for the LLM server's POST /generate endpoint.
+
+Used by tests and benchmarks so LLMRequestProcessor can be exercised
+without a real GPU box. Runs in a background thread on 127.0.0.1.
+StubH2LLMServer answers the same requests over HTTP/2 with prior
+knowledge (h2c); it needs the 'h2' package.
+
+Besides echoing prompts in every response shape call_llm() understands,
+the stub simulates what load tests need:
+
+  - latency distributions ("lognormal:0.3,0.5", see parse_latency()) and
+    extra latency per prompt of a batched request;
+  - a throughput limit: max_concurrency requests are answered at once,
+    up to max_queue more wait, the rest get 429;
+  - injected 429/503 failures (a fraction, or the first N requests), with
+    an optional Retry-After;
+  - streaming (SSE, NDJSON or raw chunks);
+  - record/replay: proxy to a real server and append every exchange to an
+    NDJSON file, then answer the same prompts from that file offline.
+
+Usage:
+    with StubLLMServer(latency=0.05) as server:
+        call_llm(host=server.host, port=str(server.port), ...)
+
+    python benchmarks/llm_stub_server.py --port 8000 --latency lognormal:0.3,0.5 \\
+        [--error-rate 0.05 --error-status 429 --retry-after 1] [--max-concurrency 4]
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import socket
+import socketserver
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+SHAPES = ("response", "generated_text", "results")
+STREAM_FORMATS = ("sse", "ndjson", "raw")
+
+
+class Reply(NamedTuple):
+    """Status, JSON body and extra headers of one answer."""
+
+    status: int
+    body: dict
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+def parse_latency(spec, rng: Optional[random.Random] = None) -> Callable[[], float]:
+    """
+    Latency sampler (seconds) from a spec:
+
+      - "0.05": fixed;
+      - "uniform:LOW,HIGH";
+      - "normal:MEAN,STDDEV" (cut at 0);
+      - "lognormal:MEDIAN,SIGMA" (long right tail, like real inference);
+      - "exp:MEAN";
+      - "bimodal:FAST,SLOW,SHARE": SLOW for SHARE of the requests.
+    """
+    rng = rng or random.Random()
+    kind, _, args = str(spec).partition(":")
+    if not args:
+        value = float(kind)
+        return lambda: value
+    params = [float(a) for a in args.split(",")]
+    try:
+        if kind == "uniform":
+            low, high = params
+            return lambda: rng.uniform(low, high)
+        if kind == "normal":
+            mean, stddev = params
+            return lambda: max(rng.gauss(mean, stddev), 0.0)
+        if kind == "lognormal":
+            median, sigma = params
+            return lambda: rng.lognormvariate(math.log(median), sigma)
+        if kind == "exp":
+            (mean,) = params
+            return lambda: rng.expovariate(1.0 / mean)
+        if kind == "bimodal":
+            fast, slow, share = params
+            return lambda: slow if rng.random() < share else fast
+    except ValueError:
+        raise ValueError(f"latency {spec!r}: wrong number of parameters") from None
+    raise ValueError(f"latency {spec!r}: unknown distribution {kind!r}")
+
+
+def _replay_key(payload: dict) -> str:
+    return json.dumps([payload.get("system_prompt"), payload.get("prompt")], ensure_ascii=False)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+        # Keep test output quiet
+        pass
+
+    def do_POST(self):
+        server: "StubLLMServer" = self.server.owner
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+        except ValueError:
+            self._send_reply(Reply(400, {"error": "invalid JSON"}))
+            return
+
+        server._record(self.client_address, payload)
+
+        if self.path != "/generate":
+            self._send_reply(Reply(404, {"error": "not found"}))
+            return
+
+        failure = server.injected_failure()
+        if failure is not None:
+            self._send_reply(failure)
+            return
+
+        with server.admit() as rejected:
+            if rejected is not None:
+                self._send_reply(rejected)
+                return
+
+            server.sleep_latency(payload)
+
+            if payload.get("stream"):
+                self._send_stream(server, payload)
+                return
+
+            self._send_reply(server.respond(payload))
+
+    def _send_stream(self, server: "StubLLMServer", payload) -> None:
+        content_type = {
+            "sse": "text/event-stream",
+            "ndjson": "application/x-ndjson",
+        }.get(server.stream_format, "text/plain")
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for token in server.stream_tokens(payload):
+                if server.token_latency > 0:
+                    time.sleep(server.token_latency)
+                if server.stream_format == "sse":
+                    chunk = f"data: {json.dumps({'token': token})}\n\n"
+                elif server.stream_format == "ndjson":
+                    chunk = json.dumps({"token": token}) + "\n"
+                else:
+                    chunk = token
+                self._write_chunk(chunk.encode("utf-8"))
+
+            if server.stream_format == "sse":
+                self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cut the generation short
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _send_reply(self, reply: Reply) -> None:
+        raw = json.dumps(reply.body, ensure_ascii=False).encode("utf-8")
+        self.send_response(reply.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in reply.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+class StubLLMServer:
+    """
+    Minimal threaded /generate server.
+
+    - shape: which response format to return ("response",
+      "generated_text" or "results") - all of them are understood by
+      llm_client.call_llm();
+    - latency: seconds to sleep before answering (simulated inference),
+      a parse_latency() spec, or a callable returning them per request;
+    - item_latency: extra seconds per prompt of a batched request;
+    - fail_prompts: prompts answered with an item-level error in
+      batched calls ("prompt" is a list -> {"results": [...]});
+    - stream_format: "sse", "ndjson" or "raw" - how "stream": true
+      requests are answered (chunked transfer encoding);
+    - token_latency: seconds between streamed tokens;
+    - stream_repeat: repeat the echoed text N times when streaming
+      (simulates long generations);
+    - max_concurrency / max_queue: requests answered at once (0 = no
+      limit) and requests allowed to wait for a slot (None = no limit);
+      the rest are rejected with 429;
+    - error_rate / error_status / fail_first: answer this fraction of
+      requests, and the first fail_first ones, with error_status (429 or
+      503); retry_after adds a Retry-After header (seconds) to both kinds
+      of rejection;
+    - upstream / record_path: forward requests to a real server's
+      /generate URL and append {"payload", "status", "response"} lines
+      to record_path;
+    - replay_path: answer requests whose system prompt and prompt are in
+      such a file with the recorded response (others are echoed and
+      counted in replay_misses). Streaming requests are always echoed;
+    - seed: seed of the latency and failure randomness.
+
+    Counters (requests, connections, errors_injected, rejected,
+    peak_active, ...) let tests check pooling and retry behaviour, see
+    stats(); last_payload is the most recent request body.
+    """
+
+    handler_class = _Handler
+
+    def __init__(self, shape: str = "response", latency=0.0,
+                 fail_prompts=(), stream_format: str = "sse",
+                 token_latency: float = 0.0, stream_repeat: int = 1,
+                 item_latency: float = 0.0,
+                 max_concurrency: int = 0, max_queue: Optional[int] = None,
+                 error_rate: float = 0.0, error_status: int = 503, fail_first: int = 0,
+                 retry_after: Optional[float] = None,
+                 upstream: Optional[str] = None, record_path: Optional[str] = None,
+                 replay_path: Optional[str] = None,
+                 seed: Optional[int] = None, host: str = "127.0.0.1", port: int = 0):
+        self._random = random.Random(seed)
+        self.shape = shape
+        self.latency = parse_latency(latency, self._random) if isinstance(latency, str) else latency
+        self.item_latency = item_latency
+        self.fail_prompts = set(fail_prompts)
+        self.stream_format = stream_format
+        self.token_latency = token_latency
+        self.stream_repeat = stream_repeat
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.upstream = upstream
+        self.record_path = record_path
+        self.requests = 0
+        self.errors_injected = 0
+        self.rejected = 0
+        self.peak_active = 0
+        self.replayed = 0
+        self.replay_misses = 0
+        self.recorded = 0
+        self.last_payload = None
+        self._active = 0
+        self._queued = 0
+        self._slots = threading.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self._replay = self._load_replay(replay_path) if replay_path else None
+        self._clients: Set[Tuple[str, int]] = set()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self.handler_class)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._httpd.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    @property
+    def connections(self) -> int:
+        """Number of distinct client sockets seen so far."""
+        with self._lock:
+            return len(self._clients)
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of the counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": len(self._clients),
+                "errors_injected": self.errors_injected,
+                "rejected": self.rejected,
+                "peak_active": self.peak_active,
+                "replayed": self.replayed,
+                "replay_misses": self.replay_misses,
+                "recorded": self.recorded,
+            }
+
+    def sleep_latency(self, payload=None) -> None:
+        """Simulated inference time of one request."""
+        latency = self.latency() if callable(self.latency) else self.latency
+        prompt = (payload or {}).get("prompt")
+        if isinstance(prompt, list):
+            latency += self.item_latency * len(prompt)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _reject(self, status: int, message: str) -> Reply:
+        headers = ()
+        if self.retry_after is not None:
+            headers = (("Retry-After", f"{self.retry_after:g}"),)
+        return Reply(status, {"error": message}, headers)
+
+    def injected_failure(self) -> Optional[Reply]:
+        """Error reply for a request picked by fail_first / error_rate, else None."""
+        with self._lock:
+            failed = (self.requests <= self.fail_first
+                      or (self.error_rate > 0 and self._random.random() < self.error_rate))
+            if failed:
+                self.errors_injected += 1
+        return self._reject(self.error_status, "injected failure") if failed else None
+
+    @contextmanager
+    def admit(self) -> Iterator[Optional[Reply]]:
+        """
+        Hold an inference slot while answering; yields None, or a 429
+        reply when every slot is busy and the queue is full.
+        """
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            with self._lock:
+                full = self.max_queue is not None and self._queued >= self.max_queue
+                if full:
+                    self.rejected += 1
+                else:
+                    self._queued += 1
+            if full:
+                yield self._reject(429, "server overloaded")
+                return
+            self._slots.acquire()
+            with self._lock:
+                self._queued -= 1
+
+        with self._lock:
+            self._active += 1
+            self.peak_active = max(self.peak_active, self._active)
+        try:
+            yield None
+        finally:
+            with self._lock:
+                self._active -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def respond(self, payload) -> Reply:
+        """Replayed, proxied (and recorded) or echoed answer to a request."""
+        if self._replay is not None:
+            hit = self._replay.get(_replay_key(payload))
+            with self._lock:
+                if hit is None:
+                    self.replay_misses += 1
+                else:
+                    self.replayed += 1
+            if hit is not None:
+                return hit
+        if self.upstream:
+            reply = self._forward(payload)
+            if self.record_path:
+                self._write_record(payload, reply)
+            return reply
+        return Reply(200, self.build_response(payload))
+
+    def build_response(self, payload) -> dict:
+        """Echo the prompt back in the configured response shape."""
+        prompt = payload.get("prompt", "")
+        if isinstance(prompt, list):
+            return {"results": [
+                {"error": "rejected"} if p in self.fail_prompts else {"text": f"echo: {p}"}
+                for p in prompt
+            ]}
+
+        text = f"echo: {prompt}"
+        if self.shape == "generated_text":
+            return {"generated_text": text}
+        if self.shape == "results":
+            return {"results": [{"text": text}]}
+        return {"response": text}
+
+    def stream_tokens(self, payload):
+        """Word-sized tokens of the echoed prompt (repeated stream_repeat times)."""
+        text = f"echo: {payload.get('prompt', '')} "
+        for _ in range(self.stream_repeat):
+            yield from re.findall(r"\S+\s*", text)
+
+    def _forward(self, payload) -> Reply:
+        request = urllib.request.Request(
+            self.upstream, data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as resp:
+                return Reply(resp.status, json.loads(resp.read() or b"{}"))
+        except urllib.error.HTTPError as e:
+            raw = e.read()
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                body = {"error": raw.decode("utf-8", "replace")}
+            return Reply(e.code, body)
+        except OSError as e:
+            return Reply(502, {"error": f"upstream unreachable: {e}"})
+
+    def _write_record(self, payload, reply: Reply) -> None:
+        line = json.dumps({"payload": payload, "status": reply.status, "response": reply.body},
+                          ensure_ascii=False)
+        with self._lock:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+
+    @staticmethod
+    def _load_replay(path: str) -> Dict[str, Reply]:
+        replies = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    replies[_replay_key(entry["payload"])] = Reply(
+                        entry.get("status", 200), entry["response"]
+                    )
+        return replies
+
+    def _record(self, client_address, payload) -> None:
+        with self._lock:
+            self.requests += 1
+            self._clients.add(client_address)
+            self.last_payload = payload
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _H2Handler(socketserver.BaseRequestHandler):
+    """
+    One h2c connection. Each request is answered from its own thread, so
+    the streams of one connection are served concurrently (multiplexed).
+    """
+
+    def handle(self):
+        import h2.config
+        import h2.connection
+        import h2.events
+
+        server: "StubH2LLMServer" = self.server.owner
+        # Frames are written one by one; avoid Nagle/delayed-ACK stalls
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        lock = threading.Lock()
+        bodies = {}
+
+        def send(fn=None, *args, **kwargs):
+            with lock:
+                if fn is not None:
+                    fn(*args, **kwargs)
+                self.request.sendall(conn.data_to_send())
+
+        send(conn.initiate_connection)
+        while True:
+            try:
+                data = self.request.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            with lock:
+                events = conn.receive_data(data)
+            send()
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    bodies[event.stream_id] = bytearray()
+                elif isinstance(event, h2.events.DataReceived):
+                    bodies[event.stream_id] += event.data
+                    send(conn.acknowledge_received_data,
+                         event.flow_controlled_length, event.stream_id)
+                elif isinstance(event, h2.events.StreamEnded):
+                    threading.Thread(
+                        target=self._respond,
+                        args=(server, send, conn, event.stream_id, bodies.pop(event.stream_id)),
+                        daemon=True,
+                    ).start()
+                elif isinstance(event, h2.events.ConnectionTerminated):
+                    return
+
+    def _respond(self, server: "StubH2LLMServer", send, conn, stream_id: int, body) -> None:
+        payload = json.loads(body.decode("utf-8") or "{}")
+        server._record(self.client_address, payload)
+        reply = server.injected_failure()
+        if reply is None:
+            with server.admit() as rejected:
+                reply = rejected
+                if reply is None:
+                    server.sleep_latency(payload)
+                    reply = server.respond(payload)
+        raw = json.dumps(reply.body, ensure_ascii=False).encode("utf-8")
+        headers = [(":status", str(reply.status)), ("content-type", "application/json"),
+                   ("content-length", str(len(raw))),
+                   *((name.lower(), value) for name, value in reply.headers)]
+        try:
+            send(conn.send_headers, stream_id, headers)
+            send(conn.send_data, stream_id, raw, end_stream=True)
+        except OSError:
+            pass
+
+
+class StubH2LLMServer(StubLLMServer):
+    """
+    StubLLMServer over HTTP/2 with prior knowledge (h2c), non-streaming
+    responses only. peak_streams is the highest number of requests
+    being answered at the same time.
+    """
+
+    handler_class = _H2Handler
+
+    @property
+    def peak_streams(self) -> int:
+        return self.peak_active
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command line options of the stub server (shared with bench_load.py)."""
+    group = parser.add_argument_group("stub LLM server")
+    group.add_argument("--shape", choices=SHAPES, default="response")
+    group.add_argument("--latency", default="0", help="seconds or a distribution, "
+                       "e.g. uniform:0.1,0.3 / normal:0.2,0.05 / lognormal:0.2,0.5 / "
+                       "exp:0.2 / bimodal:0.02,0.5,0.05")
+    group.add_argument("--item-latency", type=float, default=0.0,
+                       help="extra seconds per prompt of a batched request")
+    group.add_argument("--stream-format", choices=STREAM_FORMATS, default="sse")
+    group.add_argument("--token-latency", type=float, default=0.0)
+    group.add_argument("--stream-repeat", type=int, default=1)
+    group.add_argument("--max-concurrency", type=int, default=0,
+                       help="requests answered at once (0 = no limit)")
+    group.add_argument("--max-queue", type=int, default=None,
+                       help="requests waiting for a slot before 429 (default: no limit)")
+    group.add_argument("--error-rate", type=float, default=0.0)
+    group.add_argument("--error-status", type=int, choices=(429, 503), default=503)
+    group.add_argument("--fail-first", type=int, default=0)
+    group.add_argument("--retry-after", type=float, default=None)
+    group.add_argument("--upstream", help="real /generate URL to proxy to")
+    group.add_argument("--record", help="NDJSON file to append proxied exchanges to")
+    group.add_argument("--replay", help="NDJSON file recorded with --record")
+    group.add_argument("--seed", type=int, default=None)
+    group.add_argument("--http2", action="store_true", help="serve h2c (needs 'h2')")
+
+
+def server_from_args(args, host: str = "127.0.0.1", port: int = 0) -> StubLLMServer:
+    """Server configured by add_server_arguments() options (not started)."""
+    cls = StubH2LLMServer if args.http2 else StubLLMServer
+    return cls(
+        shape=args.shape, latency=args.latency, item_latency=args.item_latency,
+        stream_format=args.stream_format, token_latency=args.token_latency,
+        stream_repeat=args.stream_repeat, max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue, error_rate=args.error_rate,
+        error_status=args.error_status, fail_first=args.fail_first,
+        retry_after=args.retry_after, upstream=args.upstream, record_path=args.record,
+        replay_path=args.replay, seed=args.seed, host=host, port=port,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    print(f"Serving POST http://{server.host}:{server.port}/generate (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,60 @@ This module contains the JsonKeyValueSwap processor class which demonstrates
 how to implement a simple FlowFileTransform in Python.
 """
 
-import json
 from typing import Any, Dict
 
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
+from nifiapi.properties import PropertyDescriptor
 from nifiapi.relationship import Relationship  # imported for symmetry/demo, not used directly
 
-# Import pure business logic from the local module
-from swap import swap_top_level
+# Import pure business logic from the local modules
+from content_io import read_content
+from json_codec import dumps, loads
+from phase_metrics import NULL_TIMER, PhaseTimer, ProcessorMetrics
+from swap import count_collided_keys, swap_grouped, swap_top_level
+from swap_nested import DEFAULT_SEPARATOR, swap_deep
+from swap_records import INVALID_DROP, INVALID_FAIL, INVALID_STRATEGIES, swap_ndjson
+from swap_streaming import DuplicateKeysError, iter_chunks, swap_stream
+from transform_profiler import CPROFILE, SAMPLING, TransformProfiler
+
+# FlowFiles at least this large are swapped with the streaming parser
+# (0 = never: streaming is ~4x slower and only saves memory when values repeat)
+DEFAULT_STREAMING_THRESHOLD = 0
+
+# 'Input Format' values
+FORMAT_OBJECT = "object"
+FORMAT_NDJSON = "ndjson"
+
+# 'Collision Handling' values: what happens when several keys share a value
+COLLISIONS_LAST_WINS = "last-wins"  # the last key wins (plain swap)
+COLLISIONS_GROUP = "group"          # the new key maps to a list of all keys
+COLLISIONS_ROUTE = "route"          # group, and route to 'collisions'
+COLLISION_MODES = (COLLISIONS_LAST_WINS, COLLISIONS_GROUP, COLLISIONS_ROUTE)
+
+# 'Nested Values' values
+NESTED_REJECT = "reject"    # list/dict values fail the FlowFile
+NESTED_FLATTEN = "flatten"  # swap the leaves, keyed by their path
+
+# Relationship of FlowFiles with collisions in 'route' mode
+REL_COLLISIONS = "collisions"
+
+
+def _parse_threshold(value) -> int:
+    """Parse 'Streaming Threshold' (bytes, 0 = never stream)."""
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_STREAMING_THRESHOLD
+    return parsed if parsed >= 0 else DEFAULT_STREAMING_THRESHOLD
+
+
+def _parse_max_depth(value) -> int:
+    """Parse 'Max Depth' (0 = unlimited)."""
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(parsed, 0)
 
 
 class JsonKeyValueSwap(FlowFileTransform):
@@ -27,6 +73,22 @@ class JsonKeyValueSwap(FlowFileTransform):
     Only simple scalar values are allowed (str, int, float, bool, None).
     If the JSON is not an object or contains complex values (list/dict),
     the FlowFile is routed to 'failure'.
+
+    When 'Streaming Threshold' is set, large FlowFiles are parsed
+    incrementally with swap_stream() instead of being loaded into a dict
+    first (off by default).
+
+    With 'Input Format' = ndjson the content holds one JSON object per
+    line and every record is swapped on its own (see swap_records.py).
+
+    'Collision Handling' keeps keys that would be overwritten: the new
+    key maps to the list of all original keys, e.g.
+    {"a": 1, "b": 2, "c": 1} -> {"1": ["a", "c"], "2": "b"}, and in 'route'
+    mode such FlowFiles go to the 'collisions' relationship.
+
+    With 'Nested Values' = flatten, nested objects and lists are walked
+    (see swap_nested.py) and their leaves are swapped, keyed by path:
+    {"a": {"b": [1]}} -> {"1": "a.b[0]"}.
     """
 
     # This inner class tells NiFi which Java interface this Python class implements.
@@ -37,13 +99,21 @@ class JsonKeyValueSwap(FlowFileTransform):
     # Metadata that NiFi shows in the UI for this processor.
     class ProcessorDetails:
         # Version of this processor implementation.
-        version = "0.1.4"
+        version = "0.1.14"
 
         # Short human-readable description.
         description = (
             "Demo processor that swaps keys and values of a top-level JSON object. "
             "Values become new keys (stringified), keys become new values. "
-            "Only simple scalar values are supported."
+            "Only simple scalar values are supported. "
+            "Large FlowFiles are parsed and written incrementally. "
+            "NDJSON content is swapped record by record. "
+            "Keys sharing a value can be grouped into lists or routed apart. "
+            "Nested objects can be flattened to path keys. "
+            "Per-phase timings can be added as attributes and exported as "
+            "Prometheus histograms. "
+            "A sampled fraction of calls can be profiled to pstats or "
+            "collapsed-stack files."
         )
 
         # List of tags to help find this processor in NiFi UI.
@@ -66,6 +136,12 @@ class JsonKeyValueSwap(FlowFileTransform):
         # Store JVM reference if needed
         self.jvm = jvm
 
+        # Per-phase timing attributes / metrics export, set in onScheduled()
+        # (None = off)
+        self._metrics = None
+        # Profiler of sampled transform() calls, set in onScheduled() (None = off)
+        self._profiler = None
+
         # Call base constructor without arguments for compatibility
         try:
             super().__init__()
@@ -75,57 +151,330 @@ class JsonKeyValueSwap(FlowFileTransform):
             pass
 
 
-    # We do NOT override getPropertyDescriptors() or getRelationships()
-    # for this demo. In that case NiFi uses default relationships for
-    # FlowFileTransform:
-    #   - success
-    #   - failure
-    #   - original
+    def getPropertyDescriptors(self):
+        """
+        Define processor properties:
+          - Input Format: one JSON object, or NDJSON records
+          - Invalid Records: NDJSON records that cannot be swapped are
+            dropped, kept unchanged, or fail the FlowFile
+          - Streaming Threshold: content size (bytes) from which the
+            streaming parser is used (0 = never, the default)
+          - Collision Handling: last key wins, group collided keys into
+            lists, or group and route to 'collisions'
+          - Nested Values / Path Separator / Max Depth: reject nested
+            values, or flatten them and swap the leaves
+          - Timing Attributes / Metrics Endpoint / Metrics File: per-phase
+            timings as attributes and Prometheus histograms
+          - Profile Directory / Profiler / Profile Fraction / Profile Dump
+            Interval / Profile Max Overhead: profiling of sampled calls
+        """
+        return [
+            PropertyDescriptor(
+                name="Input Format",
+                description=(
+                    "'object': the content is one JSON object. "
+                    "'ndjson': one JSON object per line; every record is swapped "
+                    "on its own and the output is NDJSON."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=[FORMAT_OBJECT, FORMAT_NDJSON],
+                default_value=FORMAT_OBJECT,
+            ),
+            PropertyDescriptor(
+                name="Invalid Records",
+                description=(
+                    "NDJSON only: what to do with a record that is not a JSON object "
+                    "of scalar values. 'drop' leaves it out, 'keep' copies it "
+                    "unchanged to the output, 'fail' routes the FlowFile to failure. "
+                    "Bad records are counted in json.swap.errors.* attributes."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=list(INVALID_STRATEGIES),
+                default_value=INVALID_DROP,
+            ),
+            PropertyDescriptor(
+                name="Streaming Threshold",
+                description=(
+                    "FlowFiles of at least this many bytes are tokenized and "
+                    "swapped incrementally instead of parsed into a dict. About 4x "
+                    "slower than the in-memory swap; it saves memory only when "
+                    "values repeat (few distinct swapped pairs), otherwise peak "
+                    "memory can be higher. 0 = never stream."
+                ),
+                required=False,
+                sensitive=False,
+                default_value=str(DEFAULT_STREAMING_THRESHOLD),
+            ),
+            PropertyDescriptor(
+                name="Collision Handling",
+                description=(
+                    "Object input only: what to do when several keys have the same "
+                    "value. 'last-wins' keeps the last key. 'group' maps the new key "
+                    "to the list of all such keys, in input order. 'route' groups "
+                    "like 'group' and sends FlowFiles with collisions to the "
+                    "'collisions' relationship."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=list(COLLISION_MODES),
+                default_value=COLLISIONS_LAST_WINS,
+            ),
+            PropertyDescriptor(
+                name="Nested Values",
+                description=(
+                    "Object input only. 'reject': list/dict values route the FlowFile "
+                    "to failure. 'flatten': nested objects and lists are walked and "
+                    "every leaf is swapped, with its path (e.g. a.b[2].c) as the new "
+                    "value. Flattened FlowFiles are always swapped in memory."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=[NESTED_REJECT, NESTED_FLATTEN],
+                default_value=NESTED_REJECT,
+            ),
+            PropertyDescriptor(
+                name="Path Separator",
+                description="'flatten' only: string between object keys of a path.",
+                required=False,
+                sensitive=False,
+                default_value=DEFAULT_SEPARATOR,
+            ),
+            PropertyDescriptor(
+                name="Max Depth",
+                description=(
+                    "'flatten' only: objects/lists deeper than this are not walked; "
+                    "their compact JSON is swapped as one leaf. 0 = unlimited."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Timing Attributes",
+                description=(
+                    "Add json.swap.timing.<phase>.ms (read, properties, parse, swap, "
+                    "serialize, total) and json.swap.bytes.in/out attributes to "
+                    "every FlowFile."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=["true", "false"],
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Metrics Endpoint",
+                description=(
+                    "[host:]port to serve per-phase latency and payload size "
+                    "histograms on, in Prometheus text format (GET /metrics; host "
+                    "defaults to 127.0.0.1). Empty = no endpoint."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Metrics File",
+                description=(
+                    "File rewritten every 10 seconds with the same metrics (e.g. for "
+                    "the node_exporter textfile collector). Empty = no file."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Profile Directory",
+                description=(
+                    "Directory to write profiles of sampled transform() calls to "
+                    "(<processor>-<pid>-<time>.collapsed or .pstats, newest 100 kept). "
+                    "Empty = profiling off."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Profiler",
+                description=(
+                    "'sampling': wall-clock stack samples every 5 ms, written as "
+                    "collapsed stacks for flame graphs (low overhead, misses very "
+                    "short calls); 'cprofile': every Python call of a sampled "
+                    "transform(), written as merged pstats (slower, one call at a time)."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=[SAMPLING, CPROFILE],
+                default_value=SAMPLING,
+            ),
+            PropertyDescriptor(
+                name="Profile Fraction",
+                description="Fraction of transform() calls to profile (e.g. 0.01 = 1%).",
+                required=False,
+                sensitive=False,
+                default_value="0.01",
+            ),
+            PropertyDescriptor(
+                name="Profile Dump Interval",
+                description="Seconds between profile files; each holds one interval.",
+                required=False,
+                sensitive=False,
+                default_value="60",
+            ),
+            PropertyDescriptor(
+                name="Profile Max Overhead",
+                description=(
+                    "Share of wall-clock time the profiler may take (samples, or "
+                    "the whole duration of cProfile'd calls); over it, calls are "
+                    "not profiled. E.g. 0.02 = 2%."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0.02",
+            ),
+        ]
+
+    def onScheduled(self, context) -> None:
+        """
+        Called by NiFi when the processor is started: sets up timing
+        attributes, metrics export and profiling. The swap properties are
+        still read per FlowFile.
+        """
+        self.onStopped(context)
+        self._metrics = ProcessorMetrics.from_context(context, "JsonKeyValueSwap", "json.swap")
+        self._profiler = TransformProfiler.from_context(context, "JsonKeyValueSwap")
+
+    def onStopped(self, context) -> None:
+        """
+        Called by NiFi when the processor is stopped: stops metrics export
+        and writes the last profile.
+        """
+        metrics, self._metrics = self._metrics, None
+        if metrics is not None:
+            metrics.close()
+
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            profiler.close()
+            logger = getattr(self, "logger", None)
+            if logger is not None:
+                logger.info(
+                    f"Profiled {profiler.profiled} of {profiler.calls} calls "
+                    f"({profiler.skipped} skipped over the overhead budget), "
+                    f"{profiler.files_written} files in {profiler.directory}"
+                )
 
     def transform(self, context, flowfile) -> FlowFileTransformResult:
         """
         Main method called by NiFi for each FlowFile.
 
-        - Reads FlowFile content as UTF-8 JSON.
-        - Swaps keys and values using swap_top_level().
-        - On success: returns new JSON content, routes to 'success'.
+        - Reads FlowFile content as UTF-8 JSON bytes.
+        - Swaps keys and values using swap_top_level(), or swap_stream()
+          for content at or above 'Streaming Threshold'.
+        - On success: returns new JSON content, routes to 'success'
+          (or 'collisions', see 'Collision Handling').
         - On error: keeps original content, routes to 'failure' and sets
           an 'json.swap.error' attribute.
+        - With Timing Attributes / metrics export: times every phase (see
+          phase_metrics.py) and reports it with the result.
+        - With a Profile Directory: profiles a fraction of the calls (see
+          transform_profiler.py).
         """
-        # Read original content as bytes (can be empty)
-        data: bytes = flowfile.getContentsAsBytes() or b""
+        profiler = self._profiler
+        if profiler is not None:
+            return profiler.run(self._timed_transform, context, flowfile)
+        return self._timed_transform(context, flowfile)
+
+    def _timed_transform(self, context, flowfile) -> FlowFileTransformResult:
+        """transform() with per-phase timing when it is on."""
+        metrics = self._metrics
+        if metrics is None:
+            return self._transform(context, flowfile, NULL_TIMER)
+        timer = PhaseTimer()
+        result = self._transform(context, flowfile, timer)
+        if result.contents is not None:
+            timer.size("out", len(result.contents))
+        return metrics.finish(timer, result)
+
+    def _transform(self, context, flowfile, timer) -> FlowFileTransformResult:
+        """transform() with the FlowFile's phases charged to `timer`."""
+        # Original content as bytes (can be empty); JSON is parsed from
+        # the bytes directly, without decoding to str first
+        data = read_content(flowfile)
+        timer.lap("read")
+        timer.size("in", len(data))
+
+        if (context.getProperty("Input Format") or FORMAT_OBJECT) == FORMAT_NDJSON:
+            invalid = context.getProperty("Invalid Records") or INVALID_DROP
+            timer.lap("properties")
+            try:
+                return self._transform_records(data, invalid)
+            except Exception as e:
+                return self._failure(e)
+            finally:
+                timer.lap("swap")
+
+        collision_mode = context.getProperty("Collision Handling") or COLLISIONS_LAST_WINS
+        if collision_mode not in COLLISION_MODES:
+            return self._failure(ValueError(f"Unknown collision handling: {collision_mode}"))
+
+        flatten = context.getProperty("Nested Values") == NESTED_FLATTEN
+
+        threshold = _parse_threshold(context.getProperty("Streaming Threshold"))
+        timer.lap("properties")
+        if threshold and len(data) >= threshold and not flatten:
+            try:
+                return self._transform_stream(data, collision_mode)
+            except DuplicateKeysError:
+                # Repeated input keys cannot be streamed: use the path below
+                pass
+            except Exception as e:
+                return self._failure(e)
+            finally:
+                # Parsing, swapping and writing are interleaved when streaming
+                timer.lap("swap")
 
         try:
-            # Decode content as UTF-8 text
-            text: str = data.decode("utf-8")
-
-            # Parse text as JSON
-            obj: Any = json.loads(text)
+            # Parse UTF-8 JSON content (orjson when installed, see json_codec.py)
+            obj: Any = loads(data)
+            timer.lap("parse")
 
             # Apply pure business logic (defined in swap.py)
-            swapped: Dict[str, str] = swap_top_level(obj)
-
-            # Serialize swapped object back to JSON text
-            swapped_text: str = json.dumps(
-                swapped,
-                ensure_ascii=False,      # keep non-ASCII chars readable
-                separators=(",", ":"),   # compact JSON without extra spaces
-            )
+            if flatten:
+                swapped, collisions, collided_keys = swap_deep(
+                    obj,
+                    separator=context.getProperty("Path Separator") or DEFAULT_SEPARATOR,
+                    max_depth=_parse_max_depth(context.getProperty("Max Depth")),
+                    group=collision_mode != COLLISIONS_LAST_WINS,
+                )
+            elif collision_mode == COLLISIONS_LAST_WINS:
+                swapped: Dict[str, Any] = swap_top_level(obj)
+                collisions = len(obj) - len(swapped)
+                # Extra pass only when something was overwritten
+                collided_keys = count_collided_keys(obj) if collisions else 0
+            else:
+                swapped, collisions, collided_keys = swap_grouped(obj)
+            timer.lap("swap")
+
+            # Serialize swapped object back to compact UTF-8 JSON,
+            # non-ASCII chars kept readable (ensure_ascii=False)
+            swapped_bytes: bytes = dumps(swapped)
+            timer.lap("serialize")
 
             # Build a few simple attributes for demonstration
             attrs: Dict[str, str] = {
                 "json.swap": "true",                       # processor succeeded
                 "json.swap.original.size": str(len(obj)),  # number of keys before
-                "json.swap.result.size": str(len(swapped)) # number of keys after
+                "json.swap.result.size": str(len(swapped)), # number of keys after
+                "json.swap.collisions": str(collisions),     # keys overwritten or grouped
+                "json.swap.collided.keys.count": str(collided_keys),
             }
 
             # Return a successful result:
-            # - relationship='success' to route to success
-            # - contents=swapped_text to replace FlowFile content
+            # - relationship='success' (or 'collisions') to route to success
+            # - contents=swapped_bytes to replace FlowFile content
             # - attributes=attrs to add new attributes
             return FlowFileTransformResult(
-                relationship="success",
-                contents=swapped_text,
+                relationship=self._relationship(collision_mode, collisions),
+                contents=swapped_bytes,
                 attributes=attrs,
             )
 
@@ -133,33 +482,91 @@ class JsonKeyValueSwap(FlowFileTransform):
             # Any error (decode / JSON parse / swap logic) ends up here.
             # According to NiFi docs, 'failure' is a standard relationship
             # for FlowFileTransform processors.
+            return self._failure(e)
 
-            error_message = str(e)[:512]  # keep attribute reasonably short
+    def _transform_stream(self, data: bytes, collision_mode: str) -> FlowFileTransformResult:
+        """
+        Streaming path: swap pairs as they are tokenized from the content.
+        """
+        result = swap_stream(iter_chunks(data), group=collision_mode != COLLISIONS_LAST_WINS)
+        collisions = result.original_size - result.result_size
+
+        return FlowFileTransformResult(
+            relationship=self._relationship(collision_mode, collisions),
+            contents=result.content,
+            attributes={
+                "json.swap": "true",
+                "json.swap.original.size": str(result.original_size),
+                "json.swap.result.size": str(result.result_size),
+                "json.swap.collisions": str(collisions),
+                "json.swap.collided.keys.count": str(result.collided_keys),
+                "json.swap.streamed": "true",
+            },
+        )
 
-            # We do not change the content on failure: contents=None means
-            # NiFi will keep the original FlowFile content.
-            return FlowFileTransformResult(
-                relationship="failure",
-                contents=None,
-                attributes={
-                    "json.swap": "false",
-                    "json.swap.error": error_message,
-                },
-            )
+    def _transform_records(self, data: bytes, invalid: str) -> FlowFileTransformResult:
+        """
+        NDJSON path: swap every record, count the bad ones per error kind.
+        """
+        result = swap_ndjson(data, invalid)
+
+        attrs: Dict[str, str] = {
+            "json.swap.records": str(result.records),
+            "json.swap.records.failed": str(result.failed),
+        }
+        for kind, count in sorted(result.errors.items()):
+            attrs[f"json.swap.errors.{kind}"] = str(count)
+        if result.failed_lines:
+            attrs["json.swap.failed.lines"] = ",".join(map(str, result.failed_lines))
+
+        if result.failed and invalid == INVALID_FAIL:
+            attrs["json.swap"] = "false"
+            attrs["json.swap.error"] = f"{result.failed} of {result.records} records invalid"
+            return FlowFileTransformResult(relationship="failure", contents=None, attributes=attrs)
+
+        attrs["json.swap"] = "true"
+        return FlowFileTransformResult(relationship="success", contents=result.content, attributes=attrs)
+
+    @staticmethod
+    def _relationship(collision_mode: str, collisions: int) -> str:
+        if collisions and collision_mode == COLLISIONS_ROUTE:
+            return REL_COLLISIONS
+        return "success"
+
+    @staticmethod
+    def _failure(e: Exception) -> FlowFileTransformResult:
+        error_message = str(e)[:512]  # keep attribute reasonably short
+
+        # We do not change the content on failure: contents=None means
+        # NiFi will keep the original FlowFile content.
+        return FlowFileTransformResult(
+            relationship="failure",
+            contents=None,
+            attributes={
+                "json.swap": "false",
+                "json.swap.error": error_message,
+            },
+        )
 
     def getRelationships(self):
         """
         Explicitly declare processor relationships for tests and NiFi.
 
         We define:
-          - success : JSON processed and swapped
-          - failure : any error during decode/parse/swap
+          - success    : JSON processed and swapped
+          - collisions : swapped with grouped collisions ('route' mode)
+          - failure    : any error during decode/parse/swap
         """
         return [
             Relationship(
                 name="success",
                 description="JSON successfully swapped (keys <-> values)"
             ),
+            Relationship(
+                name=REL_COLLISIONS,
+                description="JSON swapped, but several keys shared a value "
+                            "(Collision Handling = route)"
+            ),
             Relationship(
                 name="failure",
                 description="Error while processing JSON; original content kept"
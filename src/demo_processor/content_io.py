@@ -0,0 +1 @@
+../nifi_common/content_io.py
\ No newline at end of file
@@ -0,0 +1 @@
+../nifi_common/json_codec.py
\ No newline at end of file
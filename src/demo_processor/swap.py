@@ -6,7 +6,14 @@ This module does NOT depend on NiFi APIs. It only operates on Python
 data structures (dict, list, primitives) and can be unit-tested separately.
 """
 
-from typing import Any, Dict
+from itertools import chain
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Sequence, Union
+
+# Exact types whose swap needs no per-value isinstance() check
+_EXACT_SCALARS = frozenset({str, int, float, bool, type(None)})
+_EXACT_STR = frozenset({str})
+_EXACT_DICT = frozenset({dict})
 
 
 def swap_top_level(obj: Any) -> Dict[str, str]:
@@ -61,3 +68,153 @@ def swap_top_level(obj: Any) -> Dict[str, str]:
         result[new_key] = key
 
     return result
+
+
+class GroupedSwap(NamedTuple):
+    """Outcome of swap_grouped()."""
+
+    # New key -> original key, or list of original keys if several collided
+    swapped: Dict[str, Union[str, List[str]]]
+    # Original keys whose value was already taken by an earlier key
+    collisions: int
+    # New keys shared by more than one original key
+    collided_keys: int
+
+
+def swap_grouped(obj: Any) -> GroupedSwap:
+    """
+    Swap keys and values like swap_top_level(), keeping collided keys.
+
+    Same rules and errors as swap_top_level(), but when several keys have
+    the same value none of them is lost: the new key maps to the list of
+    original keys, in input order. New keys without a collision keep a
+    plain string value, and every new key keeps the position of its first
+    original key.
+
+    Example:
+        {"a": 1, "b": 2, "c": 1}  ->  {"1": ["a", "c"], "2": "b"}
+
+    The swap dict itself is the collision index, so this is still a
+    single O(n) pass.
+    """
+    if not isinstance(obj, dict):
+        raise ValueError("Top-level JSON value must be an object (dict).")
+
+    result: Dict[str, Union[str, List[str]]] = {}
+    collisions = 0
+    collided_keys = 0
+
+    for key, value in obj.items():
+        if not isinstance(key, str):
+            raise ValueError("All keys in the JSON object must be strings.")
+        _check_scalar(key, value)
+
+        # setdefault() returns `key` itself unless the new key is taken
+        previous = result.setdefault(str(value), key)
+        if previous is not key:
+            collisions += 1
+            if type(previous) is list:
+                previous.append(key)
+            else:
+                result[str(value)] = [previous, key]
+                collided_keys += 1
+
+    return GroupedSwap(result, collisions, collided_keys)
+
+
+def count_collided_keys(obj: Dict[str, Any]) -> int:
+    """
+    Number of new keys shared by several keys of obj (validated by a swap).
+
+    Kept apart from swap_top_level() so its loop stays as cheap as before;
+    callers only need it when the swap came out smaller than obj.
+    """
+    return sum(1 for count in Counter(map(str, obj.values())).values() if count > 1)
+
+
+def swap_many(objs: Iterable[Any],
+              return_errors: bool = False) -> List[Union[Dict[str, str], ValueError]]:
+    """
+    Swap a batch of objects: [swap_top_level(obj) for obj in objs].
+
+    When every object is a plain dict with str keys and exact scalar
+    values (the usual result of JSON parsing), the types of the whole
+    batch are checked in one C-level pass and each object is swapped with
+    dict(zip()); otherwise every object goes through swap_top_level().
+    Results and errors are identical either way.
+
+    With return_errors=True an invalid object yields its ValueError in
+    place of the result instead of raising.
+    """
+    objs = objs if isinstance(objs, list) else list(objs)
+
+    if set(map(type, objs)) <= _EXACT_DICT and \
+            set(map(type, chain.from_iterable(objs))) <= _EXACT_STR:
+        kinds = set(map(type, chain.from_iterable(map(dict.values, objs))))
+        # dict(zip()) keeps "last one wins" with the first key's position
+        if kinds <= _EXACT_STR:
+            return [dict(zip(obj.values(), obj)) for obj in objs]
+        if kinds <= _EXACT_SCALARS:
+            return [dict(zip(map(str, obj.values()), obj)) for obj in objs]
+
+    results: List[Union[Dict[str, str], ValueError]] = []
+    for obj in objs:
+        try:
+            results.append(swap_top_level(obj))
+        except ValueError as e:
+            if not return_errors:
+                raise
+            results.append(e)
+    return results
+
+
+def swap_columns(columns: Union[Mapping[str, Sequence[Any]], Any]) -> List[Dict[str, str]]:
+    """
+    Swap every row of a columnar batch.
+
+    Input:
+        columns - {column name: [value per row]}, or any object with a
+                  to_pydict() method returning that (pyarrow Table or
+                  RecordBatch; nulls become None)
+
+    Row i is the record {name: columns[name][i]}; the result is the same
+    as swap_many() over those records, but each column is validated and
+    stringified in one pass.
+
+    Raises:
+        ValueError for non-string column names, columns of different
+        lengths, or the first column holding a non-scalar value.
+    """
+    if hasattr(columns, "to_pydict"):
+        columns = columns.to_pydict()
+
+    names = list(columns)
+    for name in names:
+        if not isinstance(name, str):
+            raise ValueError("All keys in the JSON object must be strings.")
+
+    lengths = {len(columns[name]) for name in names}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length.")
+
+    stringified = []
+    for name in names:
+        column = columns[name]
+        kinds = set(map(type, column))
+        if not kinds <= _EXACT_STR:
+            if not kinds <= _EXACT_SCALARS:
+                for value in column:
+                    _check_scalar(name, value)
+            column = list(map(str, column))
+        stringified.append(column)
+
+    return [dict(zip(row, names)) for row in zip(*stringified)]
+
+
+def _check_scalar(key: str, value: Any) -> None:
+    """Raise swap_top_level()'s ValueError for a non-scalar value."""
+    if not isinstance(value, (str, int, float, bool)) and value is not None:
+        raise ValueError(
+            f"Unsupported value type for key '{key}': {type(value).__name__}. "
+            "Only scalar values (str, int, float, bool, None) are allowed."
+        )
@@ -0,0 +1,122 @@
+# demo_processor/swap_nested.py
+"""
+Deep mode for JsonKeyValueSwap: swap the leaves of nested objects.
+
+Nested objects and lists are flattened to path keys, e.g.
+
+    {"a": {"b": [1, 2, {"c": "x"}]}}  ->  a.b[0] = 1, a.b[1] = 2, a.b[2].c = "x"
+
+and every leaf is swapped like a top-level scalar: {"1": "a.b[0]", ...}.
+
+The walk is iterative (an explicit stack, so no recursion limit) and lazy:
+iter_leaves() yields one (path, value) pair at a time and swap_deep()
+consumes it directly, so the flattened document is never built next to
+the parsed one and the swapped result.
+"""
+
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+from json_codec import dumps
+from swap import GroupedSwap
+
+DEFAULT_SEPARATOR = "."
+
+# Scalar leaf types, as in swap_top_level()
+_SCALARS = (str, int, float, bool, type(None))
+# Exact types that need no isinstance() checks (the usual JSON parser output)
+_EXACT_SCALARS = frozenset(_SCALARS)
+
+
+def iter_leaves(obj: Any,
+                separator: str = DEFAULT_SEPARATOR,
+                max_depth: int = 0) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (path, leaf) for every leaf of a JSON object, in document order.
+
+    Object keys are joined with `separator`, list items get "[index]";
+    keys are not escaped. Scalars are leaves; so are empty objects/lists
+    and, when max_depth > 0, containers at depth max_depth (top-level
+    values are at depth 1): they are yielded as is.
+
+    Raises:
+        ValueError if obj is not a dict, a key is not a string or a value
+        is not a JSON type.
+    """
+    if not isinstance(obj, dict):
+        raise ValueError("Top-level JSON value must be an object (dict).")
+
+    # (path of the container, is a list, depth of its items, items iterator)
+    stack: List[Tuple[str, bool, int, Iterator]] = [("", False, 1, iter(obj.items()))]
+    while stack:
+        prefix, is_list, depth, items = stack[-1]
+        for name, value in items:
+            if is_list:
+                path = f"{prefix}[{name}]"
+            elif not isinstance(name, str):
+                raise ValueError("All keys in the JSON object must be strings.")
+            elif depth == 1:
+                path = name
+            else:
+                path = prefix + separator + name
+
+            if type(value) in _EXACT_SCALARS or isinstance(value, _SCALARS):
+                yield path, value
+            elif isinstance(value, (dict, list)):
+                if not value or depth == max_depth:
+                    yield path, value
+                    continue
+                # Descend: the current iterator is resumed after the child
+                children = enumerate(value) if isinstance(value, list) else iter(value.items())
+                stack.append((path, isinstance(value, list), depth + 1, children))
+                break
+            else:
+                raise ValueError(
+                    f"Unsupported value type for key '{path}': {type(value).__name__}. "
+                    "Only JSON values are allowed."
+                )
+        else:
+            stack.pop()
+
+
+def _leaf_key(value: Any) -> str:
+    # Containers (empty, or cut off by max_depth) become their compact JSON
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode("utf-8")
+    return str(value)
+
+
+def swap_deep(obj: Any,
+              separator: str = DEFAULT_SEPARATOR,
+              max_depth: int = 0,
+              group: bool = False) -> GroupedSwap:
+    """
+    Swap every leaf of a nested JSON object: {str(leaf): path}.
+
+    Same collision rules as the flat swap: the last path wins, or with
+    group=True every colliding path is kept in a list (see swap_grouped()).
+    Collisions are counted either way.
+    """
+    result: Dict[str, Union[str, List[str]]] = {}
+    collided = set()
+    collisions = 0
+
+    for path, value in iter_leaves(obj, separator, max_depth):
+        new_key = value if type(value) is str else _leaf_key(value)
+        size = len(result)
+        if not group:
+            result[new_key] = path
+            if len(result) == size:
+                collisions += 1
+                collided.add(new_key)
+            continue
+
+        previous = result.setdefault(new_key, path)
+        if len(result) == size:
+            collisions += 1
+            collided.add(new_key)
+            if type(previous) is list:
+                previous.append(path)
+            else:
+                result[new_key] = [previous, path]
+
+    return GroupedSwap(result, collisions, len(collided))
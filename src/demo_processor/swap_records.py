@@ -0,0 +1,149 @@
+# demo_processor/swap_records.py
+"""
+Record mode for JsonKeyValueSwap: one JSON object per line (NDJSON).
+
+Every record is swapped on its own (in batches, with swap_many()), so a
+single bad record does not fail the whole FlowFile. Bad records are dropped, kept
+unchanged in the output, or make the caller fail the FlowFile, and are
+counted per error kind.
+"""
+
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from json_codec import dumps, loads
+from swap import swap_many
+
+# What to do with a record that cannot be swapped
+INVALID_DROP = "drop"
+INVALID_KEEP = "keep"
+INVALID_FAIL = "fail"
+INVALID_STRATEGIES = (INVALID_DROP, INVALID_KEEP, INVALID_FAIL)
+
+# Error kinds counted in RecordsResult.errors
+ERROR_DECODE = "decode"              # invalid UTF-8 or JSON
+ERROR_NOT_OBJECT = "not_object"      # valid JSON, but not an object
+ERROR_VALUE = "unsupported_value"    # object with a list/dict value
+
+# Line numbers of bad records reported at most
+MAX_FAILED_LINES = 20
+
+# Records parsed before they are swapped together
+BATCH_SIZE = 1024
+
+# Stands in for the object of a line that is not valid JSON
+_UNPARSED = object()
+
+
+class RecordsResult(NamedTuple):
+    """Outcome of swap_ndjson()."""
+
+    # Swapped records (and kept bad ones), one per line
+    content: bytearray
+    # Non-blank input lines
+    records: int
+    # Records that could not be swapped
+    failed: int
+    # Failed records per error kind
+    errors: Dict[str, int]
+    # 1-based line numbers of the first MAX_FAILED_LINES bad records
+    failed_lines: List[int]
+
+
+class _Collector:
+    """Output buffer and error statistics of one swap_ndjson() call."""
+
+    def __init__(self, invalid: str):
+        self.invalid = invalid
+        self.out = bytearray()
+        self.errors: Counter = Counter()
+        self.failed_lines: List[int] = []
+        self.records = 0
+        self.failed = 0
+
+    def flush(self, pending: List[Tuple[int, memoryview, Any]]) -> None:
+        """Swap and write a batch of (line number, line, parsed object)."""
+        swapped = iter(swap_many(
+            [obj for _, _, obj in pending if isinstance(obj, dict)],
+            return_errors=True,
+        ))
+        out = self.out
+        for line_no, line, obj in pending:
+            self.records += 1
+            if obj is _UNPARSED:
+                kind = ERROR_DECODE
+            elif not isinstance(obj, dict):
+                kind = ERROR_NOT_OBJECT
+            else:
+                result = next(swapped)
+                if isinstance(result, ValueError):
+                    kind = ERROR_VALUE
+                else:
+                    try:
+                        out += dumps(result)
+                        out += b"\n"
+                        continue
+                    except UnicodeEncodeError:
+                        # e.g. a lone surrogate escape ("\ud800") in the input
+                        kind = ERROR_DECODE
+            self._fail(line_no, line, kind)
+
+    def _fail(self, line_no: int, line: memoryview, kind: str) -> None:
+        self.failed += 1
+        self.errors[kind] += 1
+        if len(self.failed_lines) < MAX_FAILED_LINES:
+            self.failed_lines.append(line_no)
+        if self.invalid == INVALID_KEEP:
+            self.out += line
+            self.out += b"\n"
+
+
+def swap_ndjson(data: bytes, invalid: str = INVALID_DROP) -> RecordsResult:
+    """
+    Swap every record of NDJSON content.
+
+    Blank lines are skipped. Output records are compact JSON, one per
+    line, each followed by a newline. With invalid=INVALID_FAIL the
+    content is still produced; the caller decides based on `failed`.
+    """
+    if invalid not in INVALID_STRATEGIES:
+        raise ValueError(f"Unknown invalid record strategy: {invalid}")
+
+    view = memoryview(data)
+    collector = _Collector(invalid)
+    pending: List[Tuple[int, memoryview, Any]] = []
+
+    start = 0
+    line_no = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = size
+        line = view[start:end]
+        start = end + 1
+        line_no += 1
+
+        try:
+            obj = loads(line)
+        except ValueError:
+            # Blank lines are rare: only check for them on the error path
+            if not bytes(line).strip():
+                continue
+            obj = _UNPARSED
+
+        pending.append((line_no, line, obj))
+        if len(pending) == BATCH_SIZE:
+            collector.flush(pending)
+            pending.clear()
+
+    if pending:
+        collector.flush(pending)
+
+    return RecordsResult(
+        collector.out,
+        collector.records,
+        collector.failed,
+        dict(collector.errors),
+        collector.failed_lines,
+    )
@@ -0,0 +1,282 @@
+# demo_processor/swap_streaming.py
+"""
+Streaming variant of swap_top_level() for large FlowFiles.
+
+The in-memory path decodes the whole content to str, parses it into a
+dict, builds the swapped dict and serializes it to one more str: four
+full copies of a multi-hundred-MB payload live at once.
+
+swap_stream() tokenizes the top-level object incrementally from byte
+chunks (e.g. memoryview slices of the FlowFile content), decodes one
+key/value at a time and writes the result straight to UTF-8 bytes.
+Besides input and output, memory holds a small text window (at least the
+largest key/value), the swap index ("last one wins" needs to know every
+new key before the first pair can be written) and one hash per input key.
+
+Output is byte-identical to:
+    json.dumps(swap_top_level(json.loads(data)),
+               ensure_ascii=False, separators=(",", ":"))
+or, with group=True, to the same dump of swap_grouped(...).swapped.
+
+Like json.loads(), duplicate keys in the input keep their first position
+but their last value; that cannot be streamed, so DuplicateKeysError is
+raised and the caller should fall back to the in-memory path.
+"""
+
+import codecs
+import json
+import re
+from json.decoder import scanstring
+from json.encoder import encode_basestring
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Swapped pairs encoded per write into the output buffer
+_PAIRS_PER_WRITE = 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# Chars that may continue a number cut off at the window end
+_NUMBER_CHARS = "0123456789+-.eE"
+
+# Fast path: one complete `"key": scalar,` (or `}`) pair per regex match.
+# Anything else (NaN, a pair cut off at the window end, syntax errors)
+# goes through the general tokenizer.
+_WS = r"[ \t\n\r]*"
+_STRING = r'"(?:[^"\\\x00-\x1f]|\\.)*"'
+_PAIR = re.compile(
+    rf"{_WS}({_STRING}){_WS}:{_WS}"
+    rf"({_STRING}|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null)"
+    rf"{_WS}([,}}])"
+)
+_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class StreamResult(NamedTuple):
+    """Outcome of swap_stream()."""
+
+    # Compact UTF-8 JSON output
+    content: bytearray
+    # Number of keys before / after the swap
+    original_size: int
+    result_size: int
+    # New keys shared by more than one original key
+    collided_keys: int
+
+
+class DuplicateKeysError(Exception):
+    """The input object repeats a key; use the in-memory path instead."""
+
+
+def iter_chunks(data, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Zero-copy chunks of a bytes-like object."""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+class _Reader:
+    """Window of decoded text over an iterable of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next decoded chunk; False when nothing is left."""
+        if self.eof:
+            return False
+
+        # Drop consumed text so the window stays small
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+
+        self.eof = True
+        tail = self._utf8.decode(b"", final=True)
+        self.buf += tail
+        return bool(tail)
+
+    def peek(self) -> str:
+        """Skip whitespace; return the next char ('' at end of input)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def value(self):
+        """Decode one JSON string or scalar at the current position."""
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Possibly cut off at the window end: read more and retry
+                if not self._grow():
+                    raise
+                continue
+            if (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS) and self._grow():
+                # A number (e.g. "1" | ".50") may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def _grow(self) -> bool:
+        # At least double the pending text per retry, so one huge value
+        # is decoded in O(n) overall rather than once per chunk.
+        pending = len(self.buf) - self.pos
+        grown = False
+        while self.fill():
+            grown = True
+            if len(self.buf) - self.pos >= 2 * pending:
+                break
+        return grown
+
+
+def _string(raw: str) -> str:
+    """Value of a JSON string literal matched by _STRING."""
+    if "\\" in raw:
+        return scanstring(raw, 1)[0]
+    return raw[1:-1]
+
+
+def _scalar(raw: str):
+    """Value of a JSON scalar matched by _PAIR (json.loads semantics)."""
+    first = raw[0]
+    if first == '"':
+        return _string(raw)
+    if first in "tfn":
+        return _LITERALS[raw]
+    if "." in raw or "e" in raw or "E" in raw:
+        return float(raw)
+    return int(raw)
+
+
+def _read_pair(reader: _Reader, ch: str):
+    """General path: (key, value, ',' or '}') at the current position."""
+    if ch != '"':
+        raise ValueError("Expecting property name enclosed in double quotes")
+    key = reader.value()
+
+    if reader.peek() != ":":
+        raise ValueError(f"Expecting ':' delimiter after key '{key}'")
+    reader.pos += 1
+
+    ch = reader.peek()
+    if ch and ch in "[{":
+        raise ValueError(
+            f"Unsupported value type for key '{key}': "
+            f"{'list' if ch == '[' else 'dict'}. "
+            "Only scalar values (str, int, float, bool, None) are allowed."
+        )
+    value = reader.value()
+
+    end = reader.peek()
+    if end not in (",", "}"):
+        raise ValueError("Expecting ',' delimiter or '}'")
+    reader.pos += 1
+    return key, value, end
+
+
+def swap_stream(chunks: Iterable[bytes], group: bool = False) -> StreamResult:
+    """
+    Swap keys and values of a top-level JSON object read from byte chunks.
+
+    Same rules as swap_top_level(): the value must be an object whose
+    values are scalars; new keys are str(value), and if several keys have
+    the same value the last one wins, or with group=True all of them are
+    kept in a list (see swap_grouped()).
+
+    Raises:
+        ValueError (incl. json.JSONDecodeError) on invalid input,
+        UnicodeDecodeError on invalid UTF-8,
+        DuplicateKeysError if the object repeats a key.
+    """
+    reader = _Reader(chunks)
+    if reader.peek() != "{":
+        raise ValueError("Top-level JSON value must be an object (dict).")
+    reader.pos += 1
+
+    index: Dict[str, Union[str, List[str]]] = {}
+    # New keys that more than one original key mapped to
+    collided: Set[str] = set()
+    # Hashes of the input keys, to spot repeated keys: keeping every key
+    # string alive would cost more than the swap index itself when many
+    # keys collide. A hash collision only triggers the caller's fallback.
+    seen: Set[int] = set()
+
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        match = _PAIR.match
+        while True:
+            m = match(reader.buf, reader.pos)
+            if m is not None:
+                raw_key, raw_value, end = m.groups()
+                key = _string(raw_key)
+                value = _string(raw_value) if raw_value[0] == '"' else _scalar(raw_value)
+                reader.pos = m.end()
+            else:
+                key, value, end = _read_pair(reader, reader.peek())
+
+            key_hash = hash(key)
+            if key_hash in seen:
+                raise DuplicateKeysError(key)
+            seen.add(key_hash)
+
+            # Existing new key keeps its position, like dict assignment
+            new_key = str(value)
+            previous = index.setdefault(new_key, key)
+            if previous is not key:
+                collided.add(new_key)
+                if not group:
+                    index[new_key] = key
+                elif type(previous) is list:
+                    previous.append(key)
+                else:
+                    index[new_key] = [previous, key]
+
+            if end == "}":
+                break
+
+    if reader.peek():
+        raise ValueError("Extra data after the top-level JSON object")
+
+    return StreamResult(_dump(index), len(seen), len(index), len(collided))
+
+
+def _dump(index: Dict[str, Union[str, List[str]]]) -> bytearray:
+    """Compact JSON of index, ensure_ascii=False, as UTF-8 bytes."""
+    out = bytearray()
+    batch = []
+    for new_key, key in index.items():
+        if type(key) is list:
+            key = "[" + ",".join(map(encode_basestring, key)) + "]"
+        else:
+            key = encode_basestring(key)
+        batch.append(f"{encode_basestring(new_key)}:{key}")
+        if len(batch) == _PAIRS_PER_WRITE:
+            out += b","
+            out += ",".join(batch).encode("utf-8")
+            batch.clear()
+    if batch:
+        out += b","
+        out += ",".join(batch).encode("utf-8")
+
+    if not out:
+        return bytearray(b"{}")
+    # Every write starts with ',': turn the first one into '{'
+    out[0] = ord("{")
+    out += b"}"
+    return out
@@ -5,13 +5,84 @@ All NiFi-related classes live here.
 LLM HTTP logic is in llm_client.py.
 """
 
-from typing import Any
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from nifiapi.flowfiletransform import FlowFileTransform, FlowFileTransformResult
 from nifiapi.relationship import Relationship
 
 # Simple import: NiFi loads llm_client.py as top-level module "llm_client"
-from llm_client import call_llm
+from llm_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_NEW_TOKENS,
+    DEFAULT_READ_TIMEOUT,
+    call_llm,
+    call_llm_batch,
+    call_llm_stream,
+    create_session,
+)
+from balancer import LEAST_OUTSTANDING, STRATEGIES, LoadBalancer, parse_endpoints
+from batcher import MicroBatcher
+from content_io import decode_text, read_content, to_contents
+from dispatcher import InFlightDispatcher
+from llm_cache import ResponseCache, cache_key
+from phase_metrics import NULL_TIMER, PhaseTimer, ProcessorMetrics
+from llm_tokens import (
+    TRUNCATE_HEAD,
+    TRUNCATE_HEAD_TAIL,
+    TRUNCATION_STRATEGIES,
+    estimate_tokens,
+    split_tokens,
+    truncate_tokens,
+)
+from rate_limit import RateLimiter, RateLimitTimeout, SharedTokenBucket, TokenBucket
+from request_config import RequestConfig
+from resilience import CircuitBreaker, CircuitOpenError, call_with_retry, is_retryable
+from transform_profiler import CPROFILE, SAMPLING, TransformProfiler
+
+# File name of the persistent response cache inside 'Response Cache Directory'
+CACHE_DB_NAME = "llm_response_cache.sqlite3"
+
+# HTTP Client values: blocking requests session, or httpx on an event loop
+CLIENT_REQUESTS = "requests"
+CLIENT_HTTPX = "httpx"
+
+# Input Overflow Strategy besides truncation: map-reduce over chunks
+OVERFLOW_CHUNK = "chunk"
+OVERFLOW_STRATEGIES = TRUNCATION_STRATEGIES + (OVERFLOW_CHUNK,)
+
+# Joins the per-chunk results when there is no Chunk Merge Prompt
+CHUNK_SEPARATOR = "\n\n"
+
+# Warm-Up request sent to every endpoint on start (one generated token)
+WARM_UP_PROMPT = "ping"
+WARM_UP_MAX_NEW_TOKENS = 1
+
+
+def _parse_float(value, default: float) -> float:
+    """Parse a property value as float, falling back to default."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_int(value, default: int, minimum: int = 1) -> int:
+    """Parse a property value as int (>= minimum), falling back to default."""
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return default
+    return parsed if parsed >= minimum else default
+
+
+def _parse_bool(value, default: bool) -> bool:
+    """Parse 'true'/'false' property values, falling back to default."""
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip().lower() == "true"
 
 
 class LLMRequestProcessor(FlowFileTransform):
@@ -26,14 +97,36 @@ class LLMRequestProcessor(FlowFileTransform):
         implements = ["org.apache.nifi.python.processor.FlowFileTransform"]
 
     class ProcessorDetails:
-        version = "0.1.1"
+        version = "0.1.19"
         description = (
             "Sends FlowFile text to an external LLM endpoint using HOST, PORT, "
-            "system prompt (Russian) and temperature."
+            "system prompt (Russian) and temperature. "
+            "Prompts can be templated with FlowFile attributes and content. "
+            "Input longer than a token budget is truncated, or split into "
+            "overlapping chunks processed concurrently and merged. "
+            "HTTP connections are pooled and kept alive between FlowFiles, or "
+            "multiplexed over HTTP/2 by an async httpx client; "
+            "several LLM requests can be kept in flight by one processor instance, "
+            "and prompts can be micro-batched into one /generate call. "
+            "Identical requests can be answered from a response cache. "
+            "Long generations can be streamed with output size and time budgets. "
+            "Transient errors are retried with backoff; a circuit breaker fails "
+            "fast while the endpoint is down and routes FlowFiles to 'retry'. "
+            "Requests/sec and tokens/sec can be rate limited, optionally shared "
+            "by all processes on the host. Several endpoints can be given; "
+            "requests are load balanced and unhealthy backends ejected; slow "
+            "requests can be hedged to a second replica. "
+            "Per-phase timings can be added as attributes and exported as "
+            "Prometheus histograms. "
+            "A sampled fraction of calls can be profiled to pstats or "
+            "collapsed-stack files. "
+            "An optional warm-up request on start opens the connections "
+            "before the first FlowFile."
         )
         tags = ["llm", "ai", "http", "demo"]
-        # 'requests' is used in llm_client.py; here it's just documentation
-        dependencies = ["requests"]
+        # 'requests' is used in llm_client.py, 'httpx' in llm_async_client.py,
+        # 'tenacity' in resilience.py; here it's just documentation
+        dependencies = ["requests", "httpx", "tenacity"]
 
     def __init__(self, jvm=None, **kwargs: Any) -> None:
         """
@@ -43,6 +136,40 @@ class LLMRequestProcessor(FlowFileTransform):
         We must NOT forward 'jvm' or **kwargs to FlowFileTransform.__init__().
         """
         self.jvm = jvm
+        # Pooled HTTP session (requests.Session or AsyncLLMClient) and the
+        # call functions for it; created in onScheduled(), closed in onStopped()
+        self._session = None
+        self._call_fn = call_llm
+        self._batch_fn = call_llm_batch
+        self._connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        self._read_timeout = DEFAULT_READ_TIMEOUT
+        # Shared pool for in-flight requests (None = call inline)
+        self._dispatcher = None
+        # Shared micro-batcher (None = one prompt per request)
+        self._batcher = None
+        # Response cache (None = disabled)
+        self._cache = None
+        self._cache_any_temperature = False
+        # Streaming budgets for call_llm_stream() (None = streaming off)
+        self._stream = None
+        # Retry policy and circuit breaker (None = breaker disabled)
+        self._retry = {"max_retries": 0, "initial_backoff": 0.5, "max_backoff": 10.0}
+        self._breaker = None
+        # Client-side rate limiter (None = unlimited)
+        self._limiter = None
+        # Backend picker over the configured endpoints
+        self._balancer = None
+        # Hedged requests to a second endpoint (None = off)
+        self._hedger = None
+        # System Prompt / Temperature resolved in onScheduled()
+        self._config = None
+        # Input token budget (None = unlimited) and chunk fan-out pool
+        self._input = None
+        self._chunk_pool = None
+        # Per-phase timing attributes / metrics export (None = off)
+        self._metrics = None
+        # Profiler of sampled transform() calls (None = off)
+        self._profiler = None
         try:
             super().__init__()
         except Exception:
@@ -51,111 +178,1263 @@ class LLMRequestProcessor(FlowFileTransform):
     def getPropertyDescriptors(self):
         """
         Define processor properties:
-          - HOST: LLM host
-          - PORT: LLM port
-          - System Prompt: Russian system prompt
-          - Temperature: sampling temperature
+          - HOST: LLM host, or comma-separated list of host[:port] endpoints
+          - PORT: LLM port (for hosts given without a port)
+          - System Prompt: Russian system prompt (may use ${attribute})
+          - Temperature: sampling temperature (may use ${attribute})
+          - Prompt Template: user prompt built from ${attribute} and
+            ${content} placeholders
+          - Max New Tokens: generation budget sent with every request
+          - Max Input Tokens / Input Overflow Strategy / Chunk Overlap
+            Tokens / Chunk Merge Prompt: input token budget, truncation
+            and chunked map-reduce of long documents
+          - Connection Pool Size / Max Connections Per Host / Keep-Alive:
+            sizing of the pooled HTTP session
+          - HTTP Client / HTTP/2: blocking requests or async httpx client,
+            optionally multiplexing requests over HTTP/2
+          - Connect Timeout / Read Timeout: HTTP timeouts in seconds
+          - Warm-Up: one short request per endpoint when scheduled
+          - Max In-Flight Requests / Max Queued Requests: concurrency of
+            LLM calls shared by all threads of this processor instance
+          - Batch Size / Batch Max Wait: micro-batching of prompts
+          - Response Cache Size / TTL / Directory / Cache Any Temperature:
+            cache of LLM responses for identical requests
+          - Streaming / Max Output Bytes / Max Output Tokens / Total Deadline:
+            incremental consumption of token streams with budgets
+          - Max Retries / Retry Initial Backoff / Retry Max Backoff:
+            retry policy for transient errors
+          - Circuit Breaker Threshold / Circuit Breaker Reset: fail fast
+            while the endpoint is unhealthy
+          - Max Requests Per Second / Max Tokens Per Second / Rate Limit
+            Burst / Rate Limit Shared File: client-side rate limiting
+          - Load Balancing Strategy / Backend Ejection Failures / Backend
+            Ejection Time: balancing across several endpoints
+          - Hedge Percentile / Hedge Min Delay / Max Hedge Rate: duplicate
+            slow requests to another endpoint, first answer wins
+          - Timing Attributes / Metrics Endpoint / Metrics File: per-phase
+            timings as attributes and Prometheus histograms
+          - Profile Directory / Profiler / Profile Fraction / Profile Dump
+            Interval / Profile Max Overhead: profiling of sampled calls
         """
-        from nifiapi.properties import PropertyDescriptor
+        from nifiapi.properties import ExpressionLanguageScope, PropertyDescriptor
 
         return [
             PropertyDescriptor(
                 name="HOST",
-                description="Hostname of the LLM instance (e.g. 127.0.0.1).",
+                description=(
+                    "Hostname of the LLM instance (e.g. 127.0.0.1), or a "
+                    "comma-separated list of host[:port] replicas to load balance "
+                    "across (e.g. gpu1:8000, gpu2:8000)."
+                ),
                 required=True,
                 sensitive=False,
             ),
             PropertyDescriptor(
                 name="PORT",
-                description="Port of the LLM instance (e.g. 8000).",
+                description="Port of the LLM instance (e.g. 8000); used for hosts without a port.",
                 required=True,
                 sensitive=False,
             ),
             PropertyDescriptor(
                 name="System Prompt",
-                description="System prompt text in Russian.",
+                description=(
+                    "System prompt text in Russian. ${attribute} references are "
+                    "replaced with FlowFile attribute values; Expression Language "
+                    "functions are not supported and fail scheduling."
+                ),
                 required=False,
                 sensitive=False,
+                expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES,
             ),
             PropertyDescriptor(
                 name="Temperature",
-                description="Sampling temperature (float, e.g. 0.7).",
+                description=(
+                    "Sampling temperature (float, e.g. 0.7), or a ${attribute} "
+                    "reference to take it from the FlowFile."
+                ),
+                required=False,
+                sensitive=False,
+                expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES,
+            ),
+            PropertyDescriptor(
+                name="Prompt Template",
+                description=(
+                    "User prompt sent instead of the bare FlowFile text, e.g. "
+                    "'Document type: ${doc.type}. Text: ${content}'. ${content} is the "
+                    "FlowFile text, other ${name} placeholders are FlowFile attributes. "
+                    "Compiled once when the processor is scheduled; Expression Language "
+                    "functions are not supported. Empty = FlowFile text."
+                ),
+                required=False,
+                sensitive=False,
+                expression_language_scope=ExpressionLanguageScope.FLOWFILE_ATTRIBUTES,
+            ),
+            PropertyDescriptor(
+                name="Max New Tokens",
+                description="Maximum number of tokens the LLM may generate per request.",
+                required=False,
+                sensitive=False,
+                default_value=str(DEFAULT_MAX_NEW_TOKENS),
+            ),
+            PropertyDescriptor(
+                name="Max Input Tokens",
+                description=(
+                    "Budget of estimated input tokens per request (system prompt + "
+                    "user prompt, ~4 UTF-8 bytes per token). Longer FlowFile text is "
+                    "handled by Input Overflow Strategy. 0 = unlimited."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Input Overflow Strategy",
+                description=(
+                    "What to do with FlowFile text over Max Input Tokens: keep its "
+                    "'head', its 'tail', or 'head+tail' (half of the budget from each "
+                    "end), or 'chunk': split it into overlapping chunks, send them "
+                    "concurrently and merge the results. Streaming uses 'head' "
+                    "instead of 'chunk'."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=list(OVERFLOW_STRATEGIES),
+                default_value=TRUNCATE_HEAD,
+            ),
+            PropertyDescriptor(
+                name="Chunk Overlap Tokens",
+                description=(
+                    "Estimated tokens repeated from the end of one chunk at the start "
+                    "of the next (at most half a chunk)."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="64",
+            ),
+            PropertyDescriptor(
+                name="Chunk Merge Prompt",
+                description=(
+                    "System prompt of a final LLM call that merges the per-chunk "
+                    "results (e.g. 'Объедини частичные ответы в один'). Empty = the "
+                    "results are joined with blank lines."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Connection Pool Size",
+                description="Number of per-host connection pools kept by the HTTP session.",
+                required=False,
+                sensitive=False,
+                default_value="10",
+            ),
+            PropertyDescriptor(
+                name="Max Connections Per Host",
+                description=(
+                    "Max open connections to one LLM host. Extra requests wait "
+                    "for a free pooled connection instead of opening new sockets."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="10",
+            ),
+            PropertyDescriptor(
+                name="Keep-Alive",
+                description="Reuse HTTP connections between FlowFiles (true/false).",
+                required=False,
+                sensitive=False,
+                default_value="true",
+            ),
+            PropertyDescriptor(
+                name="HTTP Client",
+                description=(
+                    "'requests': blocking calls, one pooled connection per in-flight "
+                    "request. 'httpx': one shared async client on an event loop thread "
+                    "that NiFi threads hand their requests to (with HTTP/2 they share "
+                    "one connection). Streaming always uses 'requests'."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=[CLIENT_REQUESTS, CLIENT_HTTPX],
+                default_value=CLIENT_REQUESTS,
+            ),
+            PropertyDescriptor(
+                name="HTTP/2",
+                description=(
+                    "With HTTP Client 'httpx': multiplex concurrent requests as HTTP/2 "
+                    "streams (prior knowledge for http:// endpoints, so the server must "
+                    "speak HTTP/2). Needs the 'h2' package; falls back to HTTP/1.1."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=["true", "false"],
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Connect Timeout",
+                description="Seconds to wait for a TCP connection to the LLM host.",
+                required=False,
+                sensitive=False,
+                default_value=str(DEFAULT_CONNECT_TIMEOUT),
+            ),
+            PropertyDescriptor(
+                name="Read Timeout",
+                description="Seconds to wait for the LLM response once connected.",
+                required=False,
+                sensitive=False,
+                default_value=str(DEFAULT_READ_TIMEOUT),
+            ),
+            PropertyDescriptor(
+                name="Warm-Up",
+                description=(
+                    "When the processor is started, send a one-token request to every "
+                    "endpoint with the configured client, so the first FlowFiles do not "
+                    "pay for opening connections and a cold server. Start waits for "
+                    "it (up to the timeouts); failures are only logged."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=["true", "false"],
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Max In-Flight Requests",
+                description=(
+                    "Max LLM requests running at once for this processor instance, "
+                    "shared by all its concurrent tasks. 1 = call the LLM directly "
+                    "in the NiFi thread."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="1",
+            ),
+            PropertyDescriptor(
+                name="Max Queued Requests",
+                description=(
+                    "Requests allowed to wait for an in-flight slot. When full, "
+                    "new FlowFiles wait up to Read Timeout and then go to failure."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="100",
+            ),
+            PropertyDescriptor(
+                name="Batch Size",
+                description=(
+                    "Max FlowFiles sent together in one /generate call as a list "
+                    "of prompts (server must answer with a 'results' list). "
+                    "1 = no batching."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="1",
+            ),
+            PropertyDescriptor(
+                name="Batch Max Wait",
+                description=(
+                    "Milliseconds a FlowFile may wait for its batch to fill up "
+                    "before the batch is sent anyway."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="20",
+            ),
+            PropertyDescriptor(
+                name="Response Cache Size",
+                description=(
+                    "Max cached LLM responses (LRU eviction). 0 = cache disabled."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Response Cache TTL",
+                description="Seconds a cached response stays valid.",
+                required=False,
+                sensitive=False,
+                default_value="3600",
+            ),
+            PropertyDescriptor(
+                name="Response Cache Directory",
+                description=(
+                    "Optional local directory for a persistent (SQLite) cache that "
+                    "survives NiFi restarts. Empty = in-memory only."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Cache Any Temperature",
+                description=(
+                    "Cache responses even when Temperature is not 0 "
+                    "(answers are then no longer sampled per FlowFile)."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Streaming",
+                description=(
+                    "Request a token stream (\"stream\": true) and consume it "
+                    "incrementally (SSE, NDJSON or raw chunks). Streamed requests "
+                    "bypass batching and the response cache."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Max Output Bytes",
+                description=(
+                    "Streaming only: stop generation once the output would exceed "
+                    "this many bytes. 0 = unlimited."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Max Output Tokens",
+                description=(
+                    "Streaming only: stop generation after this many streamed "
+                    "tokens. 0 = unlimited."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Total Deadline",
+                description=(
+                    "Streaming only: seconds allowed for the whole generation; "
+                    "output produced so far is kept. 0 = no deadline."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Max Retries",
+                description=(
+                    "Retries after a transient error (connection error, timeout, "
+                    "HTTP 429/502/503/504). Retry-After from the server is honoured."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="2",
+            ),
+            PropertyDescriptor(
+                name="Retry Initial Backoff",
+                description="Seconds; base of the exponential backoff (with full jitter).",
+                required=False,
+                sensitive=False,
+                default_value="0.5",
+            ),
+            PropertyDescriptor(
+                name="Retry Max Backoff",
+                description="Seconds; upper bound of a single backoff / Retry-After wait.",
+                required=False,
+                sensitive=False,
+                default_value="10",
+            ),
+            PropertyDescriptor(
+                name="Circuit Breaker Threshold",
+                description=(
+                    "Consecutive transient failures that open the circuit; while "
+                    "open, FlowFiles go to 'retry' without calling the LLM. "
+                    "0 = no circuit breaker."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="5",
+            ),
+            PropertyDescriptor(
+                name="Circuit Breaker Reset",
+                description=(
+                    "Seconds the circuit stays open before a single probe request "
+                    "checks whether the endpoint recovered."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="30",
+            ),
+            PropertyDescriptor(
+                name="Max Requests Per Second",
+                description="Client-side limit of LLM requests per second. 0 = unlimited.",
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Max Tokens Per Second",
+                description=(
+                    "Client-side limit of estimated LLM tokens per second "
+                    "(prompt tokens + max_new_tokens per request). 0 = unlimited."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Rate Limit Burst",
+                description=(
+                    "Seconds of unused rate budget that may be saved up and spent "
+                    "at once (bucket capacity = rate x burst)."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="1",
+            ),
+            PropertyDescriptor(
+                name="Rate Limit Shared File",
+                description=(
+                    "Optional path of a local file holding the rate limit state. "
+                    "All processors/processes on the host pointing at the same file "
+                    "share one budget. Empty = per processor instance."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Load Balancing Strategy",
+                description=(
+                    "How to pick one of several endpoints: 'least-outstanding' "
+                    "(fewest requests in flight) or 'latency-ewma' (lowest recent "
+                    "latency x requests in flight)."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=list(STRATEGIES),
+                default_value=LEAST_OUTSTANDING,
+            ),
+            PropertyDescriptor(
+                name="Backend Ejection Failures",
+                description=(
+                    "Consecutive transient failures after which an endpoint gets "
+                    "no traffic for Backend Ejection Time."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="3",
+            ),
+            PropertyDescriptor(
+                name="Backend Ejection Time",
+                description="Seconds an unhealthy endpoint is ejected from balancing.",
+                required=False,
+                sensitive=False,
+                default_value="30",
+            ),
+            PropertyDescriptor(
+                name="Hedge Percentile",
+                description=(
+                    "With several endpoints: when a request has not answered within "
+                    "this percentile of recent latencies (e.g. 95), send a duplicate "
+                    "to another endpoint and take whichever answers first; the other "
+                    "is cancelled. 0 = no hedging."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0",
+            ),
+            PropertyDescriptor(
+                name="Hedge Min Delay",
+                description="Milliseconds; lower bound of the hedge delay.",
+                required=False,
+                sensitive=False,
+                default_value="50",
+            ),
+            PropertyDescriptor(
+                name="Max Hedge Rate",
+                description=(
+                    "Fraction of requests that may be hedged (e.g. 0.05 = 5%), so "
+                    "hedging cannot double the load when every replica is slow."
+                ),
+                required=False,
+                sensitive=False,
+                default_value="0.05",
+            ),
+            PropertyDescriptor(
+                name="Timing Attributes",
+                description=(
+                    "Add llm.timing.<phase>.ms (read, decode, attributes, prepare, "
+                    "wait, http, parse, encode, total) and llm.bytes.<kind> "
+                    "attributes to every FlowFile."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=["true", "false"],
+                default_value="false",
+            ),
+            PropertyDescriptor(
+                name="Metrics Endpoint",
+                description=(
+                    "[host:]port to serve per-phase latency and payload size "
+                    "histograms on, in Prometheus text format (GET /metrics; host "
+                    "defaults to 127.0.0.1). Empty = no endpoint."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Metrics File",
+                description=(
+                    "File rewritten every 10 seconds with the same metrics (e.g. for "
+                    "the node_exporter textfile collector). Empty = no file."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Profile Directory",
+                description=(
+                    "Directory to write profiles of sampled transform() calls to "
+                    "(<processor>-<pid>-<time>.collapsed or .pstats, newest 100 kept). "
+                    "Empty = profiling off."
+                ),
+                required=False,
+                sensitive=False,
+            ),
+            PropertyDescriptor(
+                name="Profiler",
+                description=(
+                    "'sampling': wall-clock stack samples every 5 ms, written as "
+                    "collapsed stacks for flame graphs (low overhead, misses very "
+                    "short calls); 'cprofile': every Python call of a sampled "
+                    "transform(), written as merged pstats (slower, one call at a time)."
+                ),
+                required=False,
+                sensitive=False,
+                allowable_values=[SAMPLING, CPROFILE],
+                default_value=SAMPLING,
+            ),
+            PropertyDescriptor(
+                name="Profile Fraction",
+                description="Fraction of transform() calls to profile (e.g. 0.01 = 1%).",
+                required=False,
+                sensitive=False,
+                default_value="0.01",
+            ),
+            PropertyDescriptor(
+                name="Profile Dump Interval",
+                description="Seconds between profile files; each holds one interval.",
+                required=False,
+                sensitive=False,
+                default_value="60",
+            ),
+            PropertyDescriptor(
+                name="Profile Max Overhead",
+                description=(
+                    "Share of wall-clock time the profiler may take (samples, or "
+                    "the whole duration of cProfile'd calls); over it, calls are "
+                    "not profiled. E.g. 0.02 = 2%."
+                ),
                 required=False,
                 sensitive=False,
+                default_value="0.02",
             ),
         ]
 
+    def onScheduled(self, context) -> None:
+        """
+        Called by NiFi when the processor is started.
+
+        Creates the pooled keep-alive HTTP session shared by all FlowFiles,
+        the endpoint load balancer, in-flight dispatcher, micro-batcher and
+        response cache, and resolves the timeouts and the per-request
+        properties once (transform() makes no getProperty() calls).
+        """
+        self.onStopped(context)
+
+        self._config = RequestConfig.from_context(context)
+
+        strategy = context.getProperty("Load Balancing Strategy") or LEAST_OUTSTANDING
+        self._balancer = LoadBalancer(
+            parse_endpoints(context.getProperty("HOST"), context.getProperty("PORT")),
+            strategy=strategy,
+            eject_after=_parse_int(context.getProperty("Backend Ejection Failures"), 3),
+            eject_for=_parse_float(context.getProperty("Backend Ejection Time"), 30.0),
+        )
+
+        self._connect_timeout = _parse_float(
+            context.getProperty("Connect Timeout"), DEFAULT_CONNECT_TIMEOUT
+        )
+        self._read_timeout = _parse_float(
+            context.getProperty("Read Timeout"), DEFAULT_READ_TIMEOUT
+        )
+        max_in_flight = _parse_int(context.getProperty("Max In-Flight Requests"), 1)
+        max_queued = _parse_int(
+            context.getProperty("Max Queued Requests"), 100, minimum=0
+        )
+
+        # The pool must hold at least one connection per in-flight request,
+        # otherwise workers would just wait for each other's sockets.
+        pool_maxsize = max(
+            _parse_int(context.getProperty("Max Connections Per Host"), 10),
+            max_in_flight,
+        )
+        keep_alive = _parse_bool(context.getProperty("Keep-Alive"), True)
+        streaming = _parse_bool(context.getProperty("Streaming"), False)
+        if context.getProperty("HTTP Client") == CLIENT_HTTPX and not streaming:
+            # httpx and asyncio are only imported when this client is chosen
+            from llm_async_client import AsyncLLMClient, call_llm_batch_httpx, call_llm_httpx
+
+            http2 = _parse_bool(context.getProperty("HTTP/2"), False)
+            self._session = AsyncLLMClient(
+                max_connections=pool_maxsize, keep_alive=keep_alive, http2=http2
+            )
+            if http2 and not self._session.http2:
+                logger = getattr(self, "logger", None)
+                if logger is not None:
+                    logger.warn("HTTP/2 requested but the 'h2' package is missing; using HTTP/1.1")
+            self._call_fn, self._batch_fn = call_llm_httpx, call_llm_batch_httpx
+        else:
+            self._session = create_session(
+                pool_connections=_parse_int(context.getProperty("Connection Pool Size"), 10),
+                pool_maxsize=pool_maxsize,
+                keep_alive=keep_alive,
+            )
+            self._call_fn, self._batch_fn = call_llm, call_llm_batch
+
+        if max_in_flight > 1:
+            self._dispatcher = InFlightDispatcher(max_in_flight, max_queued)
+
+        max_input_tokens = _parse_int(context.getProperty("Max Input Tokens"), 0, minimum=0)
+        if max_input_tokens > 0:
+            overflow = context.getProperty("Input Overflow Strategy") or TRUNCATE_HEAD
+            if overflow not in OVERFLOW_STRATEGIES:
+                overflow = TRUNCATE_HEAD
+            self._input = {
+                "max_tokens": max_input_tokens,
+                "strategy": overflow,
+                "overlap": _parse_int(context.getProperty("Chunk Overlap Tokens"), 64, minimum=0),
+                "merge_prompt": context.getProperty("Chunk Merge Prompt") or "",
+            }
+            # Chunks of one FlowFile are sent from their own threads; the
+            # dispatcher still bounds how many requests are in flight
+            if overflow == OVERFLOW_CHUNK and max_in_flight > 1:
+                self._chunk_pool = ThreadPoolExecutor(
+                    max_workers=max_in_flight, thread_name_prefix="llm-chunk"
+                )
+
+        batch_size = _parse_int(context.getProperty("Batch Size"), 1)
+        if batch_size > 1:
+            batch_wait_ms = _parse_float(context.getProperty("Batch Max Wait"), 20.0)
+            self._batcher = MicroBatcher(
+                self._send_batch,
+                max_batch_size=batch_size,
+                max_wait=batch_wait_ms / 1000.0,
+                submit=self._dispatcher.submit if self._dispatcher is not None else None,
+            )
+
+        cache_size = _parse_int(context.getProperty("Response Cache Size"), 0, minimum=0)
+        if cache_size > 0:
+            cache_dir = context.getProperty("Response Cache Directory") or ""
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            self._cache = ResponseCache(
+                max_entries=cache_size,
+                ttl=_parse_float(context.getProperty("Response Cache TTL"), 3600.0),
+                path=os.path.join(cache_dir, CACHE_DB_NAME) if cache_dir else None,
+            )
+            self._cache_any_temperature = _parse_bool(
+                context.getProperty("Cache Any Temperature"), False
+            )
+
+        self._retry = {
+            "max_retries": _parse_int(context.getProperty("Max Retries"), 2, minimum=0),
+            "initial_backoff": _parse_float(context.getProperty("Retry Initial Backoff"), 0.5),
+            "max_backoff": _parse_float(context.getProperty("Retry Max Backoff"), 10.0),
+        }
+        breaker_threshold = _parse_int(
+            context.getProperty("Circuit Breaker Threshold"), 5, minimum=0
+        )
+        self._breaker = CircuitBreaker(
+            failure_threshold=breaker_threshold,
+            reset_timeout=_parse_float(context.getProperty("Circuit Breaker Reset"), 30.0),
+        ) if breaker_threshold > 0 else None
+
+        self._limiter = self._create_limiter(context)
+
+        hedge_percentile = _parse_float(context.getProperty("Hedge Percentile"), 0.0)
+        if 0 < hedge_percentile <= 100 and len(self._balancer.backends) > 1:
+            from hedging import Hedger
+
+            hedge_delay_ms = _parse_float(context.getProperty("Hedge Min Delay"), 50.0)
+            hedge_rate = _parse_float(context.getProperty("Max Hedge Rate"), 0.05)
+            self._hedger = Hedger(
+                percentile=hedge_percentile,
+                min_delay=max(hedge_delay_ms, 0.0) / 1000.0,
+                max_rate=min(max(hedge_rate, 0.0), 1.0),
+                # Both copies of every in-flight request, plus inline NiFi tasks
+                max_workers=2 * max_in_flight + 32,
+            )
+
+        self._metrics = ProcessorMetrics.from_context(context, "LLMRequestProcessor", "llm")
+        self._profiler = TransformProfiler.from_context(context, "LLMRequestProcessor")
+
+        if streaming:
+            self._stream = {
+                "max_bytes": _parse_int(context.getProperty("Max Output Bytes"), 0, minimum=0),
+                "max_tokens": _parse_int(context.getProperty("Max Output Tokens"), 0, minimum=0),
+                "deadline": max(0.0, _parse_float(context.getProperty("Total Deadline"), 0.0)),
+            }
+
+        if _parse_bool(context.getProperty("Warm-Up"), False):
+            self._warm_up()
+
+    def _warm_up(self) -> None:
+        """
+        Send WARM_UP_PROMPT to every endpoint at once, through the pooled
+        session: connections are open (and the server has answered once)
+        before the first FlowFile arrives. Bypasses the cache, rate limiter,
+        retries and circuit breaker; errors are logged, not raised, so the
+        processor starts even while the LLM is down.
+        """
+        logger = getattr(self, "logger", None)
+        backends = self._balancer.backends
+
+        def warm(backend):
+            started = time.monotonic()
+            try:
+                self._call_fn(
+                    host=backend.host, port=backend.port, system_prompt="",
+                    temperature=0.0, user_text=WARM_UP_PROMPT, session=self._session,
+                    connect_timeout=self._connect_timeout, read_timeout=self._read_timeout,
+                    max_new_tokens=WARM_UP_MAX_NEW_TOKENS,
+                )
+            except Exception as e:
+                if logger is not None:
+                    logger.warn(f"LLM warm-up of {backend.address} failed: {e}")
+                return
+            if logger is not None:
+                logger.info(
+                    f"LLM warm-up of {backend.address}: {time.monotonic() - started:.3f}s"
+                )
+
+        with ThreadPoolExecutor(max_workers=len(backends),
+                                thread_name_prefix="llm-warm-up") as pool:
+            list(pool.map(warm, backends))
+
+    def onStopped(self, context) -> None:
+        """
+        Called by NiFi when the processor is stopped: wait for in-flight
+        requests and close pooled connections.
+        """
+        chunk_pool, self._chunk_pool = self._chunk_pool, None
+        if chunk_pool is not None:
+            chunk_pool.shutdown(wait=True)
+        self._input = None
+
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batcher.close()
+
+        dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=True)
+
+        hedger, self._hedger = self._hedger, None
+        if hedger is not None:
+            logger = getattr(self, "logger", None)
+            if logger is not None:
+                logger.info(
+                    f"LLM hedging: {hedger.hedges} hedges for {hedger.requests} "
+                    f"requests, {hedger.wins} won"
+                )
+            hedger.close()
+
+        session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+        limiter, self._limiter = self._limiter, None
+        if limiter is not None:
+            limiter.close()
+
+        metrics, self._metrics = self._metrics, None
+        if metrics is not None:
+            metrics.close()
+
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            profiler.close()
+            logger = getattr(self, "logger", None)
+            if logger is not None:
+                logger.info(
+                    f"LLM profiler: {profiler.profiled} of {profiler.calls} calls profiled "
+                    f"({profiler.skipped} skipped over the overhead budget), "
+                    f"{profiler.files_written} files in {profiler.directory}"
+                )
+
+        cache, self._cache = self._cache, None
+        if cache is not None:
+            logger = getattr(self, "logger", None)
+            if logger is not None:
+                logger.info(
+                    f"LLM response cache: {cache.hits} hits, {cache.misses} misses"
+                )
+            cache.close()
+
+    @staticmethod
+    def _create_limiter(context):
+        """RateLimiter from the rate limit properties, or None if unlimited."""
+        burst = max(_parse_float(context.getProperty("Rate Limit Burst"), 1.0), 0.001)
+        shared_file = context.getProperty("Rate Limit Shared File") or ""
+
+        def bucket(name: str, slot: int):
+            rate = _parse_float(context.getProperty(name), 0.0)
+            if rate <= 0:
+                return None
+            capacity = max(rate * burst, 1.0)
+            if shared_file:
+                return SharedTokenBucket(shared_file, rate, capacity, slot=slot)
+            return TokenBucket(rate, capacity)
+
+        requests_bucket = bucket("Max Requests Per Second", 0)
+        tokens_bucket = bucket("Max Tokens Per Second", 1)
+        if requests_bucket is None and tokens_bucket is None:
+            return None
+        return RateLimiter(requests=requests_bucket, tokens=tokens_bucket)
+
+    def _cached_call_llm(self, served: Dict[str, str],
+                         **kwargs: Any) -> Tuple[str, Optional[bool]]:
+        """
+        _call_llm() behind the response cache.
+
+        Returns (text, hit); hit is None when the request is not cacheable
+        (cache disabled, or Temperature != 0 without Cache Any Temperature).
+        """
+        cache = self._cache
+        if cache is None or (kwargs["temperature"] != 0 and not self._cache_any_temperature):
+            return self._call_llm(served, **kwargs), None
+
+        key = cache_key(
+            endpoint=self._balancer.key,
+            system_prompt=kwargs["system_prompt"],
+            temperature=kwargs["temperature"],
+            max_new_tokens=self._config.max_new_tokens,
+            user_text=kwargs["user_text"],
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        text = self._call_llm(served, **kwargs)
+        cache.put(key, text)
+        return text, False
+
+    def _call_llm(self, served: Dict[str, str], **kwargs: Any) -> str:
+        """
+        Run call_llm() (or call_llm_httpx()) with the pooled session, either
+        inline or through the in-flight dispatcher (waits for a slot, then
+        for the result).
+
+        With batching enabled the request is handed to the micro-batcher
+        instead and this call waits for its own item's result.
+
+        `served` receives the address of the backend that answered.
+        """
+        batcher = self._batcher
+        if batcher is not None:
+            wait = batcher.max_wait + self._connect_timeout + self._read_timeout
+            return batcher.call(dict(kwargs, served=served), timeout=wait)
+
+        return self._run(self._call_fn, served, **kwargs)
+
+    def _run(self, fn, served: Optional[Dict[str, str]] = None, **kwargs: Any) -> Any:
+        """
+        _invoke() inline or through the in-flight dispatcher.
+        """
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            return self._invoke(fn, served, **kwargs)
+        return dispatcher.submit(
+            self._invoke, fn, served, timeout=self._read_timeout, **kwargs
+        ).result()
+
+    def _invoke(self, fn, served: Optional[Dict[str, str]] = None, **kwargs: Any) -> Any:
+        """
+        Call an llm_client function on a load-balanced backend with the
+        pooled session and timeouts, retrying transient errors through the
+        circuit breaker. A retry prefers a backend not tried yet.
+
+        Single calls (not batches or streams) are hedged when enabled:
+        `served` then also gets "hedge" = "won" / "lost".
+        """
+        max_new_tokens = self._config.max_new_tokens
+        kwargs.update(
+            session=self._session,
+            connect_timeout=self._connect_timeout,
+            read_timeout=self._read_timeout,
+            max_new_tokens=max_new_tokens,
+        )
+
+        limiter = self._limiter
+        estimated = 0
+        if limiter is not None:
+            texts = kwargs.get("user_texts") or [kwargs.get("user_text", "")]
+            estimated = sum(
+                estimate_tokens(kwargs["system_prompt"]) + estimate_tokens(text)
+                + max_new_tokens
+                for text in texts
+            )
+
+        balancer = self._balancer
+        tried = []
+        # Backends of the current attempt: "primary" and, if hedged, "hedge"
+        picked = {}
+
+        def call_backend(role, exclude):
+            backend = balancer.acquire(exclude=exclude)
+            picked[role] = backend
+            if served is not None:
+                served["backend"] = backend.address
+            started = time.monotonic()
+            try:
+                result = fn(host=backend.host, port=backend.port, **kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                balancer.release(backend, None, healthy=not retryable)
+                if retryable:
+                    tried.append(backend)
+                raise
+            balancer.release(backend, time.monotonic() - started, healthy=True)
+            return result
+
+        def hedge():
+            return call_backend("hedge", tried + list(picked.values()))
+
+        def admit_hedge():
+            # A hedge is one more request: it needs rate budget right now
+            try:
+                limiter.acquire(estimated, timeout=0)
+            except RateLimitTimeout:
+                return False
+            return True
+
+        hedger = self._hedger if fn is self._call_fn else None
+
+        def acquire_budget():
+            # Budget is charged per attempt: every retry hits the server again
+            limiter.acquire(estimated, timeout=self._read_timeout)
+
+        def attempt():
+            picked.clear()
+            if hedger is None:
+                return call_backend("primary", tried)
+
+            result, hedged = hedger.call(
+                lambda: call_backend("primary", tried), hedge,
+                admit=admit_hedge if limiter is not None else None,
+            )
+            if hedged is not None and served is not None:
+                # Report the backend that answered, and whether the hedge won
+                served["backend"] = picked["hedge" if hedged else "primary"].address
+                served["hedge"] = "won" if hedged else "lost"
+            return result
+
+        # A rate-limit timeout is raised outside the breaker's accounting
+        return call_with_retry(
+            attempt, breaker=self._breaker,
+            before_attempt=acquire_budget if limiter is not None else None, **self._retry
+        )
+
+    def _send_batch(self, items: List[Dict[str, Any]]) -> List[Any]:
+        """
+        MicroBatcher callback: send queued prompts, one call_llm_batch()
+        per distinct (system prompt, temperature), and return results in
+        the order of `items`.
+        """
+        groups: Dict[Tuple, List[int]] = {}
+        for index, item in enumerate(items):
+            key = (item["system_prompt"], item["temperature"])
+            groups.setdefault(key, []).append(index)
+
+        results: List[Any] = [None] * len(items)
+        for (system_prompt, temperature), indexes in groups.items():
+            served: Dict[str, str] = {}
+            try:
+                texts = self._invoke(
+                    self._batch_fn,
+                    served,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    user_texts=[items[i]["user_text"] for i in indexes],
+                )
+            except Exception as e:
+                # Whole request failed: every FlowFile of this group fails
+                texts = [e] * len(indexes)
+            for i, text in zip(indexes, texts):
+                items[i]["served"].update(served)
+                results[i] = text
+        return results
+
     def transform(self, context, flowfile) -> FlowFileTransformResult:
         """
         Main method called by NiFi for each FlowFile.
 
         - Reads text from FlowFile.
-        - Reads HOST, PORT, System Prompt, Temperature from properties.
-        - Calls external LLM via call_llm().
+        - Takes System Prompt, Temperature and Prompt Template from the
+          config resolved in onScheduled(); only ${attribute} references
+          are read per FlowFile.
+        - Fits the text into Max Input Tokens (truncated, or split into
+          chunks whose results are merged).
+        - Calls external LLM via call_llm() on one of the HOST endpoints.
         - On success: replaces content with LLM response, routes to 'success'.
         - On error: keeps original content, routes to 'failure'.
+        - With Timing Attributes / metrics export: times every phase (see
+          phase_metrics.py) and reports it with the result.
+        - With a Profile Directory: profiles a fraction of the calls (see
+          transform_profiler.py).
         """
-        # Read content as bytes and decode as UTF-8
-        data = flowfile.getContentsAsBytes() or b""
-        user_text = data.decode("utf-8")
+        profiler = self._profiler
+        if profiler is not None:
+            return profiler.run(self._timed_transform, context, flowfile)
+        return self._timed_transform(context, flowfile)
 
-        # Read properties
-        host = context.getProperty("HOST")
-        port = context.getProperty("PORT")
+    def _timed_transform(self, context, flowfile) -> FlowFileTransformResult:
+        """transform() with per-phase timing when it is on."""
+        metrics = self._metrics
+        if metrics is None:
+            return self._transform(context, flowfile, NULL_TIMER)
+        timer = PhaseTimer()
+        return metrics.finish(timer, self._transform(context, flowfile, timer))
 
-        system_prompt = context.getProperty("System Prompt") or ""
-        temperature_str = context.getProperty("Temperature") or "0.7"
+    def _transform(self, context, flowfile, timer) -> FlowFileTransformResult:
+        """transform() with the FlowFile's phases charged to `timer`."""
+        data = read_content(flowfile)
+        timer.lap("read")
+        timer.size("in", len(data))
 
-        try:
-            temperature = float(temperature_str)
-        except ValueError:
-            temperature = 0.7
+        # Backend that served the request (filled in by _invoke)
+        served: Dict[str, str] = {}
 
         try:
-            # Call external LLM
-            result_text = call_llm(
-                host=host,
-                port=port,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                user_text=user_text,
-            )
+            # The prompt goes into a JSON payload, so this is the one place
+            # the content is decoded (strict UTF-8; invalid input -> failure)
+            content = decode_text(data)
+            timer.lap("decode")
+
+            # Processor used without onScheduled() (e.g. in tests): set up lazily
+            if self._session is None:
+                self.onScheduled(context)
+
+            config = self._config
+            system_prompt, temperature, values = config.resolve_attributes(flowfile)
+            timer.lap("attributes")
+
+            # Over the input budget: truncate the content or cut it into chunks
+            budget = {}
+            chunks = None
+            if self._input is not None:
+                content, chunks, budget = self._fit_input(content, system_prompt, values)
+                timer.lap("prepare")
+
+            if self._stream is not None:
+                return self._transform_stream(
+                    served,
+                    budget,
+                    timer,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    user_text=config.render_prompt(values, content),
+                )
+
+            if chunks is not None:
+                result_text, cache_hit = self._map_reduce(
+                    served, chunks, values,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    timer=timer,
+                )
+            else:
+                # Call external LLM (or answer from the response cache);
+                # Prompt Template (if set) wraps the content into the user prompt
+                result_text, cache_hit = self._cached_call_llm(
+                    served,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    user_text=config.render_prompt(values, content),
+                    timer=timer,
+                )
+            # Queueing, rate limit, retry backoff and cache lookups: the
+            # time not spent in HTTP requests and response parsing
+            timer.lap("wait", exclude=("http", "parse"))
+
+            contents = to_contents(result_text)
+            timer.lap("encode")
+            timer.size("out", len(contents))
 
             # Successful result: new content + simple flag attribute
+            attributes = {"llm.success": "true"}
+            attributes.update(budget)
+            if cache_hit is not None:
+                attributes["llm.cache.hit"] = str(cache_hit).lower()
+            if "backend" in served:
+                attributes["llm.backend"] = served["backend"]
+            if "hedge" in served:
+                attributes["llm.hedged"] = "true"
+                attributes["llm.hedge.won"] = str(served["hedge"] == "won").lower()
+
             return FlowFileTransformResult(
                 relationship="success",
-                contents=result_text,
-                attributes={
-                    "llm.success": "true",
-                },
+                contents=contents,
+                attributes=attributes,
             )
 
         except Exception as e:
-            # Any error: route to failure, keep original content
+            # Endpoint unavailable (retries exhausted / circuit open): route
+            # to 'retry' so NiFi can penalize and loop the FlowFile back.
+            # Any other error: route to failure. Original content is kept.
+            transient = isinstance(e, (CircuitOpenError, RateLimitTimeout)) or is_retryable(e)
+            attributes = {
+                "llm.success": "false",
+                "llm.error": str(e)[:512],
+            }
+            if "backend" in served:
+                attributes["llm.backend"] = served["backend"]
             return FlowFileTransformResult(
-                relationship="failure",
+                relationship="retry" if transient else "failure",
                 contents=None,
-                attributes={
-                    "llm.success": "false",
-                    "llm.error": str(e)[:512],
-                },
+                attributes=attributes,
             )
     
+    def _fit_input(self, content: str, system_prompt: str,
+                   values: Dict[str, str]) -> Tuple[str, Optional[List[str]], Dict[str, str]]:
+        """
+        Apply Max Input Tokens to the FlowFile text.
+
+        The system prompt and the Prompt Template around ${content} count
+        against the budget; what is left is the room for the content.
+        Returns (content, chunks or None, budget attributes): content cut
+        down by a truncation strategy, or the chunks to map-reduce.
+        """
+        budget = self._input
+        tokens = estimate_tokens(content)
+        attributes = {"llm.input.tokens": str(tokens), "llm.input.truncated": "false"}
+
+        room = (budget["max_tokens"] - estimate_tokens(system_prompt)
+                - estimate_tokens(self._config.render_prompt(values, "")))
+        if tokens <= room:
+            return content, None, attributes
+        if room <= 0:
+            raise ValueError(
+                f"Max Input Tokens ({budget['max_tokens']}) leaves no room for the "
+                f"FlowFile content after the system prompt and Prompt Template"
+            )
+
+        strategy = budget["strategy"]
+        if strategy == OVERFLOW_CHUNK and self._stream is None:
+            chunks = split_tokens(content, room, budget["overlap"])
+            attributes["llm.chunks"] = str(len(chunks))
+            return content, chunks, attributes
+
+        if strategy == OVERFLOW_CHUNK:
+            strategy = TRUNCATE_HEAD
+        attributes["llm.input.truncated"] = "true"
+        return truncate_tokens(content, room, strategy), None, attributes
+
+    def _map_reduce(self, served: Dict[str, str], chunks: List[str],
+                    values: Dict[str, str], **kwargs: Any) -> Tuple[str, Optional[bool]]:
+        """
+        Send every chunk as its own request (concurrently through the
+        chunk pool when Max In-Flight Requests > 1) and merge the results
+        in chunk order: joined with blank lines, or by one more call with
+        Chunk Merge Prompt as the system prompt.
+
+        Returns (text, cache hit) like _cached_call_llm(); hit is True
+        only if every call was answered from the cache.
+        """
+        def call(chunk: str) -> Tuple[str, Optional[bool]]:
+            return self._cached_call_llm(
+                served, user_text=self._config.render_prompt(values, chunk), **kwargs
+            )
+
+        pool = self._chunk_pool
+        results = list(pool.map(call, chunks)) if pool is not None else [call(c) for c in chunks]
+
+        merged = CHUNK_SEPARATOR.join(text for text, _ in results)
+        hits = [hit for _, hit in results]
+        merge_prompt = self._input["merge_prompt"]
+        if merge_prompt:
+            room = self._input["max_tokens"] - estimate_tokens(merge_prompt)
+            if room > 0:
+                merged = truncate_tokens(merged, room, TRUNCATE_HEAD_TAIL)
+            merged, hit = self._cached_call_llm(
+                served,
+                system_prompt=merge_prompt,
+                temperature=kwargs["temperature"],
+                user_text=merged,
+                timer=kwargs["timer"],
+            )
+            hits.append(hit)
+
+        if any(hit is None for hit in hits):
+            return merged, None
+        return merged, all(hits)
+
+    def _transform_stream(self, served: Dict[str, str], budget: Dict[str, str], timer,
+                          **kwargs: Any) -> FlowFileTransformResult:
+        """
+        Streaming variant of the LLM call: the streamed bytes become the
+        new content as-is, with token count, time-to-first-token and
+        truncation reason as attributes (plus the input budget ones).
+        The whole stream is timed as "http"; the Total Deadline is one
+        absolute time shared by all retries of the call.
+        """
+        stream = dict(self._stream)
+        deadline = stream.pop("deadline")
+        if deadline:
+            stream["deadline_at"] = time.monotonic() + deadline
+        result = self._run(call_llm_stream, served, **kwargs, **stream)
+        timer.lap("http")
+        timer.size("out", len(result.content))
+
+        attributes = {
+            "llm.success": "true",
+            "llm.stream.tokens": str(result.tokens),
+            "llm.backend": served["backend"],
+        }
+        attributes.update(budget)
+        if result.ttft is not None:
+            attributes["llm.ttft.ms"] = f"{result.ttft * 1000:.1f}"
+        if result.truncated is not None:
+            attributes["llm.truncated"] = result.truncated
+
+        return FlowFileTransformResult(
+            relationship="success",
+            contents=result.content,
+            attributes=attributes,
+        )
+
     def getRelationships(self):
         """
         Explicitly declare processor relationships for tests and NiFi.
 
         We define:
-          - success : JSON processed and swapped
-          - failure : any error during decode/parse/swap
+          - success : LLM answered, content replaced with the response
+          - failure : non-recoverable error (bad input, rejected request)
+          - retry   : LLM endpoint unavailable (retries exhausted,
+                      circuit open or no rate limit budget in time);
+                      penalize and route back
         """
         return [
             Relationship(
                 name="success",
-                description="JSON successfully swapped (keys <-> values)"
+                description="LLM response received; content replaced with it"
             ),
             Relationship(
                 name="failure",
-                description="Error while processing JSON; original content kept"
+                description="Error while calling the LLM; original content kept"
+            ),
+            Relationship(
+                name="retry",
+                description=(
+                    "LLM endpoint unavailable (transient errors after retries, "
+                    "circuit breaker open, or rate limit budget not available in "
+                    "time); original content kept"
+                ),
             ),
         ]
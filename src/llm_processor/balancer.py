@@ -0,0 +1,159 @@
+"""
+Client-side load balancing across several LLM backends.
+
+LLMRequestProcessor may be given a list of endpoints (replicas of the
+same model). For every request LoadBalancer picks one of them:
+
+  - "least-outstanding": fewest requests currently in flight;
+  - "latency-ewma": lowest EWMA latency x (in-flight + 1), so a slow
+    replica gets less traffic even when it is idle.
+
+Passive health tracking: a backend that fails `eject_after` times in a
+row (transient errors only) is ejected for `eject_for` seconds and gets
+no traffic, unless every backend is ejected, in which case the one whose
+ejection ends first is still used.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from llm_client import build_url
+
+LEAST_OUTSTANDING = "least-outstanding"
+LATENCY_EWMA = "latency-ewma"
+STRATEGIES = (LEAST_OUTSTANDING, LATENCY_EWMA)
+
+
+def parse_endpoints(hosts: str, default_port: str) -> List[Tuple[str, str]]:
+    """
+    Parse "host1, host2:8001, ..." into [(host, port), ...].
+
+    Entries without an explicit port use default_port.
+    """
+    endpoints = []
+    for entry in (hosts or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, sep, port = entry.rpartition(":")
+        if sep and port.isdigit() and host:
+            endpoints.append((host, port))
+        else:
+            endpoints.append((entry, str(default_port)))
+    return endpoints
+
+
+class Backend:
+    """One LLM endpoint and its live statistics."""
+
+    __slots__ = ("host", "port", "outstanding", "ewma", "failures",
+                 "ejected_until", "picks")
+
+    def __init__(self, host: str, port: str):
+        self.host = host
+        self.port = port
+        self.outstanding = 0
+        # EWMA of request latency in seconds (None = no sample yet)
+        self.ewma: Optional[float] = None
+        # Consecutive transient failures
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.picks = 0
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @property
+    def url(self) -> str:
+        return build_url(self.host, self.port)
+
+
+class LoadBalancer:
+    """
+    Thread-safe backend picker with passive health tracking.
+
+    - strategy: LEAST_OUTSTANDING or LATENCY_EWMA;
+    - ewma_alpha: weight of the newest latency sample;
+    - eject_after / eject_for: consecutive failures that eject a backend
+      and for how many seconds.
+    """
+
+    def __init__(self,
+                 endpoints: Iterable[Tuple[str, str]],
+                 strategy: str = LEAST_OUTSTANDING,
+                 ewma_alpha: float = 0.3,
+                 eject_after: int = 3,
+                 eject_for: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.backends = [Backend(host, port) for host, port in endpoints]
+        if not self.backends:
+            raise ValueError("At least one LLM endpoint is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+
+        self.strategy = strategy
+        self.ewma_alpha = ewma_alpha
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        """Stable identity of the backend set (e.g. for cache keys)."""
+        return ",".join(b.url for b in self.backends)
+
+    def acquire(self, exclude: Iterable[Backend] = ()) -> Backend:
+        """
+        Pick a backend for one request and count it as outstanding.
+
+        Backends in `exclude` are skipped if any other one is available.
+        Every acquire() must be paired with release().
+        """
+        with self._lock:
+            now = self._clock()
+            excluded = set(map(id, exclude))
+            candidates = [b for b in self.backends if id(b) not in excluded] or self.backends
+            healthy = [b for b in candidates if b.ejected_until <= now]
+
+            if healthy:
+                backend = min(healthy, key=self._score)
+            else:
+                backend = min(candidates, key=lambda b: b.ejected_until)
+
+            backend.outstanding += 1
+            backend.picks += 1
+            return backend
+
+    def release(self, backend: Backend, latency: Optional[float], healthy: bool) -> None:
+        """
+        Finish a request on backend.
+
+        - latency: seconds the request took (None = do not sample);
+        - healthy: False for transient failures (count towards ejection).
+        """
+        with self._lock:
+            backend.outstanding -= 1
+
+            if latency is not None:
+                if backend.ewma is None:
+                    backend.ewma = latency
+                else:
+                    backend.ewma += self.ewma_alpha * (latency - backend.ewma)
+
+            if healthy:
+                backend.failures = 0
+                backend.ejected_until = 0.0
+            else:
+                backend.failures += 1
+                if backend.failures >= self.eject_after:
+                    backend.ejected_until = self._clock() + self.eject_for
+
+    def _score(self, backend: Backend):
+        # picks breaks ties, so equal backends take turns
+        if self.strategy == LATENCY_EWMA:
+            # Unknown latency scores 0: new backends get tried first
+            return (backend.ewma or 0.0) * (backend.outstanding + 1), backend.picks
+        return backend.outstanding, backend.picks
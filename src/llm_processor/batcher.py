@@ -0,0 +1,140 @@
+"""
+Micro-batching of LLM prompts across concurrent transform() calls.
+
+Every NiFi thread calling transform() hands its prompt to a shared
+MicroBatcher and waits. A background thread collects prompts until the
+batch has `max_batch_size` items or the oldest one waited `max_wait`
+seconds, sends them with one batched call, and hands each caller its own
+result (or its own error).
+"""
+
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+
+class _Pending:
+    """One caller waiting for its item's result."""
+
+    __slots__ = ("item", "enqueued", "done", "result", "error")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.enqueued = time.monotonic()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Collects items from many threads and flushes them in batches.
+
+    - send_batch(items) -> results: called with up to max_batch_size
+      items, must return one result per item in the same order; a result
+      that is an Exception instance fails only that item;
+    - max_wait: seconds the oldest queued item may wait for the batch
+      to fill up before it is flushed anyway;
+    - submit(fn, batch): optional executor hook (e.g. the in-flight
+      dispatcher) so several batches can be on the wire at once;
+      by default batches are sent one by one from the batching thread.
+    """
+
+    def __init__(self,
+                 send_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int,
+                 max_wait: float,
+                 submit: Optional[Callable[..., Any]] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+
+        self._send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait)
+        self._submit = submit
+
+        self._queue: List[_Pending] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+        self._thread.start()
+
+    def call(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Queue item, wait for its batch and return the item's result.
+
+        Raises the item's error, or TimeoutError if no result arrived
+        within `timeout` seconds.
+        """
+        pending = _Pending(item)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append(pending)
+            self._cond.notify()
+
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for batched LLM result")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def close(self) -> None:
+        """Flush what is queued and stop the batching thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+
+                # Wait for the batch to fill up, but not past the oldest
+                # item's deadline.
+                deadline = self._queue[0].enqueued + self.max_wait
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+
+            try:
+                if self._submit is not None:
+                    self._submit(self._flush, batch)
+                else:
+                    self._flush(batch)
+            except Exception as e:
+                # e.g. the executor refused the batch: fail its callers
+                self._fail(batch, e)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        try:
+            results = self._send_batch([p.item for p in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"send_batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            self._fail(batch, e)
+            return
+
+        for pending, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                pending.error = result
+            else:
+                pending.result = result
+            pending.done.set()
+
+    @staticmethod
+    def _fail(batch: List[_Pending], error: BaseException) -> None:
+        for pending in batch:
+            pending.error = error
+            pending.done.set()
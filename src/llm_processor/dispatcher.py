@@ -0,0 +1,83 @@
+"""
+Bounded in-flight request dispatcher used by LLMRequestProcessor.
+
+All NiFi threads that call transform() on one processor instance share a
+single thread pool, so at most `max_in_flight` LLM requests are on the
+wire at any moment and at most `max_queued` more are waiting for a slot.
+When both are used up, submit() blocks (backpressure) until a request
+finishes or the timeout expires.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class DispatcherFullError(RuntimeError):
+    """Raised when no in-flight/queue slot frees up within the timeout."""
+
+
+class InFlightDispatcher:
+    """
+    Thread pool with a bounded queue in front of it.
+
+    - max_in_flight: worker threads = requests running concurrently;
+    - max_queued: requests allowed to wait for a worker;
+    - submit(): blocks while in-flight + queued slots are exhausted.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int = 0):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1")
+        if max_queued < 0:
+            raise ValueError("max_queued must be >= 0")
+
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self._slots = threading.BoundedSemaphore(max_in_flight + max_queued)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight,
+            thread_name_prefix="llm-inflight",
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Requests currently running or queued."""
+        with self._lock:
+            return self._pending
+
+    def submit(self, fn: Callable[..., Any], *args: Any,
+               timeout: Optional[float] = None, **kwargs: Any) -> Future:
+        """
+        Schedule fn(*args, **kwargs) on the pool.
+
+        Waits up to `timeout` seconds (None = forever) for a free slot and
+        raises DispatcherFullError if none becomes available.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise DispatcherFullError(
+                f"LLM in-flight queue is full "
+                f"({self.max_in_flight} running, {self.max_queued} queued)"
+            )
+
+        with self._lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _f: self._release())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
@@ -0,0 +1,233 @@
+"""
+Hedged requests: cut tail latency caused by an occasionally slow replica.
+
+A request that has not answered within the hedge delay is duplicated to
+another endpoint; whichever copy answers first wins and the other one is
+cancelled.
+
+  - The delay is a percentile (e.g. p95) of a sliding window of recent
+    request latencies, never below min_delay. Nothing is hedged until
+    the window holds min_samples latencies.
+  - The hedge rate is capped: every request earns max_rate of a hedge
+    token (at most HEDGE_BURST saved up) and a hedge spends a whole one,
+    so no more than ~max_rate of requests are duplicated even when every
+    replica is slow at once.
+  - Hedged calls run on the Hedger's own thread pool, each inside a
+    CancelScope. The loser's scope is cancelled: the async httpx client
+    (llm_async_client) aborts its request, while a blocking requests
+    call runs to completion and its result is dropped.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Recent latencies the percentile is taken over
+LATENCY_WINDOW = 500
+# Latencies needed before the first hedge
+MIN_SAMPLES = 20
+# Hedge tokens that may be saved up and spent at once
+HEDGE_BURST = 10.0
+# New latencies after which the cached percentile is recomputed
+_RECOMPUTE_EVERY = 10
+
+
+class CallCancelled(RuntimeError):
+    """The call lost the race against its hedged twin and was cancelled."""
+
+
+class CancelScope:
+    """Cancellation handle of one hedged call (see current_scope())."""
+
+    __slots__ = ("cancelled", "_future", "_lock")
+
+    def __init__(self):
+        self.cancelled = False
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def attach(self, future: Future) -> None:
+        """Register the future to cancel (cancelled at once if the scope already is)."""
+        with self._lock:
+            self._future = future
+            if self.cancelled:
+                future.cancel()
+
+    def detach(self) -> None:
+        with self._lock:
+            self._future = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._future is not None:
+                self._future.cancel()
+
+
+_local = threading.local()
+
+
+def current_scope() -> Optional[CancelScope]:
+    """CancelScope of the hedged call running on this thread, if any."""
+    return getattr(_local, "scope", None)
+
+
+def wait_cancellable(future: Future) -> T:
+    """
+    future.result(), cancelled together with the current CancelScope
+    (CallCancelled is raised then). Used by clients whose requests run
+    on another thread or event loop.
+    """
+    scope = current_scope()
+    if scope is None:
+        return future.result()
+    scope.attach(future)
+    try:
+        return future.result()
+    except CancelledError:
+        raise CallCancelled("Cancelled: the hedged twin request answered first") from None
+    finally:
+        scope.detach()
+
+
+class Hedger:
+    """
+    Runs a call with a hedged twin (see module docstring).
+
+    - percentile: latency percentile used as the hedge delay (0-100);
+    - min_delay: lower bound of the delay, seconds;
+    - max_rate: fraction of requests that may be hedged;
+    - max_workers: size of the pool running both copies.
+    """
+
+    def __init__(self, percentile: float = 95.0, min_delay: float = 0.05,
+                 max_rate: float = 0.05, max_workers: int = 32,
+                 window: int = LATENCY_WINDOW, min_samples: int = MIN_SAMPLES,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile must be in (0, 100]")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self._clock = clock
+        self._latencies = deque(maxlen=window)
+        self._delay: Optional[float] = None
+        self._since_update = 0
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    def record(self, latency: float) -> None:
+        """Add the latency of a successful request to the window."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_update += 1
+            if self._delay is None or self._since_update >= _RECOMPUTE_EVERY:
+                self._update_delay()
+
+    @property
+    def delay(self) -> Optional[float]:
+        """Current hedge delay in seconds (None while warming up)."""
+        with self._lock:
+            return self._delay
+
+    def _update_delay(self) -> None:
+        self._since_update = 0
+        if len(self._latencies) < self.min_samples:
+            self._delay = None
+            return
+        ordered = sorted(self._latencies)
+        # Nearest-rank percentile
+        rank = max(math.ceil(self.percentile / 100.0 * len(ordered)), 1)
+        self._delay = max(ordered[rank - 1], self.min_delay)
+
+    def _take_token(self, admit: Optional[Callable[[], bool]]) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+        if admit is not None and not admit():
+            # Not sent: the hedge does not count against the rate cap
+            with self._lock:
+                self._tokens = min(self._tokens + 1.0, HEDGE_BURST)
+            return False
+        with self._lock:
+            self.hedges += 1
+        return True
+
+    def call(self, primary: Callable[[], T], hedge: Callable[[], T],
+             admit: Optional[Callable[[], bool]] = None) -> Tuple[T, Optional[bool]]:
+        """
+        Run primary(); if it takes longer than the hedge delay (and the
+        hedge rate allows), also run hedge() and return the first success.
+        admit(), when given, is asked right before a hedge is sent (e.g.
+        for rate limit budget); False means no hedge.
+
+        Returns (result, hedged): hedged is None if no hedge was sent,
+        True if the hedge won, False if the primary still won. If both
+        fail the primary's exception is raised.
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.max_rate, HEDGE_BURST)
+            delay = self._delay
+
+        if delay is None:
+            # Warming up: plain call on the caller's thread
+            started = self._clock()
+            result = primary()
+            self.record(self._clock() - started)
+            return result, None
+
+        first = self._start(primary)
+        done, _ = wait([first[0]], timeout=delay)
+        if done or not self._take_token(admit):
+            return first[0].result(), None
+
+        second = self._start(hedge)
+        pending = [first, second]
+        error = None
+        while pending:
+            done, _ = wait([future for future, _ in pending], return_when=FIRST_COMPLETED)
+            for call in [c for c in pending if c[0] in done]:
+                pending.remove(call)
+                if call[0].exception() is None:
+                    for future, scope in pending:
+                        future.cancel()
+                        scope.cancel()
+                    won = call is second
+                    if won:
+                        with self._lock:
+                            self.wins += 1
+                    return call[0].result(), won
+                if call is first:
+                    error = call[0].exception()
+        raise error
+
+    def _start(self, fn: Callable[[], T]) -> Tuple[Future, CancelScope]:
+        scope = CancelScope()
+
+        def run():
+            _local.scope = scope
+            try:
+                started = self._clock()
+                result = fn()
+                self.record(self._clock() - started)
+                return result
+            finally:
+                _local.scope = None
+
+        return self._pool.submit(run), scope
+
+    def close(self) -> None:
+        """Stop the pool (running losers finish in the background)."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
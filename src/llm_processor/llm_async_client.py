@@ -0,0 +1,170 @@
+"""
+Async LLM client on httpx, with HTTP/2 multiplexing and a sync facade.
+
+LLMRequestProcessor runs on NiFi's threads and makes blocking calls.
+AsyncLLMClient keeps one shared httpx.AsyncClient on a private event loop
+thread; callers on any thread hand it a coroutine and wait for the
+result, so NiFi's threading model stays as it is. With HTTP/2 all
+concurrent requests to one endpoint are streams multiplexed over a single
+connection instead of one socket per in-flight request.
+
+call_llm_httpx() and call_llm_batch_httpx() have the signatures of
+llm_client.call_llm() / call_llm_batch() with an AsyncLLMClient as
+`session`, so the processor can switch clients without other changes.
+Request bodies and response parsing are shared with llm_client.
+
+HTTP/2 needs the 'h2' package (httpx[http2]); without it the client
+falls back to pooled HTTP/1.1. http:// endpoints are spoken to with
+HTTP/2 prior knowledge (h2c), so the server must support it.
+"""
+
+import asyncio
+import threading
+import time
+from importlib.util import find_spec
+from typing import List, Union
+
+import httpx
+
+from hedging import wait_cancellable
+from json_codec import loads
+from phase_metrics import NULL_TIMER
+from llm_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_NEW_TOKENS,
+    DEFAULT_READ_TIMEOUT,
+    JSON_HEADERS,
+    build_url,
+    parse_batch_response,
+    parse_response_timed,
+    request_template,
+)
+
+# httpx speaks HTTP/2 only with the optional 'h2' package installed
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+
+class AsyncLLMClient:
+    """
+    Shared httpx.AsyncClient running on its own event loop thread.
+
+    - max_connections: connections kept per client (with HTTP/2 one per
+      endpoint is normally enough, requests become streams on it);
+    - keep_alive: when False connections are not kept between requests;
+    - http2: use HTTP/2 when the 'h2' package is installed (see `http2`
+      attribute for what is actually used).
+
+    Owned by the caller; close() stops the loop and closes connections.
+    """
+
+    def __init__(self, max_connections: int = 10, keep_alive: bool = True,
+                 http2: bool = True):
+        self.http2 = http2 and HTTP2_AVAILABLE
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections if keep_alive else 0,
+        )
+        # http1=False: HTTP/2 with prior knowledge also for plain http://
+        self.client = httpx.AsyncClient(
+            http1=not self.http2, http2=self.http2, limits=limits, headers=JSON_HEADERS
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="llm-httpx-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coro):
+        """
+        Run a coroutine on the client's loop and wait for its result.
+        Inside a hedged call the request is aborted when the call loses.
+        """
+        return wait_cancellable(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    async def post(self, url: str, body: bytes, connect_timeout: float,
+                   read_timeout: float) -> bytes:
+        """POST a prebuilt JSON body; response bytes, HTTPStatusError on 4xx/5xx."""
+        resp = await self.client.post(
+            url, content=body, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        resp.raise_for_status()
+        return resp.content
+
+    def close(self) -> None:
+        """Close pooled connections and stop the event loop thread."""
+        if self._loop.is_closed():
+            return
+        self.run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+async def acall_llm(client: AsyncLLMClient,
+                    host: str,
+                    port: str,
+                    system_prompt: str,
+                    temperature: float,
+                    user_text: str,
+                    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                    read_timeout: float = DEFAULT_READ_TIMEOUT,
+                    max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                    timer=NULL_TIMER) -> str:
+    """Async llm_client.call_llm(): same request body, parsing and timing."""
+    body = request_template(system_prompt, temperature,
+                            max_new_tokens=max_new_tokens).body(user_text)
+    started = time.perf_counter()
+    raw = await client.post(build_url(host, port), body, connect_timeout, read_timeout)
+    return parse_response_timed(raw, body, started, timer)
+
+
+async def acall_llm_batch(client: AsyncLLMClient,
+                          host: str,
+                          port: str,
+                          system_prompt: str,
+                          temperature: float,
+                          user_texts: List[str],
+                          connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                          read_timeout: float = DEFAULT_READ_TIMEOUT,
+                          max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS
+                          ) -> List[Union[str, Exception]]:
+    """Async llm_client.call_llm_batch()."""
+    user_texts = list(user_texts)
+    body = request_template(system_prompt, temperature,
+                            max_new_tokens=max_new_tokens).body(user_texts)
+    raw = await client.post(build_url(host, port), body, connect_timeout, read_timeout)
+    return parse_batch_response(loads(raw), len(user_texts))
+
+
+def call_llm_httpx(host: str,
+                   port: str,
+                   system_prompt: str,
+                   temperature: float,
+                   user_text: str,
+                   session: AsyncLLMClient,
+                   connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                   read_timeout: float = DEFAULT_READ_TIMEOUT,
+                   max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                   timer=NULL_TIMER) -> str:
+    """Blocking acall_llm() on the session's event loop."""
+    return session.run(acall_llm(
+        session, host, port, system_prompt, temperature, user_text,
+        connect_timeout, read_timeout, max_new_tokens, timer,
+    ))
+
+
+def call_llm_batch_httpx(host: str,
+                         port: str,
+                         system_prompt: str,
+                         temperature: float,
+                         user_texts: List[str],
+                         session: AsyncLLMClient,
+                         connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                         read_timeout: float = DEFAULT_READ_TIMEOUT,
+                         max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS
+                         ) -> List[Union[str, Exception]]:
+    """Blocking acall_llm_batch() on the session's event loop."""
+    return session.run(acall_llm_batch(
+        session, host, port, system_prompt, temperature, user_texts,
+        connect_timeout, read_timeout, max_new_tokens,
+    ))
@@ -0,0 +1,174 @@
+"""
+Response cache for LLMRequestProcessor.
+
+Identical requests (same endpoint, system prompt, temperature,
+max_new_tokens and user text) are answered from the cache instead of
+running inference again.
+
+- In memory: bounded LRU with a TTL per entry.
+- Optionally on disk: a local SQLite file, so cached answers survive
+  NiFi restarts and venv rebuilds. Memory misses fall through to disk.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+def cache_key(endpoint: str,
+              system_prompt: str,
+              temperature: float,
+              max_new_tokens: int,
+              user_text: str) -> str:
+    """SHA-256 over all request fields that influence the answer."""
+    raw = json.dumps(
+        [endpoint, system_prompt, float(temperature), int(max_new_tokens), user_text],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache of LLM responses.
+
+    - max_entries: entries kept in memory (and on disk, if enabled);
+      the least recently used entry is evicted first;
+    - ttl: seconds an entry stays valid after it was stored;
+    - path: SQLite file for persistence (None = memory only).
+
+    `hits` and `misses` count get() outcomes since creation.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1000,
+                 ttl: float = 3600.0,
+                 path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Wall clock, not monotonic: expiry times are persisted on disk
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, expires_at); order = LRU order (oldest first)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._db: Optional["sqlite3.Connection"] = None
+        self._db_rows = 0
+
+        if path:
+            self._open_db(path)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached value for key, or None if missing or expired."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+
+            if entry is None and self._db is not None:
+                entry = self._db_get(key, now)
+                if entry is not None:
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store value under key for `ttl` seconds."""
+        now = self._clock()
+        entry = (value, now + self.ttl)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db_put(key, entry, now)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def close(self) -> None:
+        with self._lock:
+            db, self._db = self._db, None
+            if db is not None:
+                db.close()
+
+    # ---------- memory ----------
+
+    def _remember(self, key: str, entry: Tuple[str, float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ---------- disk ----------
+
+    def _open_db(self, path: str) -> None:
+        # Imported here: only the persistent cache needs it
+        import sqlite3
+
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " used_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache (used_at)")
+        db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (self._clock(),))
+        self._db_rows = db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        self._db = db
+
+    def _db_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        row = self._db.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._db_rows -= 1
+            return None
+        self._db.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0], row[1]
+
+    def _db_put(self, key: str, entry: Tuple[str, float], now: float) -> None:
+        existed = self._db.execute(
+            "SELECT 1 FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone() is not None
+        self._db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, used_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, entry[0], entry[1], now),
+        )
+        if not existed:
+            self._db_rows += 1
+
+        overflow = self._db_rows - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY used_at LIMIT ?)",
+                (overflow,),
+            )
+            self._db_rows -= overflow
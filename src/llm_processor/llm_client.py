@@ -2,49 +2,136 @@
 Simple LLM HTTP client used by LLMRequestProcessor.
 """
 
-import json
-import requests
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Iterator, List, NamedTuple, Optional, Union
 
+# orjson when installed in the processor venv, stdlib json otherwise
+from json_codec import dumps, loads
+from phase_metrics import NULL_TIMER
 
-def call_llm(host: str, 
-             port: str, 
-             system_prompt: str, 
-             temperature: float, 
-             user_request: str) -> str:
+# Default timeouts (seconds) used when the caller does not pass its own.
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Generation length requested from the server.
+DEFAULT_MAX_NEW_TOKENS = 100
+
+# Request bodies are sent pre-encoded (UTF-8 JSON) by json_codec.dumps()
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+if TYPE_CHECKING:
+    import requests
+
+
+def _requests():
     """
-    Call an external LLM endpoint that accepts POST /generate with JSON.
+    The requests module, imported on first use: with urllib3, certifi and
+    charset_normalizer it is the slowest import of the processor, and
+    NiFi imports processor modules long before any request is made.
+    """
+    import requests
 
-    Current expected format on the server side (minimal):
-        {
-            "prompt": "<text>",
-            "max_new_tokens": 100
-        }
+    return requests
 
-    This client:
-      - prepends system_prompt to user_text inside the "prompt" field;
-      - also sends "system_prompt" and "temperature" as separate fields
-        so the server can start using them later.
+
+def create_session(pool_connections: int = 10,
+                   pool_maxsize: int = 10,
+                   keep_alive: bool = True) -> "requests.Session":
+    """
+    Build a reusable, connection-pooled HTTP session.
+
+    - pool_connections: how many per-host connection pools are cached;
+    - pool_maxsize: max connections kept (and used) per host; extra
+      callers wait for a free connection instead of opening new sockets;
+    - keep_alive: when False every request asks the server to close the
+      connection ("Connection: close"), i.e. no reuse between FlowFiles.
+
+    The caller owns the session and must close() it when done.
     """
+    requests = _requests()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
 
-    url = f"http://{host}:{port}/generate"
+class LLMBatchItemError(Exception):
+    """One prompt of a batched request failed (the others may be fine)."""
 
-    payload = {
+
+@lru_cache(maxsize=64)
+def build_url(host: str, port: str) -> str:
+    """URL of the /generate endpoint."""
+    return f"http://{host}:{port}/generate"
+
+
+def build_payload(prompt: Union[str, List[str]],
+                  system_prompt: str,
+                  temperature: float,
+                  max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> dict:
+    """
+    JSON body for POST /generate.
+
+    `prompt` is a single string, or a list of strings for a batched call.
+    """
+    return {
         # What your server already expects:
-        "prompt": user_request,
-        "max_new_tokens": 100,
+        "prompt": prompt,
+        "max_new_tokens": int(max_new_tokens),
         # Fields for future use on the server side:
         "system_prompt": system_prompt,
         "temperature": float(temperature),
     }
 
-    # Send HTTP POST to the LLM server
-    resp = requests.post(url, 
-                         json=payload, 
-                         timeout=30.0)
-    resp.raise_for_status()
 
-    data = resp.json()
+class RequestTemplate:
+    """
+    Prebuilt POST /generate body for one (system prompt, temperature,
+    max_new_tokens).
+
+    Every field but the prompt is serialized once; body(prompt) only
+    encodes the prompt and is byte-identical to
+    dumps(build_payload(prompt, system_prompt, temperature, max_new_tokens) | extra).
+    """
+
+    __slots__ = ("_tail",)
+
+    def __init__(self, system_prompt: str, temperature: float,
+                 max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS, **extra: Any):
+        fields = build_payload("", system_prompt, temperature, max_new_tokens)
+        del fields["prompt"]
+        fields.update(extra)
+        # '{"max_new_tokens":...}' -> ',"max_new_tokens":...}'
+        self._tail = b"," + dumps(fields)[1:]
+
+    def body(self, prompt: Union[str, List[str]]) -> bytes:
+        return b'{"prompt":' + dumps(prompt) + self._tail
+
 
+@lru_cache(maxsize=64)
+def request_template(system_prompt: str, temperature: float,
+                     stream: bool = False,
+                     max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> RequestTemplate:
+    """Shared RequestTemplate per (system prompt, temperature, streaming, max_new_tokens)."""
+    if stream:
+        return RequestTemplate(system_prompt, temperature, max_new_tokens, stream=True)
+    return RequestTemplate(system_prompt, temperature, max_new_tokens)
+
+
+def parse_response(data: Any) -> str:
+    """
+    Extract generated text from a single (non-batched) response body.
+    """
     # Try several common response formats
     if isinstance(data, dict):
         if "response" in data:
@@ -56,5 +143,309 @@ def call_llm(host: str,
             if isinstance(first, dict) and "text" in first:
                 return str(first["text"])
 
-    # Fallback: return whole JSON as string
-    return json.dumps(data, ensure_ascii=False)
+    # Fallback: return whole JSON as string (non-ASCII kept as is)
+    return dumps(data).decode("utf-8")
+
+
+def parse_batch_response(data: Any, expected: int) -> List[Union[str, Exception]]:
+    """
+    Split a batched response into one result per prompt.
+
+    Expected server format (results in prompt order):
+        {"results": [{"text": "..."}, {"error": "..."}, "plain text", ...]}
+
+    Each list element is either the generated text or an LLMBatchItemError
+    for that prompt. If the response cannot be matched to the prompts at
+    all, ValueError is raised (the whole batch failed).
+    """
+    results = data.get("results") if isinstance(data, dict) else None
+    if not isinstance(results, list):
+        raise ValueError("Batched LLM response has no 'results' list")
+    if len(results) != expected:
+        raise ValueError(
+            f"Batched LLM response has {len(results)} results for {expected} prompts"
+        )
+
+    parsed: List[Union[str, Exception]] = []
+    for item in results:
+        if isinstance(item, dict) and "text" in item:
+            parsed.append(str(item["text"]))
+        elif isinstance(item, dict) and "error" in item:
+            parsed.append(LLMBatchItemError(str(item["error"])))
+        elif isinstance(item, str):
+            parsed.append(item)
+        else:
+            parsed.append(LLMBatchItemError(f"Unexpected batch result item: {item!r}"))
+    return parsed
+
+
+def call_llm(host: str,
+             port: str,
+             system_prompt: str,
+             temperature: float,
+             user_text: str,
+             session: Optional["requests.Session"] = None,
+             connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+             read_timeout: float = DEFAULT_READ_TIMEOUT,
+             max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+             timer=NULL_TIMER) -> str:
+    """
+    Call an external LLM endpoint that accepts POST /generate with JSON.
+
+    Current expected format on the server side (minimal):
+        {
+            "prompt": "<text>",
+            "max_new_tokens": <max_new_tokens>
+        }
+
+    This client:
+      - prepends system_prompt to user_text inside the "prompt" field;
+      - also sends "system_prompt" and "temperature" as separate fields
+        so the server can start using them later;
+      - reuses pooled keep-alive connections when a session from
+        create_session() is given, otherwise opens a one-off connection;
+      - adds the "http" (request sent to response body read, i.e. network
+        plus inference) and "parse" seconds and the "request"/"response"
+        bytes to `timer` (a phase_metrics.PhaseTimer).
+    """
+
+    url = build_url(host, port)
+    body = request_template(system_prompt, temperature,
+                            max_new_tokens=max_new_tokens).body(user_text)
+
+    # Send HTTP POST to the LLM server (pooled session if we have one)
+    http = session if session is not None else _requests()
+    started = time.perf_counter()
+    resp = http.post(url,
+                     data=body,
+                     headers=JSON_HEADERS,
+                     timeout=(connect_timeout, read_timeout))
+    resp.raise_for_status()
+    return parse_response_timed(resp.content, body, started, timer)
+
+
+def parse_response_timed(raw: bytes, body: bytes, started: float, timer) -> str:
+    """parse_response() of a response body, charging http/parse time to the timer."""
+    received = time.perf_counter()
+    text = parse_response(loads(raw))
+    timer.add("http", received - started)
+    timer.add("parse", time.perf_counter() - received)
+    timer.size("request", len(body))
+    timer.size("response", len(raw))
+    return text
+
+
+def call_llm_batch(host: str,
+                   port: str,
+                   system_prompt: str,
+                   temperature: float,
+                   user_texts: List[str],
+                   session: Optional["requests.Session"] = None,
+                   connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                   read_timeout: float = DEFAULT_READ_TIMEOUT,
+                   max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> List[Union[str, Exception]]:
+    """
+    Send several prompts in one POST /generate call ("prompt" is a list).
+
+    Returns one entry per prompt, in order: the generated text, or an
+    LLMBatchItemError if the server reported an error for that prompt.
+    HTTP/transport errors and malformed responses raise for the whole batch.
+    """
+    url = build_url(host, port)
+    user_texts = list(user_texts)
+    body = request_template(system_prompt, temperature,
+                            max_new_tokens=max_new_tokens).body(user_texts)
+
+    http = session if session is not None else _requests()
+    resp = http.post(url,
+                     data=body,
+                     headers=JSON_HEADERS,
+                     timeout=(connect_timeout, read_timeout))
+    resp.raise_for_status()
+
+    return parse_batch_response(loads(resp.content), len(user_texts))
+
+
+
+class StreamResult(NamedTuple):
+    """Outcome of call_llm_stream()."""
+
+    # Generated text, UTF-8 encoded (single growing buffer, no extra copies)
+    content: bytearray
+    # Number of streamed tokens/chunks written to content
+    tokens: int
+    # Seconds from sending the request to the first token (None = no tokens)
+    ttft: Optional[float]
+    # Why the stream was cut short: "max_bytes", "max_tokens", "deadline" or None
+    truncated: Optional[str]
+
+
+def _token_text(event: Any) -> str:
+    """
+    Extract the token text from one streamed JSON event.
+
+    Understands {"token": "..."}, {"token": {"text": "..."}}, {"text": ...},
+    {"response": ...}, {"generated_text": ...} and OpenAI-style
+    {"choices": [{"delta": {"content": ...}}]} / {"choices": [{"text": ...}]}.
+    """
+    if isinstance(event, str):
+        return event
+    if not isinstance(event, dict):
+        return ""
+
+    token = event.get("token")
+    if isinstance(token, dict):
+        token = token.get("text")
+    if isinstance(token, str):
+        return token
+
+    for field in ("text", "response", "generated_text"):
+        value = event.get(field)
+        if isinstance(value, str):
+            return value
+
+    choices = event.get("choices")
+    if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+        delta = choices[0].get("delta")
+        if isinstance(delta, dict) and isinstance(delta.get("content"), str):
+            return delta["content"]
+        if isinstance(choices[0].get("text"), str):
+            return choices[0]["text"]
+
+    return ""
+
+
+def _json_or_text(raw: bytes) -> str:
+    try:
+        return _token_text(loads(raw))
+    except ValueError:
+        return raw.decode("utf-8", errors="replace")
+
+
+def iter_stream_tokens(resp: "requests.Response") -> Iterator[bytes]:
+    """
+    Yield UTF-8 encoded tokens from a streaming /generate response.
+
+    - text/event-stream: server-sent events, "data: <json>" lines,
+      terminated by "data: [DONE]" or end of body;
+    - application/x-ndjson / application/json: one JSON event per line;
+    - anything else: raw chunks as they arrive.
+    """
+    content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+    if content_type == "text/event-stream":
+        for line in resp.iter_lines():
+            if not line.startswith(b"data:"):
+                continue  # comments, "event:", "id:", keep-alive blank lines
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                return
+            token = _json_or_text(data)
+            if token:
+                yield token.encode("utf-8")
+
+    elif content_type in ("application/x-ndjson", "application/jsonl", "application/json"):
+        for line in resp.iter_lines():
+            if not line.strip():
+                continue
+            token = _json_or_text(line)
+            if token:
+                yield token.encode("utf-8")
+
+    else:
+        for chunk in resp.iter_content(chunk_size=None):
+            if chunk:
+                yield chunk
+
+
+# Seconds a socket timeout may fire before the deadline it was capped at
+_DEADLINE_SLACK = 0.01
+
+
+def _set_read_timeout(resp: Any, seconds: float) -> None:
+    """Change the socket timeout of a streaming response's next reads."""
+    connection = getattr(getattr(resp, "raw", None), "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        sock.settimeout(seconds)
+
+
+def call_llm_stream(host: str,
+                    port: str,
+                    system_prompt: str,
+                    temperature: float,
+                    user_text: str,
+                    session: Optional["requests.Session"] = None,
+                    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                    read_timeout: float = DEFAULT_READ_TIMEOUT,
+                    max_bytes: int = 0,
+                    max_tokens: int = 0,
+                    deadline: float = 0.0,
+                    deadline_at: Optional[float] = None,
+                    max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> StreamResult:
+    """
+    Call POST /generate with "stream": true and consume the token stream.
+
+    Tokens are appended to one bytearray as they arrive. Generation is cut
+    off (and the connection dropped) when one of the budgets is hit:
+      - max_bytes: output size in bytes, checked per token, so the output
+        always ends on a token boundary (0 = unlimited);
+      - max_tokens: number of streamed tokens (0 = unlimited);
+      - deadline: total seconds for the whole call (0 = none), or
+        deadline_at: the same as an absolute time.monotonic() value, so
+        that retries of one FlowFile share it. Every read waits at most
+        the time left; a read cut short by the deadline keeps the partial
+        output, an attempt that starts past it raises requests.Timeout.
+    """
+    url = build_url(host, port)
+    body = request_template(system_prompt, temperature, stream=True,
+                            max_new_tokens=max_new_tokens).body(user_text)
+
+    started = time.monotonic()
+    if deadline_at is None and deadline:
+        deadline_at = started + deadline
+    if deadline_at is not None:
+        left = deadline_at - started
+        if left <= 0:
+            raise _requests().Timeout("Total Deadline exceeded before the call")
+        connect_timeout = min(connect_timeout, left)
+        read_timeout = min(read_timeout, left)
+
+    content = bytearray()
+    tokens = 0
+    ttft = None
+    truncated = None
+
+    http = session if session is not None else _requests()
+    with http.post(url,
+                   data=body,
+                   headers=JSON_HEADERS,
+                   timeout=(connect_timeout, read_timeout),
+                   stream=True) as resp:
+        resp.raise_for_status()
+
+        try:
+            for token in iter_stream_tokens(resp):
+                if ttft is None:
+                    ttft = time.monotonic() - started
+                if max_tokens and tokens >= max_tokens:
+                    truncated = "max_tokens"
+                    break
+                if max_bytes and len(content) + len(token) > max_bytes:
+                    truncated = "max_bytes"
+                    break
+                content += token
+                tokens += 1
+                if deadline_at is not None:
+                    left = deadline_at - time.monotonic()
+                    if left <= 0:
+                        truncated = "deadline"
+                        break
+                    _set_read_timeout(resp, min(read_timeout, left))
+        except OSError:
+            # requests / urllib3 read timeouts are OSErrors too
+            if deadline_at is None or time.monotonic() < deadline_at - _DEADLINE_SLACK:
+                raise
+            truncated = "deadline"
+
+    return StreamResult(content=content, tokens=tokens, ttft=ttft, truncated=truncated)
@@ -0,0 +1,116 @@
+"""
+Cheap token-count estimation for prompts.
+
+Real tokenizers are model specific and slow to load; for budgeting we
+only need a fast, stable approximation. BPE tokenizers average roughly
+4 bytes of UTF-8 per token for English and about the same for Russian
+(2 bytes per Cyrillic letter, ~2 letters per token), so the UTF-8 length
+divided by 4 is a good first-order estimate for both.
+
+The same estimate drives the input budget: truncate_tokens() cuts a
+prompt down to a token budget and split_tokens() splits it into
+overlapping chunks for map-reduce style processing.
+"""
+
+from typing import List
+
+# Average UTF-8 bytes per token used by estimate_tokens()
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in text (0 for empty text)."""
+    if not text:
+        return 0
+    # ASCII length is the UTF-8 length: skip encoding a copy (isascii() is O(1))
+    size = len(text) if text.isascii() else len(text.encode("utf-8"))
+    return -(-size // BYTES_PER_TOKEN)
+
+
+# Truncation strategies of truncate_tokens(): which part of the text is kept
+TRUNCATE_HEAD = "head"
+TRUNCATE_TAIL = "tail"
+TRUNCATE_HEAD_TAIL = "head+tail"
+TRUNCATION_STRATEGIES = (TRUNCATE_HEAD, TRUNCATE_TAIL, TRUNCATE_HEAD_TAIL)
+
+# Put between the kept head and tail so the model sees text was cut out
+TRUNCATION_MARKER = "\n...\n"
+
+
+def _char_start(data: bytes, pos: int, forward: bool) -> int:
+    """pos moved (forward or backward) onto the first byte of a UTF-8 character."""
+    step = 1 if forward else -1
+    while 0 < pos < len(data) and data[pos] & 0xC0 == 0x80:
+        pos += step
+    return pos
+
+
+def truncate_tokens(text: str, max_tokens: int, strategy: str = TRUNCATE_HEAD) -> str:
+    """
+    text cut down to at most max_tokens estimated tokens.
+
+    'head' keeps the beginning, 'tail' the end, 'head+tail' half of the
+    budget from each end with TRUNCATION_MARKER in between. Cuts are made
+    on the UTF-8 byte budget (max_tokens * BYTES_PER_TOKEN) at character
+    boundaries. Text within the budget is returned as is.
+    """
+    if strategy not in TRUNCATION_STRATEGIES:
+        raise ValueError(f"Unknown truncation strategy: {strategy!r}")
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    data = text.encode("utf-8")
+    size = max_tokens * BYTES_PER_TOKEN
+    if strategy == TRUNCATE_HEAD_TAIL and size > 2 * len(TRUNCATION_MARKER):
+        size -= len(TRUNCATION_MARKER)
+        head = _char_start(data, (size + 1) // 2, forward=False)
+        tail = _char_start(data, len(data) - size // 2, forward=True)
+        return (str(data[:head], "utf-8") + TRUNCATION_MARKER
+                + str(data[tail:], "utf-8"))
+    if strategy == TRUNCATE_TAIL:
+        return str(data[_char_start(data, len(data) - size, forward=True):], "utf-8")
+    return str(data[:_char_start(data, size, forward=False)], "utf-8")
+
+
+def split_tokens(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    text split into chunks of at most max_tokens estimated tokens, each
+    repeating about overlap_tokens of the end of the previous one.
+
+    A chunk ends after the last space/newline in the final quarter of its
+    byte budget when there is one (so words are not cut in half), else at
+    a character boundary; the overlap starts after its first space/newline.
+    Overlap is capped at half a chunk; text within the budget is one chunk.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    data = text.encode("utf-8")
+    size = max_tokens * BYTES_PER_TOKEN
+    overlap = min(max(overlap_tokens, 0) * BYTES_PER_TOKEN, size // 2)
+
+    chunks = []
+    start = 0
+    while True:
+        end = start + size
+        if end >= len(data):
+            chunks.append(str(data[start:], "utf-8"))
+            return chunks
+
+        lo = end - size // 4
+        space = max(data.rfind(b" ", lo, end), data.rfind(b"\n", lo, end))
+        end = space + 1 if space >= 0 else _char_start(data, end, forward=False)
+        chunks.append(str(data[start:end], "utf-8"))
+
+        if not overlap:
+            start = end
+            continue
+        # Start the overlap on a word boundary too, when there is one in it
+        start = end - overlap
+        spaces = [p for p in (data.find(b" ", start, end - 1), data.find(b"\n", start, end - 1))
+                  if p >= 0]
+        start = min(spaces) + 1 if spaces else _char_start(data, start, forward=True)
@@ -0,0 +1 @@
+../nifi_common/phase_metrics.py
\ No newline at end of file
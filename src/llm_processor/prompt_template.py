@@ -0,0 +1,67 @@
+"""
+Prompt texts with ${attribute} placeholders, parsed once per schedule.
+
+A value such as "Answer in ${lang}:\n${content}" is split into literal
+text and placeholder names when the processor is scheduled; rendering it
+for a FlowFile only fills in the values and joins the parts. Values
+without placeholders render to themselves. A missing attribute renders
+as "". Only plain attribute names are supported: an Expression Language
+expression such as ${filename:toUpper()} raises ValueError when the
+template is compiled instead of rendering as "".
+
+In a prompt template (content=True) ${content} stands for the FlowFile
+text instead of an attribute.
+"""
+
+import re
+from typing import Mapping, Tuple
+
+# ${name}; whitespace around the name is ignored
+_PLACEHOLDER = re.compile(r"\$\{\s*([^${}\s:()'\"]+)\s*\}")
+# A closed ${...} that is not a plain placeholder (functions, literals, nesting)
+_EXPRESSION = re.compile(r"\$\{(?!\s*[^${}\s:()'\"]+\s*\})[^}]*\}")
+
+# Placeholder of the FlowFile text in prompt templates
+CONTENT = "content"
+
+
+class PromptTemplate:
+    """A compiled prompt text (see module docstring)."""
+
+    __slots__ = ("text", "attributes", "uses_content", "_parts")
+
+    def __init__(self, text: str, content: bool = False):
+        self.text = text or ""
+        unsupported = _EXPRESSION.search(self.text)
+        if unsupported:
+            raise ValueError(
+                f"Unsupported expression {unsupported.group(0)!r}: only "
+                f"${{attribute}} placeholders are supported, not Expression Language"
+            )
+        # re.split() with one group: literals at even, names at odd indexes
+        self._parts: Tuple[str, ...] = tuple(_PLACEHOLDER.split(self.text))
+        names = dict.fromkeys(self._parts[1::2])
+        self.uses_content = content and CONTENT in names
+        if self.uses_content:
+            del names[CONTENT]
+        # Referenced attribute names, without duplicates, in order
+        self.attributes: Tuple[str, ...] = tuple(names)
+
+    @property
+    def is_static(self) -> bool:
+        """True if the text depends neither on attributes nor on content."""
+        return not self.attributes and not self.uses_content
+
+    def render(self, values: Mapping[str, str], content: str = "") -> str:
+        """
+        The text with placeholders filled in from values (attribute name
+        -> value; every name in self.attributes must be present).
+        """
+        if self.is_static:
+            return self.text
+        parts = list(self._parts)
+        if self.uses_content:
+            values = dict(values)
+            values[CONTENT] = content
+        parts[1::2] = [values[name] for name in parts[1::2]]
+        return "".join(parts)
@@ -0,0 +1,205 @@
+"""
+Client-side rate limiting for LLM requests.
+
+Two token buckets keep one processor (or all processors on a host) at the
+inference server's sweet spot instead of overloading it:
+  - requests per second;
+  - estimated LLM tokens per second (prompt tokens + max_new_tokens).
+
+TokenBucket lives in process memory. SharedTokenBucket keeps its state
+in a small mmap'ed file guarded by flock(), so every NiFi Python process
+on the host that points at the same file shares one budget.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: shared buckets are unavailable
+    fcntl = None
+
+# Shared bucket slot layout: tokens (double), last refill time (double)
+_SLOT = struct.Struct("<dd")
+_SLOTS = 2
+
+
+class RateLimitTimeout(RuntimeError):
+    """No budget became available within the caller's timeout."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `capacity`
+    tokens saved up for bursts. Starts full.
+    """
+
+    def __init__(self, rate: float, capacity: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be > 0")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._state = (self.capacity, clock())
+
+    def try_acquire(self, amount: float) -> float:
+        """
+        Take `amount` tokens if available and return 0.0; otherwise take
+        nothing and return the seconds until they will be available.
+
+        Amounts larger than the capacity are clamped to it, so one huge
+        request waits for a full bucket instead of forever.
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            return self._take(self._load(), amount)
+
+    def release(self, amount: float) -> None:
+        """Give back `amount` tokens taken for a call that was not made."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refund(self._load(), amount)
+
+    def acquire(self, amount: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `amount` tokens are taken; False on timeout."""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+    def _take(self, state, amount: float) -> float:
+        """Refill, then take amount if possible; returns seconds to wait."""
+        tokens, last = state
+        now = self._clock()
+        # max(): a wall clock stepping back must not drain the bucket
+        tokens = min(self.capacity, tokens + max(0.0, now - last) * self.rate)
+        # Epsilon: float refill math must not leave us waiting for 1e-15 tokens
+        if tokens + 1e-9 >= amount:
+            self._store((max(0.0, tokens - amount), now))
+            return 0.0
+        self._store((tokens, now))
+        return (amount - tokens) / self.rate
+
+    def _refund(self, state, amount: float) -> None:
+        tokens, last = state
+        self._store((min(self.capacity, tokens + amount), last))
+
+    def _load(self):
+        return self._state
+
+    def _store(self, state) -> None:
+        self._state = state
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state is shared between processes through a file.
+
+    - path: file holding the bucket state (created if missing);
+    - slot: index of this bucket inside the file (0 = requests,
+      1 = tokens), so both buckets can share one file.
+
+    Uses the wall clock, which unlike time.monotonic() is comparable
+    across processes.
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float, slot: int = 0,
+                 clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        if fcntl is None:
+            raise RuntimeError("Shared rate limiting needs a POSIX system (fcntl)")
+        if not 0 <= slot < _SLOTS:
+            raise ValueError(f"slot must be in [0, {_SLOTS})")
+
+        self._offset = slot * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = _SLOT.size * _SLOTS
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        super().__init__(rate, capacity, clock=clock, sleep=sleep)
+
+    def try_acquire(self, amount: float) -> float:
+        amount = min(float(amount), self.capacity)
+        # Thread lock first (flock does not exclude threads of one process),
+        # then the inter-process file lock.
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                return self._take(self._load(), amount)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def release(self, amount: float) -> None:
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._refund(self._load(), amount)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def _load(self):
+        tokens, last = _SLOT.unpack_from(self._mm, self._offset)
+        if last == 0.0:
+            # Fresh file: start with a full bucket
+            return self.capacity, self._clock()
+        return tokens, last
+
+    def _store(self, state) -> None:
+        _SLOT.pack_into(self._mm, self._offset, *state)
+
+
+class RateLimiter:
+    """
+    Requests/sec and tokens/sec limits applied together.
+
+    Either bucket may be None (= unlimited). acquire() waits for the
+    request slot first and then for the token budget; when the token
+    budget times out the request slot is given back.
+    """
+
+    def __init__(self, requests: Optional[TokenBucket] = None,
+                 tokens: Optional[TokenBucket] = None):
+        self.requests = requests
+        self.tokens = tokens
+
+    def acquire(self, estimated_tokens: int, timeout: Optional[float] = None) -> None:
+        """Block until the call may proceed; RateLimitTimeout on timeout."""
+        started = time.monotonic()
+        if self.requests is not None and not self.requests.acquire(1, timeout):
+            raise RateLimitTimeout("Rate limit: no request slot within timeout")
+
+        if self.tokens is not None and estimated_tokens > 0:
+            remaining = None
+            if timeout is not None:
+                remaining = max(0.0, timeout - (time.monotonic() - started))
+            if not self.tokens.acquire(estimated_tokens, remaining):
+                if self.requests is not None:
+                    self.requests.release(1)
+                raise RateLimitTimeout("Rate limit: no token budget within timeout")
+
+    def close(self) -> None:
+        for bucket in (self.requests, self.tokens):
+            if isinstance(bucket, SharedTokenBucket):
+                bucket.close()
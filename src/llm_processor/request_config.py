@@ -0,0 +1,107 @@
+"""
+Per-request settings of LLMRequestProcessor, resolved once per schedule.
+
+Over Py4J every context.getProperty() is a round-trip to the JVM.
+RequestConfig.from_context() reads System Prompt, Temperature, Prompt
+Template and Max New Tokens in onScheduled() and compiles the ${...}
+placeholders; per FlowFile, resolve() only reads the referenced
+attributes (nothing at all for static values).
+
+Rendered system prompts are cached per tuple of attribute values, so
+FlowFiles of the same kind (document type, language, ...) share one
+system prompt string, and with it one prebuilt request body template.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from llm_client import DEFAULT_MAX_NEW_TOKENS, RequestTemplate, request_template
+from prompt_template import PromptTemplate
+
+DEFAULT_TEMPERATURE = 0.7
+
+# Distinct rendered system prompts kept per schedule
+SYSTEM_PROMPT_CACHE_SIZE = 256
+
+
+def _parse_temperature(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return DEFAULT_TEMPERATURE
+
+
+def _parse_max_new_tokens(value: str) -> int:
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_NEW_TOKENS
+
+
+class RequestConfig(NamedTuple):
+    """Immutable System Prompt / Temperature / Prompt Template / Max New Tokens of one schedule."""
+
+    system_prompt: PromptTemplate
+    temperature: PromptTemplate
+    # User prompt template (None = the FlowFile text as is)
+    prompt: Optional[PromptTemplate]
+    # Parsed temperature when it is static
+    static_temperature: float
+    # Generation budget sent with every request
+    max_new_tokens: int
+    # Request body template when system prompt and temperature are static
+    template: Optional[RequestTemplate]
+    # Attributes referenced by any of the values, read once per FlowFile
+    attributes: Tuple[str, ...]
+    # System prompt for a tuple of its attribute values (LRU cached)
+    render_system_prompt: Callable[[Tuple[str, ...]], str]
+
+    @classmethod
+    def from_context(cls, context: Any) -> "RequestConfig":
+        system_prompt = PromptTemplate(context.getProperty("System Prompt") or "")
+        temperature = PromptTemplate(context.getProperty("Temperature") or "")
+        static_temperature = _parse_temperature(temperature.text or DEFAULT_TEMPERATURE)
+        prompt_text = context.getProperty("Prompt Template") or ""
+        prompt = PromptTemplate(prompt_text, content=True) if prompt_text else None
+        max_new_tokens = _parse_max_new_tokens(context.getProperty("Max New Tokens"))
+
+        template = None
+        if system_prompt.is_static and temperature.is_static:
+            # Built (and cached in llm_client) now instead of on the first FlowFile
+            template = request_template(system_prompt.text, static_temperature,
+                                        max_new_tokens=max_new_tokens)
+
+        attributes = tuple(dict.fromkeys(
+            system_prompt.attributes + temperature.attributes
+            + (prompt.attributes if prompt is not None else ())
+        ))
+
+        @lru_cache(maxsize=SYSTEM_PROMPT_CACHE_SIZE)
+        def render_system_prompt(values: Tuple[str, ...]) -> str:
+            return system_prompt.render(dict(zip(system_prompt.attributes, values)))
+
+        return cls(system_prompt, temperature, prompt, static_temperature, max_new_tokens,
+                   template, attributes, render_system_prompt)
+
+    def render_prompt(self, values: Dict[str, str], content: str) -> str:
+        """User prompt for content (the Prompt Template filled in, or content as is)."""
+        return content if self.prompt is None else self.prompt.render(values, content)
+
+    def resolve_attributes(self, flowfile: Any) -> Tuple[str, float, Dict[str, str]]:
+        """
+        (system prompt, temperature, attribute values) for one FlowFile;
+        the values are what render_prompt() needs for its user prompts.
+        """
+        values = {name: flowfile.getAttribute(name) or "" for name in self.attributes}
+        if self.template is not None:
+            return self.system_prompt.text, self.static_temperature, values
+
+        system_prompt = self.system_prompt.text
+        if not self.system_prompt.is_static:
+            system_prompt = self.render_system_prompt(
+                tuple(values[name] for name in self.system_prompt.attributes)
+            )
+        temperature = self.static_temperature
+        if not self.temperature.is_static:
+            temperature = _parse_temperature(self.temperature.render(values))
+        return system_prompt, temperature, values
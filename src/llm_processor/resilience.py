@@ -0,0 +1,219 @@
+"""
+Retry and circuit breaker for calls to the LLM server.
+
+- Transient failures (connection errors, timeouts, HTTP 429/502/503/504)
+  are retried with exponential backoff and full jitter; a Retry-After
+  header from the server takes precedence over the computed delay.
+- A circuit breaker counts consecutive transient failures. Once open it
+  fails calls immediately (CircuitOpenError) instead of letting every
+  FlowFile wait for a timeout, and after `reset_timeout` lets a single
+  half-open probe through to check whether the server is back.
+"""
+
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from tenacity.wait import wait_base
+
+# HTTP statuses worth retrying: overload / temporary unavailability
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """The LLM endpoint is considered unhealthy; call not attempted."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for failures that may succeed if the same request is repeated."""
+    # requests (llm_client) and httpx (llm_async_client) errors alike. Both
+    # are imported only when their client is used; a library that is not
+    # loaded cannot have raised anything, so it is not imported here.
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            return exc.response.status_code in RETRYABLE_STATUSES
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        if isinstance(exc, httpx.TransportError):
+            return True
+        if isinstance(exc, httpx.HTTPStatusError) and exc.response is not None:
+            return exc.response.status_code in RETRYABLE_STATUSES
+    return False
+
+
+def retry_after_seconds(exc: Optional[BaseException]) -> Optional[float]:
+    """
+    Delay requested by the server's Retry-After header (seconds or an
+    HTTP date), or None if the error carries no such header.
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    from email.utils import parsedate_to_datetime
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryAfterWait(wait_base):
+    """
+    tenacity wait strategy: honour Retry-After (capped at max_wait),
+    otherwise fall back to the given strategy.
+    """
+
+    def __init__(self, fallback: wait_base, max_wait: float):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        outcome = retry_state.outcome
+        delay = retry_after_seconds(outcome.exception() if outcome is not None else None)
+        if delay is None:
+            return self.fallback(retry_state)
+        return min(delay, self.max_wait)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed -> open -> half-open circuit breaker.
+
+    - failure_threshold: consecutive transient failures that open it;
+    - reset_timeout: seconds to stay open before one probe is allowed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the server now."""
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError("LLM endpoint circuit is open")
+                self._state = self.HALF_OPEN
+
+            if self._state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError("LLM endpoint circuit is half-open (probe running)")
+                self._probing = True
+
+    def cancel_call(self) -> None:
+        """
+        The call let through by before_call() was not made: record no
+        outcome. A cancelled half-open probe leaves the circuit open, and
+        the next caller becomes the probe.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probing:
+                self._state = self.OPEN
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+            self._probing = False
+
+
+def call_with_retry(fn: Callable[[], Any],
+                    max_retries: int = 2,
+                    initial_backoff: float = 0.5,
+                    max_backoff: float = 10.0,
+                    breaker: Optional[CircuitBreaker] = None,
+                    sleep: Callable[[float], None] = time.sleep,
+                    before_attempt: Optional[Callable[[], None]] = None) -> Any:
+    """
+    Call fn(), retrying transient failures up to max_retries times.
+
+    Each attempt passes through the circuit breaker (if any); an open
+    circuit raises CircuitOpenError right away and is not retried.
+    before_attempt() (e.g. taking rate-limit budget) runs after the
+    circuit check; its errors are raised without touching the breaker,
+    since the server was not contacted.
+    The last error is re-raised when all attempts failed.
+    """
+
+    def attempt():
+        if breaker is None:
+            if before_attempt is not None:
+                before_attempt()
+            return fn()
+
+        breaker.before_call()
+        if before_attempt is not None:
+            try:
+                before_attempt()
+            except BaseException:
+                breaker.cancel_call()
+                raise
+        try:
+            result = fn()
+        except Exception as e:
+            # Only server-health problems count against the circuit;
+            # e.g. a 400 proves the server is up.
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    retrying = Retrying(
+        stop=stop_after_attempt(max_retries + 1),
+        wait=RetryAfterWait(
+            wait_random_exponential(multiplier=initial_backoff, max=max_backoff),
+            max_wait=max_backoff,
+        ),
+        retry=retry_if_exception(is_retryable),
+        sleep=sleep,
+        reraise=True,
+    )
+    return retrying(attempt)
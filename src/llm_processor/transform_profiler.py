@@ -0,0 +1 @@
+../nifi_common/transform_profiler.py
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Helpers shared by the processor packages.
+
+NiFi imports every processor directory on its own, with that directory's
+modules as top-level modules, so processors cannot import this package.
+Each module here is symlinked into the processor directories that use it
+(e.g. src/llm_processor/json_codec.py -> ../nifi_common/json_codec.py) and
+imported by bare name: `from json_codec import dumps, loads`.
+"""
@@ -0,0 +1,51 @@
+"""
+FlowFile content I/O shared by the processors.
+
+Content is handled as bytes from getContentsAsBytes() to the
+FlowFileTransformResult:
+
+  - read_content() returns the FlowFile bytes as they are (no copy);
+  - decode_text() is the one place where bytes become str, for code that
+    really needs text (e.g. a prompt going into a JSON payload); JSON
+    itself is parsed straight from bytes by json_codec.loads();
+  - to_contents() turns a processor result into the bytes NiFi expects,
+    encoding str once and passing bytes/bytearray through untouched.
+"""
+
+from typing import Any, Optional, Union
+
+Contents = Union[bytes, bytearray]
+
+
+def read_content(flowfile: Any) -> Contents:
+    """FlowFile content as bytes (b"" when empty), without copying."""
+    data = flowfile.getContentsAsBytes()
+    if not data:
+        return b""
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    # e.g. a memoryview or another buffer object
+    return bytes(data)
+
+
+def decode_text(data: Union[bytes, bytearray, memoryview]) -> str:
+    """Strict UTF-8 text of a bytes-like object (no intermediate copy)."""
+    return str(data, "utf-8")
+
+
+def to_contents(value: Any) -> Optional[Contents]:
+    """
+    Result content as bytes: str is UTF-8 encoded, bytes and bytearray
+    are returned as is, a memoryview over a whole bytes object gives that
+    object back. None (keep the original content) stays None.
+    """
+    if value is None or isinstance(value, (bytes, bytearray)):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, memoryview):
+        base = value.obj
+        if isinstance(base, (bytes, bytearray)) and value.contiguous and value.nbytes == len(base):
+            return base
+        return value.tobytes()
+    raise TypeError(f"Unsupported content type: {type(value).__name__}")
@@ -0,0 +1,172 @@
+"""
+Pluggable JSON codec for the processors' hot paths.
+
+Uses orjson or msgspec when installed in the processor venv and the
+standard library otherwise. Whatever the backend, results are the same
+as with the stdlib:
+
+  - loads(data) == json.loads(data.decode("utf-8")); anything the fast
+    decoder rejects (NaN, integers beyond 64 bits, a BOM, ...) is
+    re-parsed by the stdlib, which either accepts it or raises its usual
+    error;
+  - dumps(obj) == json.dumps(obj, ensure_ascii=False,
+    separators=(",", ":")).encode("utf-8"), byte for byte. Fast encoders
+    format floats differently (1e16 vs 1e+16), so objects holding floats
+    or non-JSON types are always encoded by the stdlib.
+
+A backend is only used if it encodes a probe object exactly like the
+stdlib. Set NIFI_JSON_CODEC=orjson|msgspec|json to force one.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Exact types whose encoding is identical in every backend
+_SCALARS = frozenset({str, int, bool, type(None)})
+_CONTAINERS = frozenset({dict, list, tuple})
+_PLAIN = _SCALARS | _CONTAINERS
+
+# Exercises escaping, non-ASCII and integer edge cases
+_PROBE = {
+    "s": "\x00\x1f\x7f\"\\/\b\f\n\r\t é ж   \U0001F600",
+    "n": [0, -1, 2 ** 63 - 1, -2 ** 63, True, False, None],
+    "": {"nested": [[], {}]},
+}
+
+_STDLIB_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+class JsonCodec(NamedTuple):
+    """A JSON backend: loads(bytes | str) -> object, dumps(object) -> bytes."""
+
+    name: str
+    loads: Callable[[Any], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _is_plain(obj: Any) -> bool:
+    """True if obj holds only str keys and str/int/bool/None/list/dict values."""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        kind = type(item)
+        if kind is dict:
+            if not set(map(type, item)) <= {str}:
+                return False
+            values = item.values()
+        elif kind is list or kind is tuple:
+            values = item
+        else:
+            if kind not in _SCALARS:
+                return False
+            continue
+
+        # One C-level pass over the values; recurse into containers only
+        kinds = set(map(type, values))
+        if kinds <= _SCALARS:
+            continue
+        if not kinds <= _PLAIN:
+            return False
+        stack.extend(v for v in values if type(v) in _CONTAINERS)
+    return True
+
+
+def _stdlib_loads(data: Any) -> Any:
+    # Strict UTF-8, no encoding detection: the same as decoding first
+    if not isinstance(data, str):
+        data = str(data, "utf-8")
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return _STDLIB_ENCODER.encode(obj).encode("utf-8")
+
+
+def _fast_codec(name: str,
+                fast_dumps: Callable[[Any], bytes],
+                fast_loads: Optional[Callable[[Any], Any]] = None) -> Optional[JsonCodec]:
+    """
+    Wrap a fast backend with the stdlib fallbacks described above, or
+    return None if it does not round-trip the probe like the stdlib.
+    """
+    expected = _stdlib_dumps(_PROBE)
+    try:
+        if fast_dumps(_PROBE) != expected:
+            return None
+        if fast_loads is not None and fast_loads(expected) != _PROBE:
+            return None
+    except Exception:
+        return None
+
+    def dumps(obj: Any) -> bytes:
+        if _is_plain(obj):
+            try:
+                return fast_dumps(obj)
+            except Exception:
+                pass  # e.g. integer beyond 64 bits, lone surrogate
+        return _stdlib_dumps(obj)
+
+    loads = _stdlib_loads
+    if fast_loads is not None:
+        def loads(data: Any) -> Any:
+            try:
+                return fast_loads(data)
+            except Exception:
+                return _stdlib_loads(data)
+
+    return JsonCodec(name, loads, dumps)
+
+
+def _load_orjson() -> Optional[JsonCodec]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return _fast_codec("orjson", orjson.dumps, orjson.loads)
+
+
+def _load_msgspec() -> Optional[JsonCodec]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    # Encoding only: decoding keeps to orjson/json, whose results are
+    # known to match json.loads.
+    return _fast_codec("msgspec", msgspec.json.Encoder().encode)
+
+
+_BACKENDS: Dict[str, Callable[[], Optional[JsonCodec]]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": lambda: JsonCodec("json", _stdlib_loads, _stdlib_dumps),
+}
+
+
+def available_codecs() -> List[str]:
+    """Names of usable backends, fastest first ('json' is always there)."""
+    return [name for name, create in _BACKENDS.items() if create() is not None]
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Codec by name, or the fastest usable one (NIFI_JSON_CODEC overrides).
+
+    Raises ValueError for an unknown or unusable backend name.
+    """
+    name = name or os.environ.get("NIFI_JSON_CODEC") or None
+    if name is None:
+        for create in _BACKENDS.values():
+            codec = create()
+            if codec is not None:
+                return codec
+
+    codec = _BACKENDS[name]() if name in _BACKENDS else None
+    if codec is None:
+        raise ValueError(f"JSON codec not available: {name}")
+    return codec
+
+
+CODEC = get_codec()
+loads = CODEC.loads
+dumps = CODEC.dumps
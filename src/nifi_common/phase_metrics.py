@@ -0,0 +1,378 @@
+"""
+Per-phase timing of FlowFiles, exported as attributes and Prometheus metrics.
+
+A PhaseTimer is started per FlowFile; the processor calls lap("read"),
+lap("parse"), ... after each step (one perf_counter() call each) and
+add()s durations measured elsewhere, e.g. by llm_client around the HTTP
+request. size() records payload sizes. NULL_TIMER does nothing and is
+used when instrumentation is off, so the hot path needs no branches.
+
+ProcessorMetrics (one per scheduled processor instance) turns a finished
+timer into:
+
+  - FlowFile attributes "<prefix>.timing.<phase>.ms" and
+    "<prefix>.bytes.<kind>" (Timing Attributes = true);
+  - observations in the process-wide REGISTRY of histograms, served in
+    Prometheus text format on a local HTTP port (Metrics Endpoint)
+    and/or rewritten to a file every few seconds (Metrics File, e.g. for
+    node_exporter's textfile collector).
+
+Exporters are shared: processor instances in one Python process that
+name the same port or file use one server / writer.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds of the latency histogram buckets, seconds
+SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds of the payload size histogram buckets, bytes
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216,
+                 67108864)
+
+# Seconds between rewrites of a Metrics File
+METRICS_FILE_INTERVAL = 10.0
+# Bind address when Metrics Endpoint is only a port
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class PhaseTimer:
+    """Seconds per phase and bytes per payload kind of one FlowFile."""
+
+    __slots__ = ("phases", "sizes", "started", "_mark", "_lock")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+        self.started = self._mark = perf_counter()
+        self._lock = threading.Lock()
+
+    def lap(self, phase: str, exclude: Tuple[str, ...] = ()) -> None:
+        """
+        Charge the time since the previous lap (or the start) to phase,
+        minus the time of the `exclude` phases (which must only have been
+        added since that lap, e.g. by the call being timed).
+
+        Called from the FlowFile's own thread only, so it takes no lock.
+        """
+        now = perf_counter()
+        seconds = now - self._mark
+        self._mark = now
+        phases = self.phases
+        if exclude:
+            # Parallel (hedged, chunked) requests can add up to more than the lap
+            seconds = max(seconds - sum(phases.get(p, 0.0) for p in exclude), 0.0)
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add seconds measured elsewhere (thread-safe: chunk calls run in parallel)."""
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def size(self, kind: str, nbytes: int) -> None:
+        with self._lock:
+            self.sizes[kind] = self.sizes.get(kind, 0) + nbytes
+
+    def finish(self) -> float:
+        """Record and return the "total" phase (start to now)."""
+        total = perf_counter() - self.started
+        with self._lock:
+            self.phases["total"] = total
+        return total
+
+    def attributes(self, prefix: str) -> Dict[str, str]:
+        attributes = {f"{prefix}.timing.{phase}.ms": f"{seconds * 1000:.3f}"
+                      for phase, seconds in self.phases.items()}
+        attributes.update((f"{prefix}.bytes.{kind}", str(nbytes))
+                          for kind, nbytes in self.sizes.items())
+        return attributes
+
+
+class _NullTimer:
+    """PhaseTimer that records nothing."""
+
+    __slots__ = ()
+
+    def lap(self, phase: str, exclude: Tuple[str, ...] = ()) -> None:
+        pass
+
+    def add(self, phase: str, seconds: float) -> None:
+        pass
+
+    def size(self, kind: str, nbytes: int) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Cumulative Prometheus histogram (not thread-safe, see MetricsRegistry)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class MetricsRegistry:
+    """Phase and payload histograms plus FlowFile counters, per processor."""
+
+    def __init__(self):
+        self._phases: Dict[Tuple[str, str], Histogram] = {}
+        self._sizes: Dict[Tuple[str, str], Histogram] = {}
+        self._flowfiles: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, processor: str, timer: PhaseTimer, relationship: str) -> None:
+        phases, sizes = self._phases, self._sizes
+        with self._lock:
+            for phase, seconds in timer.phases.items():
+                hist = phases.get((processor, phase))
+                if hist is None:
+                    hist = phases[(processor, phase)] = Histogram(SECONDS_BUCKETS)
+                hist.observe(seconds)
+            for kind, nbytes in timer.sizes.items():
+                hist = sizes.get((processor, kind))
+                if hist is None:
+                    hist = sizes[(processor, kind)] = Histogram(BYTES_BUCKETS)
+                hist.observe(nbytes)
+            key = (processor, relationship)
+            self._flowfiles[key] = self._flowfiles.get(key, 0) + 1
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            self._render_histograms(
+                lines, "nifi_python_phase_seconds",
+                "Seconds spent per processing phase of a FlowFile.", "phase", self._phases,
+            )
+            self._render_histograms(
+                lines, "nifi_python_payload_bytes",
+                "Payload sizes of a FlowFile, per kind.", "kind", self._sizes,
+            )
+            lines.append("# HELP nifi_python_flowfiles_total FlowFiles transferred, per relationship.")
+            lines.append("# TYPE nifi_python_flowfiles_total counter")
+            for (processor, relationship), count in sorted(self._flowfiles.items()):
+                labels = _labels(processor=processor, relationship=relationship)
+                lines.append(f"nifi_python_flowfiles_total{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: List[str], name: str, help_text: str, label: str,
+                           histograms: Dict[Tuple[str, str], Histogram]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (processor, value), hist in sorted(histograms.items()):
+            labels = _labels(processor=processor, **{label: value})
+            cumulative = 0
+            for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.sum:.9g}")
+            lines.append(f"{name}_count{{{labels}}} {hist.count}")
+
+
+# Process-wide registry shared by every processor instance
+REGISTRY = MetricsRegistry()
+
+
+def _metrics_handler():
+    """
+    Request handler class of MetricsServer. Built on first use, so that
+    http.server (and with it http.client, email, ssl) is only imported
+    when an endpoint is configured.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            raw = self.server.registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+    return MetricsHandler
+
+
+class MetricsServer:
+    """GET /metrics of a registry on (host, port), served from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry, address: Tuple[str, int]):
+        from http.server import ThreadingHTTPServer
+
+        self._httpd = ThreadingHTTPServer(address, _metrics_handler())
+        self._httpd.daemon_threads = True
+        self._httpd.registry = registry
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="metrics-http", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._httpd.server_address[:2]
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class MetricsFileWriter:
+    """Rewrites a file with the registry's metrics every `interval` seconds (and on close)."""
+
+    def __init__(self, registry: MetricsRegistry, path: str,
+                 interval: float = METRICS_FILE_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def write(self) -> None:
+        # Readers never see a half-written file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(tmp, self.path)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'9464' -> (DEFAULT_METRICS_HOST, 9464); 'host:port' -> (host, port)."""
+    host, sep, port = value.strip().rpartition(":")
+    return (host if sep and host else DEFAULT_METRICS_HOST), int(port)
+
+
+# Shared exporters: key -> [exporter, users]
+_exporters: Dict[Tuple[str, Any], list] = {}
+_exporters_lock = threading.Lock()
+
+
+def _acquire(key: Tuple[str, Any], create) -> Tuple[str, Any]:
+    with _exporters_lock:
+        entry = _exporters.get(key)
+        if entry is None:
+            _exporters[key] = [create(), 1]
+        else:
+            entry[1] += 1
+    return key
+
+
+def _release(key: Tuple[str, Any]) -> None:
+    with _exporters_lock:
+        entry = _exporters.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _exporters[key]
+    entry[0].close()
+
+
+def _is_true(value: Optional[str]) -> bool:
+    return str(value or "").strip().lower() == "true"
+
+
+class ProcessorMetrics:
+    """
+    Instrumentation of one scheduled processor instance.
+
+    - processor: "processor" label of the exported metrics;
+    - prefix: attribute prefix ("llm" -> llm.timing.http.ms);
+    - attributes: add timing/size attributes to FlowFiles;
+    - endpoint: "[host:]port" to serve /metrics on ("" = no endpoint);
+    - path: file to write the metrics to ("" = no file).
+    """
+
+    def __init__(self, processor: str, prefix: str, attributes: bool = False,
+                 endpoint: str = "", path: str = "", registry: MetricsRegistry = REGISTRY):
+        self.processor = processor
+        self.prefix = prefix
+        self.attributes = attributes
+        self.registry = registry
+        self._exporters = []
+        if endpoint:
+            address = parse_address(endpoint)
+            self._exporters.append(_acquire(
+                ("http", address), lambda: MetricsServer(registry, address)
+            ))
+        if path:
+            path = os.path.abspath(path)
+            self._exporters.append(_acquire(
+                ("file", path), lambda: MetricsFileWriter(registry, path)
+            ))
+        self.export = bool(self._exporters)
+
+    @classmethod
+    def from_context(cls, context: Any, processor: str, prefix: str) -> Optional["ProcessorMetrics"]:
+        """
+        From the Timing Attributes / Metrics Endpoint / Metrics File
+        properties; None when all of them are off.
+        """
+        attributes = _is_true(context.getProperty("Timing Attributes"))
+        endpoint = (context.getProperty("Metrics Endpoint") or "").strip()
+        path = (context.getProperty("Metrics File") or "").strip()
+        if not (attributes or endpoint or path):
+            return None
+        return cls(processor, prefix, attributes, endpoint, path)
+
+    def finish(self, timer: PhaseTimer, result: Any) -> Any:
+        """Close the FlowFile's timer and report it; returns the transform result."""
+        timer.finish()
+        if self.export:
+            self.registry.observe(self.processor, timer, result.relationship)
+        if self.attributes:
+            if result.attributes is None:
+                result.attributes = {}
+            result.attributes.update(timer.attributes(self.prefix))
+        return result
+
+    def close(self) -> None:
+        """Release the shared exporters (the last user stops them)."""
+        exporters, self._exporters = self._exporters, []
+        for key in exporters:
+            _release(key)
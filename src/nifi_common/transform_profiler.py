@@ -0,0 +1,310 @@
+"""
+Opt-in profiling of a fraction of transform() calls on a live node.
+
+A TransformProfiler (one per scheduled processor instance) wraps
+transform(): each call is profiled with probability `fraction`, the rest
+run untouched. Two modes:
+
+  - "sampling": a daemon thread takes the stack of every thread inside a
+    profiled call every SAMPLE_INTERVAL seconds (sys._current_frames()).
+    Wall-clock, so time blocked on the network shows up too; calls much
+    shorter than the interval are mostly missed. Written as collapsed
+    stacks ("root;caller;callee count" lines) for flamegraph.pl,
+    speedscope or inferno.
+  - "cprofile": the call runs under cProfile (every Python call counted,
+    CPU-heavy code slows down a lot). One call at a time per process;
+    written as merged pstats (python -m pstats, snakeviz, gprof2dot).
+
+Every `interval` seconds (and on close) the window's merged results are
+written to `directory` as <processor>-<pid>-<time>.collapsed|.pstats, and
+only the newest MAX_FILES of them are kept (over all processes).
+
+Overhead cap: the profiler's own time - taking samples, or the whole
+duration of cProfile'd calls (an upper bound of their slowdown) - is kept
+under `max_overhead` of the wall-clock time since scheduling; while over
+budget, calls are not profiled and no samples are taken.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+SAMPLING = "sampling"
+CPROFILE = "cprofile"
+MODES = (SAMPLING, CPROFILE)
+
+# Seconds between stack samples in "sampling" mode
+SAMPLE_INTERVAL = 0.005
+# Seconds between merges of cProfile'd calls into the window's pstats
+MERGE_INTERVAL = 1.0
+# Profile files kept per processor and process; older ones are deleted
+MAX_FILES = 100
+
+DEFAULT_FRACTION = 0.01
+DEFAULT_DUMP_INTERVAL = 60.0
+DEFAULT_MAX_OVERHEAD = 0.02
+
+_SUFFIXES = {SAMPLING: ".collapsed", CPROFILE: ".pstats"}
+
+
+def _parse_float(value: Optional[str], default: float) -> float:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+class TransformProfiler:
+    """
+    Profiles `fraction` of the calls passed to run().
+
+    - processor: file name prefix ("JsonKeyValueSwap");
+    - directory: where profiles are written (created if missing);
+    - mode: SAMPLING or CPROFILE;
+    - interval: seconds between dumps;
+    - max_overhead: share of wall-clock time the profiler may take.
+    """
+
+    def __init__(self, processor: str, directory: str, fraction: float = DEFAULT_FRACTION,
+                 mode: str = SAMPLING, interval: float = DEFAULT_DUMP_INTERVAL,
+                 max_overhead: float = DEFAULT_MAX_OVERHEAD,
+                 sample_interval: float = SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiler mode {mode!r}, expected one of {MODES}")
+        self.processor = processor
+        self.directory = os.path.abspath(directory)
+        self.fraction = min(max(fraction, 0.0), 1.0)
+        self.mode = mode
+        self.interval = interval
+        self.max_overhead = max(max_overhead, 0.0)
+        self.sample_interval = sample_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Counters: calls seen, calls profiled, calls skipped over budget
+        self.calls = 0
+        self.profiled = 0
+        self.skipped = 0
+        self.files_written = 0
+        # Profiler's own seconds (samples / cProfile'd calls) since start
+        self._spent = 0.0
+        self._started = perf_counter()
+        self._lock = threading.Lock()
+        # Window being collected: collapsed stack -> samples, or pstats of
+        # the cProfile'd calls; calls are merged into it by the dump thread
+        # (not by the FlowFile's thread) every MERGE_INTERVAL
+        self._samples: Dict[str, int] = {}
+        self._stats: Optional["pstats.Stats"] = None
+        self._profiles: List["cProfile.Profile"] = []
+        # merge() / dump() run one at a time
+        self._dump_lock = threading.Lock()
+        # Thread id -> nesting depth of profiled calls ("sampling")
+        self._active: Dict[int, int] = {}
+        # Only one cProfile'd call at a time (process-wide profiler from 3.12)
+        self._cprofile_lock = threading.Lock()
+        # Frame labels by code object
+        self._labels: Dict[Any, str] = {}
+
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._dump_loop, name="profile-dump", daemon=True)]
+        if mode == SAMPLING:
+            self._threads.append(
+                threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_context(cls, context: Any, processor: str) -> Optional["TransformProfiler"]:
+        """
+        From the Profile Directory / Profiler / Profile Fraction / Profile
+        Dump Interval / Profile Max Overhead properties; None when Profile
+        Directory is empty or the fraction is 0.
+        """
+        directory = (context.getProperty("Profile Directory") or "").strip()
+        fraction = _parse_float(context.getProperty("Profile Fraction"), DEFAULT_FRACTION)
+        if not directory or fraction <= 0:
+            return None
+        mode = (context.getProperty("Profiler") or SAMPLING).strip().lower()
+        interval = _parse_float(context.getProperty("Profile Dump Interval"), DEFAULT_DUMP_INTERVAL)
+        max_overhead = _parse_float(context.getProperty("Profile Max Overhead"),
+                                    DEFAULT_MAX_OVERHEAD)
+        return cls(processor, directory, fraction, mode if mode in MODES else SAMPLING,
+                   max(interval, 1.0), max_overhead)
+
+    def over_budget(self) -> bool:
+        return self._spent > self.max_overhead * (perf_counter() - self._started)
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """fn(*args), profiled with probability `fraction`."""
+        sampled = random.random() < self.fraction
+        skipped = sampled and self.over_budget()
+        with self._lock:
+            self.calls += 1
+            if skipped:
+                self.skipped += 1
+        if not sampled or skipped:
+            return fn(*args)
+        if self.mode == CPROFILE:
+            return self._run_cprofile(fn, args)
+        return self._run_sampled(fn, args)
+
+    def _run_sampled(self, fn: Callable[..., Any], args: tuple) -> Any:
+        tid = threading.get_ident()
+        active = self._active
+        with self._lock:
+            active[tid] = active.get(tid, 0) + 1
+            self.profiled += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                depth = active.pop(tid) - 1
+                if depth:
+                    active[tid] = depth
+
+    def _run_cprofile(self, fn: Callable[..., Any], args: tuple) -> Any:
+        if not self._cprofile_lock.acquire(blocking=False):
+            return fn(*args)
+        # Imported here: only "cprofile" mode needs it
+        import cProfile
+
+        try:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is active in this process
+                return fn(*args)
+            started = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+                    self.profiled += 1
+                    self._spent += perf_counter() - started
+        finally:
+            self._cprofile_lock.release()
+
+    def _label(self, code: Any) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+        return label
+
+    def _collapse(self, frame: Any) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ";".join(labels)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            if not self._active or self.over_budget():
+                continue
+            started = perf_counter()
+            frames = sys._current_frames()
+            stacks = [self._collapse(frames[tid]) for tid in list(self._active) if tid in frames]
+            del frames
+            with self._lock:
+                samples = self._samples
+                for stack in stacks:
+                    samples[stack] = samples.get(stack, 0) + 1
+                self._spent += perf_counter() - started
+
+    def _dump_loop(self) -> None:
+        tick = min(MERGE_INTERVAL, self.interval)
+        next_dump = perf_counter() + self.interval
+        while not self._stop.wait(tick):
+            if perf_counter() >= next_dump:
+                next_dump += self.interval
+                self.dump()
+            else:
+                self.merge()
+
+    def merge(self) -> None:
+        """Merge the cProfile'd calls collected so far into the window's pstats."""
+        with self._dump_lock:
+            self._merge()
+
+    def _merge(self) -> None:
+        with self._lock:
+            profiles, self._profiles = self._profiles, []
+        if not profiles:
+            return
+        import pstats
+
+        started = perf_counter()
+        if self._stats is None:
+            self._stats = pstats.Stats(*profiles)
+        else:
+            self._stats.add(*profiles)
+        with self._lock:
+            self._spent += perf_counter() - started
+
+    def dump(self) -> Optional[str]:
+        """Write the current window's profile and start a new one; returns the path."""
+        with self._dump_lock:
+            self._merge()
+            with self._lock:
+                samples, self._samples = self._samples, {}
+            stats, self._stats = self._stats, None
+            if not samples and stats is None:
+                return None
+            return self._write(samples, stats)
+
+    def _write(self, samples: Dict[str, int], stats: Optional["pstats.Stats"]) -> str:
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        prefix = f"{self.processor}-{os.getpid()}-"
+        path = os.path.join(self.directory, f"{prefix}{stamp}{_SUFFIXES[self.mode]}")
+        if os.path.exists(path):
+            path = os.path.join(self.directory,
+                                f"{prefix}{stamp}-{self.files_written}{_SUFFIXES[self.mode]}")
+        # Readers never see a half-written file
+        tmp = f"{path}.tmp"
+        if stats is not None:
+            stats.dump_stats(tmp)
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for stack, count in sorted(samples.items()):
+                    f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        self.files_written += 1
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        # Across all pids: restarted and respawned workers leave files behind
+        prefix, suffix = f"{self.processor}-", _SUFFIXES[self.mode]
+        mtimes = {}
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                try:
+                    mtimes[name] = os.path.getmtime(os.path.join(self.directory, name))
+                except OSError:
+                    pass  # pruned by another process meanwhile
+        for name in sorted(mtimes, key=mtimes.get)[:-MAX_FILES]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def close(self) -> Optional[str]:
+        """Stop the threads and write what was collected; returns the last path."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        return self.dump()
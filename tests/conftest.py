@@ -16,3 +16,8 @@ if demo_proc_dir.is_dir() and str(demo_proc_dir) not in sys.path:
 llm_proc_dir = src_dir / "llm_processor"
 if llm_proc_dir.is_dir() and str(llm_proc_dir) not in sys.path:
     sys.path.insert(0, str(llm_proc_dir))
+
+# Local stub LLM server and other benchmark helpers
+bench_dir = repo_root / "benchmarks"
+if bench_dir.is_dir() and str(bench_dir) not in sys.path:
+    sys.path.insert(0, str(bench_dir))
@@ -0,0 +1,54 @@
+"""
+Тесты офлайн-бенчмарка процессоров (benchmarks/bench_processors.py).
+"""
+from bench_processors import discover_processors, load_corpus, parse_properties, run_processor
+from llm_stub_server import StubLLMServer
+
+
+def test_discovers_all_processors():
+    found = discover_processors()
+    assert {"JsonKeyValueSwap", "LLMRequestProcessor"} <= set(found)
+
+
+def test_corpus_from_directory_and_ndjson(tmp_path):
+    corpus_dir = tmp_path / "corpus"
+    corpus_dir.mkdir()
+    (corpus_dir / "b.json").write_bytes(b'{"b": 2}')
+    (corpus_dir / "a.json").write_bytes(b'{"a": 1}')
+    (corpus_dir / ".hidden").write_bytes(b"x")
+    assert load_corpus(corpus_dir) == [b'{"a": 1}', b'{"b": 2}']
+
+    ndjson = tmp_path / "corpus.ndjson"
+    ndjson.write_bytes(b'{"a": 1}\n\n{"b": 2}\n')
+    assert load_corpus(ndjson) == [b'{"a": 1}', b'{"b": 2}']
+
+
+def test_property_overrides_scoped_by_processor():
+    items = ["Max Depth=3", "LLMRequestProcessor:HOST=h", "JsonKeyValueSwap:Input Format=ndjson"]
+    assert parse_properties(items, "JsonKeyValueSwap") == {
+        "Max Depth": "3", "Input Format": "ndjson",
+    }
+    assert parse_properties(items, "LLMRequestProcessor") == {"Max Depth": "3", "HOST": "h"}
+
+
+def test_run_processor_reports_throughput_and_latency():
+    found = discover_processors()
+    corpus = [b'{"a": 1, "b": 2}', b'not json']
+
+    row = run_processor(found["JsonKeyValueSwap"], corpus, {}, repeat=3, warmup=1)
+
+    assert row["flowfiles"] == 6
+    assert row["bytes"] == sum(len(d) for d in corpus) * 3
+    assert row["relationships"] == {"success": 3, "failure": 3}
+    assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+    assert row["flowfiles_per_sec"] > 0
+
+
+def test_run_llm_processor_against_stub():
+    found = discover_processors()
+    with StubLLMServer() as server:
+        row = run_processor(found["LLMRequestProcessor"], [b"hello"],
+                            {"HOST": server.host, "PORT": str(server.port)}, repeat=2)
+    # Значения по умолчанию берутся из дескрипторов свойств
+    assert row["relationships"] == {"success": 2}
+    assert server.requests == 2
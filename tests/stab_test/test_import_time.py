@@ -0,0 +1,42 @@
+"""
+Тесты времени запуска: импорт пакетов процессоров (-X importtime,
+benchmarks/bench_import.py) не тянет тяжёлые модули, которые нужны
+только при определённых настройках.
+"""
+import pytest
+
+from bench_import import measure, parse_importtime, total_ms
+
+# Импортируются лениво: в onScheduled() или при первом использовании
+LAZY_LLM = {
+    "requests", "urllib3", "charset_normalizer", "certifi", "httpx", "asyncio",
+    "llm_async_client", "hedging", "sqlite3", "http.server", "cProfile", "pstats",
+}
+LAZY_DEMO = {"http.server", "cProfile", "pstats"}
+
+
+@pytest.mark.parametrize("package, lazy", [
+    ("llm_processor", LAZY_LLM),
+    ("demo_processor", LAZY_DEMO),
+])
+def test_package_import_skips_heavy_modules(package, lazy):
+    modules = measure(package)
+    names = {m.name for m in modules}
+
+    assert package in names
+    assert not names & lazy, sorted(names & lazy)
+
+
+def test_parse_importtime_counts_only_after_marker():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | site",
+        "--- bench_import: measured import starts ---",
+        "import time:        30 |         30 |   json.decoder",
+        "import time:        20 |         50 | json",
+    ])
+    modules = parse_importtime(stderr)
+    assert [(m.name, m.depth, m.cumulative_us) for m in modules] == [
+        ("json.decoder", 1, 30), ("json", 0, 50),
+    ]
+    assert total_ms(modules) == 0.05
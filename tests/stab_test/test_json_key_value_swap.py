@@ -0,0 +1,184 @@
+"""
+Тесты JsonKeyValueSwap: обычный и потоковый режимы дают одинаковый результат.
+"""
+import json
+import pstats
+
+from demo_processor import JsonKeyValueSwap
+
+
+class _FF:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def getContentsAsBytes(self):
+        return self._data
+
+
+class _Ctx:
+    def __init__(self, **props):
+        self._props = props
+
+    def getProperty(self, name):
+        return self._props.get(name, "")
+
+
+def test_streaming_mode_matches_in_memory_mode():
+    data = json.dumps({"a": 1, "b": "й", "c": 1, "d": None}).encode("utf-8")
+    proc = JsonKeyValueSwap()
+
+    streamed = proc.transform(_Ctx(**{"Streaming Threshold": "1"}), _FF(data))
+    in_memory = proc.transform(_Ctx(**{"Streaming Threshold": "0"}), _FF(data))
+
+    assert streamed.relationship == in_memory.relationship == "success"
+    assert streamed.attributes["json.swap.streamed"] == "true"
+    assert bytes(streamed.contents) == in_memory.contents
+    assert json.loads(in_memory.contents) == {"1": "c", "й": "b", "None": "d"}
+    assert streamed.attributes["json.swap.original.size"] == "4"
+    assert streamed.attributes["json.swap.result.size"] == "3"
+
+
+def test_streaming_is_off_by_default():
+    # Потоковый режим медленнее, включается только явным порогом
+    data = json.dumps({f"k{i}": f"v{i}" for i in range(600_000)}).encode("utf-8")
+    assert len(data) > 8 * 1024 * 1024
+    res = JsonKeyValueSwap().transform(_Ctx(), _FF(data))
+
+    assert res.relationship == "success"
+    assert "json.swap.streamed" not in res.attributes
+
+
+def test_streaming_mode_errors_and_duplicate_key_fallback():
+    proc = JsonKeyValueSwap()
+    ctx = _Ctx(**{"Streaming Threshold": "1"})
+
+    bad = proc.transform(ctx, _FF(b'{"a": [1]}'))
+    assert bad.relationship == "failure"
+    assert "list" in bad.attributes["json.swap.error"]
+
+    # Repeated keys are handled by the in-memory path
+    dup = proc.transform(ctx, _FF(b'{"a": 1, "b": 2, "a": 3}'))
+    assert dup.relationship == "success"
+    assert "json.swap.streamed" not in dup.attributes
+    assert dup.contents == b'{"3":"a","2":"b"}'
+
+
+def test_ndjson_records_counted_and_fail_strategy():
+    data = b'{"a": 1}\n{"b": [2]}\nnope\n'
+    proc = JsonKeyValueSwap()
+
+    ok = proc.transform(_Ctx(**{"Input Format": "ndjson"}), _FF(data))
+    assert ok.relationship == "success"
+    assert bytes(ok.contents) == b'{"1":"a"}\n'
+    assert ok.attributes["json.swap.records"] == "3"
+    assert ok.attributes["json.swap.records.failed"] == "2"
+    assert ok.attributes["json.swap.errors.decode"] == "1"
+    assert ok.attributes["json.swap.errors.unsupported_value"] == "1"
+    assert ok.attributes["json.swap.failed.lines"] == "2,3"
+
+    failed = proc.transform(
+        _Ctx(**{"Input Format": "ndjson", "Invalid Records": "fail"}), _FF(data)
+    )
+    assert failed.relationship == "failure"
+    assert failed.contents is None
+    assert failed.attributes["json.swap.records.failed"] == "2"
+
+
+def test_collision_handling_modes_and_attributes():
+    data = b'{"a": 1, "b": 2, "c": 1, "d": 1}'
+    proc = JsonKeyValueSwap()
+
+    for threshold in ("0", "1"):
+        plain = proc.transform(_Ctx(**{"Streaming Threshold": threshold}), _FF(data))
+        assert plain.relationship == "success"
+        assert json.loads(bytes(plain.contents)) == {"1": "d", "2": "b"}
+        assert plain.attributes["json.swap.collisions"] == "2"
+        assert plain.attributes["json.swap.collided.keys.count"] == "1"
+
+        grouped = proc.transform(
+            _Ctx(**{"Streaming Threshold": threshold, "Collision Handling": "group"}), _FF(data)
+        )
+        assert grouped.relationship == "success"
+        assert bytes(grouped.contents) == b'{"1":["a","c","d"],"2":"b"}'
+        assert grouped.attributes["json.swap.collisions"] == "2"
+        assert grouped.attributes["json.swap.collided.keys.count"] == "1"
+
+        routed = proc.transform(
+            _Ctx(**{"Streaming Threshold": threshold, "Collision Handling": "route"}), _FF(data)
+        )
+        assert routed.relationship == "collisions"
+        assert bytes(routed.contents) == bytes(grouped.contents)
+
+    # Без коллизий 'route' отправляет в success
+    clean = proc.transform(_Ctx(**{"Collision Handling": "route"}), _FF(b'{"a": 1}'))
+    assert clean.relationship == "success"
+    assert clean.attributes["json.swap.collisions"] == "0"
+
+
+def test_nested_values_flattened_to_paths():
+    data = b'{"a": {"b": [1, {"c": "x"}]}, "d": 1}'
+    proc = JsonKeyValueSwap()
+
+    rejected = proc.transform(_Ctx(), _FF(data))
+    assert rejected.relationship == "failure"
+
+    # Потоковый порог не мешает: flatten всегда идёт в памяти
+    flat = proc.transform(
+        _Ctx(**{"Nested Values": "flatten", "Path Separator": "/", "Streaming Threshold": "1"}),
+        _FF(data),
+    )
+    assert flat.relationship == "success", flat.attributes
+    assert json.loads(flat.contents) == {"1": "d", "x": "a/b[1]/c"}
+    assert flat.attributes["json.swap.collisions"] == "1"
+
+    grouped = proc.transform(
+        _Ctx(**{"Nested Values": "flatten", "Collision Handling": "group", "Max Depth": "2"}),
+        _FF(data),
+    )
+    assert json.loads(grouped.contents) == {'[1,{"c":"x"}]': "a.b", "1": "d"}
+
+
+def test_timing_attributes_per_phase():
+    proc = JsonKeyValueSwap()
+    ctx = _Ctx(**{"Timing Attributes": "true"})
+    proc.onScheduled(ctx)
+    try:
+        res = proc.transform(ctx, _FF(b'{"a": 1, "b": 2}'))
+        failed = proc.transform(ctx, _FF(b"not json"))
+    finally:
+        proc.onStopped(ctx)
+
+    assert res.relationship == "success"
+    for phase in ("read", "properties", "parse", "swap", "serialize", "total"):
+        assert float(res.attributes[f"json.swap.timing.{phase}.ms"]) >= 0
+    assert res.attributes["json.swap.bytes.in"] == "16"
+    assert res.attributes["json.swap.bytes.out"] == str(len(res.contents))
+
+    # Ошибка тоже получает тайминги, но без выходного размера
+    assert failed.relationship == "failure"
+    assert "json.swap.timing.total.ms" in failed.attributes
+    assert "json.swap.bytes.out" not in failed.attributes
+
+    # Без onScheduled() атрибутов нет
+    plain = JsonKeyValueSwap().transform(ctx, _FF(b'{"a": 1}'))
+    assert not any(".timing." in name for name in plain.attributes)
+
+
+def test_profiler_writes_pstats_of_sampled_calls(tmp_path):
+    proc = JsonKeyValueSwap()
+    ctx = _Ctx(**{
+        "Profile Directory": str(tmp_path), "Profiler": "cprofile",
+        "Profile Fraction": "1", "Profile Max Overhead": "1",
+    })
+    proc.onScheduled(ctx)
+    try:
+        res = proc.transform(ctx, _FF(b'{"a": 1, "b": 2}'))
+    finally:
+        proc.onStopped(ctx)
+
+    # Профилирование не меняет результат
+    assert res.relationship == "success"
+    assert json.loads(res.contents) == {"1": "a", "2": "b"}
+    (path,) = tmp_path.glob("JsonKeyValueSwap-*.pstats")
+    functions = {func[2] for func in pstats.Stats(str(path)).stats}
+    assert "swap_top_level" in functions
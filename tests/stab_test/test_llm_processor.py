@@ -0,0 +1,457 @@
+"""
+Тесты LLMRequestProcessor против локального stub-сервера /generate.
+"""
+import socket
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm_processor import LLMRequestProcessor
+from llm_stub_server import StubH2LLMServer, StubLLMServer
+
+
+class _FF:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def getContentsAsBytes(self):
+        return self._data
+
+
+class _Ctx:
+    def __init__(self, **props):
+        self._props = props
+
+    def getProperty(self, name):
+        return self._props.get(name, "")
+
+
+def _run(server, data=b"hello world", **props):
+    proc = LLMRequestProcessor()
+    ctx = _Ctx(HOST=server.host, PORT=str(server.port), **props)
+    proc.onScheduled(ctx)
+    try:
+        return proc.transform(ctx, _FF(data))
+    finally:
+        proc.onStopped(ctx)
+
+
+def test_streaming_records_ttft_and_truncation():
+    with StubLLMServer(stream_repeat=100) as srv:
+        res = _run(srv, **{"Streaming": "true", "Max Output Tokens": "3"})
+
+    assert res.relationship == "success"
+    assert bytes(res.contents) == b"echo: hello world "
+    assert res.attributes["llm.stream.tokens"] == "3"
+    assert res.attributes["llm.truncated"] == "max_tokens"
+    assert float(res.attributes["llm.ttft.ms"]) >= 0
+
+
+def test_plain_response_returned_as_utf8_bytes():
+    with StubLLMServer() as srv:
+        res = _run(srv, data="привет".encode("utf-8"))
+
+    assert res.relationship == "success", res.attributes
+    assert isinstance(res.contents, bytes)
+    assert res.contents.decode("utf-8").endswith("привет")
+
+
+class _CountingCtx(_Ctx):
+    def __init__(self, **props):
+        super().__init__(**props)
+        self.calls = 0
+
+    def getProperty(self, name):
+        self.calls += 1
+        return super().getProperty(name)
+
+
+class _AttrFF(_FF):
+    def __init__(self, data: bytes, **attributes):
+        super().__init__(data)
+        self._attributes = attributes
+
+    def getAttribute(self, name):
+        return self._attributes.get(name)
+
+
+def test_properties_resolved_once_per_schedule():
+    with StubLLMServer() as srv:
+        proc = LLMRequestProcessor()
+        ctx = _CountingCtx(
+            HOST=srv.host, PORT=str(srv.port),
+            **{
+                "System Prompt": "Тип документа: ${doc.type}",
+                "Temperature": "0.2",
+                "Prompt Template": "${content} [${doc.type}]",
+            },
+        )
+        proc.onScheduled(ctx)
+        scheduled = ctx.calls
+        try:
+            results = [proc.transform(ctx, _AttrFF(b"x", **{"doc.type": t})) for t in ("акт", "счёт")]
+        finally:
+            proc.onStopped(ctx)
+
+    # Ни одного getProperty() на FlowFile; атрибут подставляется каждый раз
+    assert ctx.calls == scheduled
+    assert [r.relationship for r in results] == ["success", "success"]
+    assert srv.last_payload["system_prompt"] == "Тип документа: счёт"
+    assert srv.last_payload["temperature"] == 0.2
+    assert srv.last_payload["prompt"] == "x [счёт]"
+
+
+def test_input_budget_truncates_and_sends_max_new_tokens():
+    text = " ".join(f"w{i:03d}" for i in range(100)).encode("utf-8")
+    with StubLLMServer() as srv:
+        res = _run(srv, text, **{
+            "Max New Tokens": "256",
+            "Max Input Tokens": "12",
+            "Input Overflow Strategy": "tail",
+            "Prompt Template": "Q: ${content}",  # 1 токен из бюджета
+        })
+
+    assert res.relationship == "success", res.attributes
+    assert res.attributes["llm.input.tokens"] == "125"
+    assert res.attributes["llm.input.truncated"] == "true"
+    assert srv.last_payload["max_new_tokens"] == 256
+    # Остаётся хвост текста: 11 токенов = 44 байта
+    assert srv.last_payload["prompt"] == "Q: " + text.decode()[-44:]
+
+
+def test_chunk_mode_maps_chunks_concurrently_and_merges():
+    text = " ".join(f"слово{i}" for i in range(200)).encode("utf-8")
+    with StubLLMServer(latency=0.05) as srv:
+        res = _run(srv, text, **{
+            "Max Input Tokens": "100",
+            "Input Overflow Strategy": "chunk",
+            "Chunk Overlap Tokens": "8",
+            "Max In-Flight Requests": "8",
+        })
+        chunks = int(res.attributes["llm.chunks"])
+        merged = _run(srv, text, **{
+            "Max Input Tokens": "100",
+            "Input Overflow Strategy": "chunk",
+            "Chunk Merge Prompt": "Объедини ответы",
+        })
+
+    assert res.relationship == "success", res.attributes
+    assert chunks > 3
+    parts = res.contents.decode("utf-8").split("\n\n")
+    assert len(parts) == chunks and all(p.startswith("echo: ") for p in parts)
+    # Чанки в исходном порядке, первое и последнее слово на месте
+    assert parts[0].startswith("echo: слово0 ") and parts[-1].endswith("слово199")
+
+    # Финальный вызов с Chunk Merge Prompt объединяет частичные ответы
+    assert merged.relationship == "success", merged.attributes
+    assert srv.last_payload["system_prompt"] == "Объедини ответы"
+    assert merged.contents.decode("utf-8").startswith("echo: echo: слово0 ")
+
+
+def test_input_budget_without_room_for_content_fails():
+    with StubLLMServer() as srv:
+        res = _run(srv, b"text", **{"System Prompt": "x" * 40, "Max Input Tokens": "10"})
+
+    assert res.relationship == "failure"
+    assert "no room" in res.attributes["llm.error"]
+    assert srv.requests == 0
+
+
+def test_httpx_client_multiplexes_flowfiles_over_http2():
+    pytest.importorskip("h2")
+    with StubH2LLMServer(latency=0.1) as srv:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(HOST=srv.host, PORT=str(srv.port), **{
+            "HTTP Client": "httpx",
+            "HTTP/2": "true",
+            "Max In-Flight Requests": "8",
+            "Max New Tokens": "32",
+        })
+        proc.onScheduled(ctx)
+        try:
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(
+                    lambda i: proc.transform(ctx, _FF(f"doc {i}".encode())), range(16)
+                ))
+        finally:
+            proc.onStopped(ctx)
+
+    # Все запросы идут потоками HTTP/2 через одно соединение
+    assert [r.relationship for r in results] == ["success"] * 16
+    assert [r.contents for r in results] == [f"echo: doc {i}".encode() for i in range(16)]
+    assert srv.connections == 1 and srv.peak_streams > 1
+    assert srv.last_payload["max_new_tokens"] == 32
+
+
+def test_httpx_client_routes_unreachable_endpoint_to_retry():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    proc = LLMRequestProcessor()
+    ctx = _Ctx(HOST="127.0.0.1", PORT=str(port), **{"HTTP Client": "httpx", "Max Retries": "0"})
+    proc.onScheduled(ctx)
+    try:
+        res = proc.transform(ctx, _FF(b"x"))
+    finally:
+        proc.onStopped(ctx)
+
+    assert res.relationship == "retry"
+
+
+def test_hedged_request_wins_on_the_fast_replica():
+    with StubLLMServer(latency=1.0) as slow, StubLLMServer(latency=0.01) as fast:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(
+            HOST=f"127.0.0.1:{slow.port}, 127.0.0.1:{fast.port}",
+            PORT="1",
+            **{"Hedge Percentile": "95", "Hedge Min Delay": "20", "Max Hedge Rate": "1"},
+        )
+        proc.onScheduled(ctx)
+        # Прогрев окна задержек: p95 = 20 мс
+        for _ in range(20):
+            proc._hedger.record(0.02)
+        try:
+            started = time.monotonic()
+            results = [proc.transform(ctx, _FF(f"doc {i}".encode())) for i in range(4)]
+            elapsed = time.monotonic() - started
+        finally:
+            proc.onStopped(ctx)
+
+    # Запросы к медленной реплике дублируются на быструю, и дубль побеждает
+    assert [r.relationship for r in results] == ["success"] * 4
+    hedged = [r.attributes for r in results if "llm.hedged" in r.attributes]
+    assert hedged and all(a["llm.hedge.won"] == "true" for a in hedged)
+    assert {r.attributes["llm.backend"] for r in results} == {f"127.0.0.1:{fast.port}"}
+    assert elapsed < 1.0
+
+
+def test_unreachable_endpoint_routes_to_retry_and_opens_circuit():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    proc = LLMRequestProcessor()
+    ctx = _Ctx(HOST="127.0.0.1", PORT=str(port), **{
+        "Max Retries": "0",
+        "Circuit Breaker Threshold": "1",
+    })
+    proc.onScheduled(ctx)
+    try:
+        first = proc.transform(ctx, _FF(b"x"))
+        second = proc.transform(ctx, _FF(b"x"))
+    finally:
+        proc.onStopped(ctx)
+
+    assert first.relationship == "retry"
+    assert second.relationship == "retry"
+    assert "circuit is open" in second.attributes["llm.error"]
+
+
+def test_requests_are_balanced_and_dead_backend_ejected():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead = sock.getsockname()[1]
+
+    with StubLLMServer() as one, StubLLMServer() as two:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(
+            HOST=f"127.0.0.1:{one.port}, 127.0.0.1:{two.port}, 127.0.0.1:{dead}",
+            PORT="1",
+            **{"Streaming": "true", "Backend Ejection Failures": "1"},
+        )
+        proc.onScheduled(ctx)
+        try:
+            results = [proc.transform(ctx, _FF(b"hi")) for _ in range(10)]
+        finally:
+            proc.onStopped(ctx)
+
+    # The dead replica costs one retry, then gets no traffic
+    assert [r.relationship for r in results] == ["success"] * 10
+    backends = {r.attributes["llm.backend"] for r in results}
+    assert backends == {f"127.0.0.1:{one.port}", f"127.0.0.1:{two.port}"}
+    assert one.requests + two.requests == 10
+    assert abs(one.requests - two.requests) <= 1
+
+
+def test_timing_attributes_and_metrics_endpoint():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    with StubLLMServer(latency=0.02) as srv:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(HOST=srv.host, PORT=str(srv.port), **{
+            "Timing Attributes": "true", "Metrics Endpoint": str(port),
+        })
+        proc.onScheduled(ctx)
+        try:
+            res = proc.transform(ctx, _FF(b"hello"))
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+                metrics = resp.read().decode("utf-8")
+        finally:
+            proc.onStopped(ctx)
+
+    assert res.relationship == "success", res.attributes
+    timing = {name.split(".")[2]: float(value) for name, value in res.attributes.items()
+              if name.startswith("llm.timing.")}
+    assert set(timing) == {"read", "decode", "attributes", "wait", "http", "parse",
+                           "encode", "total"}
+    # Время сети и инференса отделено от остальных фаз
+    assert timing["http"] >= 20
+    assert sum(v for k, v in timing.items() if k != "total") <= timing["total"] + 0.01
+    assert res.attributes["llm.bytes.in"] == "5"
+    assert res.attributes["llm.bytes.out"] == str(len(res.contents))
+    assert int(res.attributes["llm.bytes.request"]) > 5
+
+    assert ('nifi_python_phase_seconds_count{processor="LLMRequestProcessor",phase="http"}'
+            in metrics)
+    assert 'nifi_python_flowfiles_total{processor="LLMRequestProcessor",relationship="success"}' \
+        in metrics
+
+
+def test_profiler_samples_time_spent_waiting_for_llm(tmp_path):
+    with StubLLMServer(latency=0.1) as srv:
+        res = _run(srv, **{
+            "Profile Directory": str(tmp_path), "Profile Fraction": "1",
+            "Profile Max Overhead": "1",
+        })
+
+    assert res.relationship == "success", res.attributes
+    (path,) = tmp_path.glob("LLMRequestProcessor-*.collapsed")
+    stacks = path.read_text().splitlines()
+    # Сэмплы по wall-clock: видно ожидание ответа внутри call_llm()
+    assert any("transform (__init__.py:" in line and "call_llm (llm_client.py:" in line
+               for line in stacks)
+
+
+@pytest.mark.parametrize("client", ["requests", "httpx"])
+def test_warm_up_opens_connection_before_first_flowfile(client):
+    with StubLLMServer() as srv:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(HOST=srv.host, PORT=str(srv.port), **{
+            "Warm-Up": "true", "HTTP Client": client,
+        })
+        proc.onScheduled(ctx)
+        try:
+            warmed = srv.stats()
+            res = proc.transform(ctx, _FF(b"hello"))
+            after = srv.stats()
+        finally:
+            proc.onStopped(ctx)
+
+    assert warmed["requests"] == 1 and warmed["connections"] == 1
+    assert res.relationship == "success" and res.contents == b"echo: hello"
+    # Первый FlowFile идёт по уже открытому соединению
+    assert after["requests"] == 2 and after["connections"] == 1
+
+
+def test_warm_up_failure_does_not_stop_processor():
+    class _Logger:
+        def __init__(self):
+            self.warnings = []
+
+        def info(self, msg):
+            pass
+
+        def warn(self, msg):
+            self.warnings.append(msg)
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    proc = LLMRequestProcessor()
+    proc.logger = _Logger()
+    ctx = _Ctx(HOST="127.0.0.1", PORT=str(port), **{
+        "Warm-Up": "true", "Connect Timeout": "1", "Max Retries": "0",
+    })
+    proc.onScheduled(ctx)
+    try:
+        res = proc.transform(ctx, _FF(b"hello"))
+    finally:
+        proc.onStopped(ctx)
+
+    assert len(proc.logger.warnings) == 1 and "warm-up" in proc.logger.warnings[0]
+    assert res.relationship in ("failure", "retry")
+
+
+def test_batch_sends_one_request_and_splits_results():
+    with StubLLMServer() as srv:
+        proc = LLMRequestProcessor()
+        ctx = _Ctx(HOST=srv.host, PORT=str(srv.port), **{
+            "Batch Size": "4",
+            "Batch Max Wait": "1000",
+        })
+        proc.onScheduled(ctx)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(
+                    lambda i: proc.transform(ctx, _FF(f"текст {i}".encode("utf-8"))), range(4)
+                ))
+        finally:
+            proc.onStopped(ctx)
+
+    # Четыре FlowFile - один запрос со списком промптов
+    assert srv.requests == 1
+    assert sorted(srv.last_payload["prompt"]) == [f"текст {i}" for i in range(4)]
+    # Каждый FlowFile получает свой ответ
+    assert [r.relationship for r in results] == ["success"] * 4
+    assert [r.contents.decode("utf-8") for r in results] == [f"echo: текст {i}" for i in range(4)]
+
+
+def _run_twice(server, data=b"hello world", **props):
+    proc = LLMRequestProcessor()
+    ctx = _Ctx(HOST=server.host, PORT=str(server.port), **props)
+    proc.onScheduled(ctx)
+    try:
+        return proc.transform(ctx, _FF(data)), proc.transform(ctx, _FF(data))
+    finally:
+        proc.onStopped(ctx)
+
+
+def test_cache_hit_skips_http_call():
+    with StubLLMServer() as srv:
+        first, second = _run_twice(srv, **{"Response Cache Size": "10", "Temperature": "0"})
+
+    assert first.attributes["llm.cache.hit"] == "false"
+    assert second.attributes["llm.cache.hit"] == "true"
+    assert second.contents == first.contents == b"echo: hello world"
+    # Второй ответ взят из кэша, без запроса к серверу
+    assert srv.requests == 1
+
+
+def test_nonzero_temperature_bypasses_cache():
+    with StubLLMServer() as srv:
+        first, second = _run_twice(srv, **{"Response Cache Size": "10", "Temperature": "0.7"})
+
+    assert [first.relationship, second.relationship] == ["success", "success"]
+    assert "llm.cache.hit" not in first.attributes
+    assert "llm.cache.hit" not in second.attributes
+    assert srv.requests == 2
+
+
+def test_rate_limit_timeout_routes_to_retry():
+    with StubLLMServer() as srv:
+        # Один запрос на весь тест: второй FlowFile не дождётся бюджета
+        first, second = _run_twice(srv, **{
+            "Max Requests Per Second": "0.001",
+            "Read Timeout": "0.1",
+        })
+
+    assert first.relationship == "success"
+    assert second.relationship == "retry"
+    assert second.attributes["llm.error"].startswith("Rate limit")
+    assert srv.requests == 1
+
+
+def test_invalid_utf8_routes_to_failure():
+    with StubLLMServer() as srv:
+        res = _run(srv, data=b"\xff\xfe bad")
+
+    assert res.relationship == "failure"
+    assert res.attributes["llm.success"] == "false"
+    assert "utf-8" in res.attributes["llm.error"]
+    assert srv.requests == 0
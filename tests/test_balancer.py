@@ -0,0 +1,77 @@
+# tests/test_balancer.py
+import pytest
+
+from balancer import LATENCY_EWMA, LoadBalancer, parse_endpoints
+
+
+class _Clock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_endpoints():
+    assert parse_endpoints("a, b:8001 ,,c", "8000") == [
+        ("a", "8000"), ("b", "8001"), ("c", "8000"),
+    ]
+    assert parse_endpoints("", "8000") == []
+
+
+def test_requires_endpoint_and_known_strategy():
+    with pytest.raises(ValueError):
+        LoadBalancer([])
+    with pytest.raises(ValueError):
+        LoadBalancer([("a", "1")], strategy="random")
+
+
+def test_least_outstanding_spreads_and_prefers_idle():
+    lb = LoadBalancer([("a", "1"), ("b", "1"), ("c", "1")])
+    picked = [lb.acquire() for _ in range(3)]
+    assert sorted(b.host for b in picked) == ["a", "b", "c"]
+
+    # b finishes first: it is the only idle backend
+    lb.release(picked[1], 0.01, healthy=True)
+    assert lb.acquire().host == "b"
+
+
+def test_latency_ewma_prefers_fast_backend():
+    lb = LoadBalancer([("slow", "1"), ("fast", "1")], strategy=LATENCY_EWMA)
+    for latency in (1.0, 0.01):
+        backend = lb.acquire()
+        lb.release(backend, latency if backend.host == "slow" else 0.01, healthy=True)
+
+    hosts = []
+    for _ in range(5):
+        backend = lb.acquire()
+        hosts.append(backend.host)
+        lb.release(backend, 1.0 if backend.host == "slow" else 0.01, healthy=True)
+    assert hosts == ["fast"] * 5
+
+
+def test_failing_backend_is_ejected_then_readmitted():
+    clock = _Clock()
+    lb = LoadBalancer([("bad", "1"), ("good", "1")], eject_after=2, eject_for=10, clock=clock)
+    bad = lb.backends[0]
+    for _ in range(2):
+        lb.release(lb.acquire(exclude=[lb.backends[1]]), None, healthy=False)
+
+    assert bad.ejected_until == 110.0
+    assert {lb.acquire().host for _ in range(4)} == {"good"}
+
+    clock.now = 111.0
+    assert lb.acquire().host == "bad"
+
+
+def test_all_ejected_uses_soonest_and_exclude_is_soft():
+    clock = _Clock()
+    lb = LoadBalancer([("a", "1"), ("b", "1")], eject_after=1, eject_for=10, clock=clock)
+    a, b = lb.backends
+    lb.release(lb.acquire(exclude=[b]), None, healthy=False)
+    clock.now = 101.0
+    lb.release(lb.acquire(exclude=[a]), None, healthy=False)
+
+    assert lb.acquire() is a
+    # Excluding every backend falls back to all of them
+    assert lb.acquire(exclude=[a, b]) in (a, b)
@@ -0,0 +1,85 @@
+# tests/test_batcher.py
+import threading
+
+import pytest
+
+from batcher import MicroBatcher
+from llm_client import LLMBatchItemError, call_llm_batch, parse_batch_response
+from llm_stub_server import StubLLMServer
+
+
+def _call_concurrently(batcher, items):
+    results = {}
+
+    def worker(item):
+        try:
+            results[item] = batcher.call(item, timeout=5)
+        except Exception as e:
+            results[item] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_batcher_groups_concurrent_calls():
+    batches = []
+
+    def send(items):
+        batches.append(list(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(send, max_batch_size=4, max_wait=0.2)
+    try:
+        results = _call_concurrently(batcher, range(8))
+    finally:
+        batcher.close()
+
+    assert results == {i: i * 10 for i in range(8)}
+    assert sorted(len(b) for b in batches) == [4, 4]
+
+
+def test_batcher_flushes_partial_batch_after_max_wait():
+    batcher = MicroBatcher(lambda items: list(items), max_batch_size=100, max_wait=0.01)
+    try:
+        assert batcher.call("x", timeout=1) == "x"
+    finally:
+        batcher.close()
+
+
+def test_batcher_routes_item_errors_individually():
+    def send(items):
+        return [ValueError("bad") if i == 2 else i for i in items]
+
+    batcher = MicroBatcher(send, max_batch_size=3, max_wait=0.2)
+    try:
+        results = _call_concurrently(batcher, [1, 2, 3])
+    finally:
+        batcher.close()
+
+    assert results[1] == 1 and results[3] == 3
+    assert isinstance(results[2], ValueError)
+
+
+def test_parse_batch_response_rejects_count_mismatch():
+    with pytest.raises(ValueError):
+        parse_batch_response({"results": [{"text": "a"}]}, expected=2)
+
+
+def test_call_llm_batch_demultiplexes_results():
+    with StubLLMServer(fail_prompts={"bad"}) as srv:
+        results = call_llm_batch(
+            host=srv.host,
+            port=str(srv.port),
+            system_prompt="",
+            temperature=0.0,
+            user_texts=["a", "bad", "c"],
+        )
+
+    assert srv.requests == 1
+    assert results[0] == "echo: a"
+    assert isinstance(results[1], LLMBatchItemError)
+    assert results[2] == "echo: c"
@@ -0,0 +1,38 @@
+# tests/test_content_io.py
+import pytest
+
+from content_io import decode_text, read_content, to_contents
+
+
+class _FF:
+    def __init__(self, data):
+        self._data = data
+
+    def getContentsAsBytes(self):
+        return self._data
+
+
+def test_read_content_keeps_bytes_object():
+    data = b'{"a": 1}'
+    assert read_content(_FF(data)) is data
+    assert read_content(_FF(None)) == b""
+    assert read_content(_FF(memoryview(b"xy"))) == b"xy"
+
+
+def test_decode_text_is_strict_utf8():
+    assert decode_text(memoryview("й".encode("utf-8"))) == "й"
+    with pytest.raises(UnicodeDecodeError):
+        decode_text(b"\xff")
+
+
+def test_to_contents():
+    data = bytearray(b"abc")
+    assert to_contents(data) is data
+    assert to_contents("й") == "й".encode("utf-8")
+    assert to_contents(None) is None
+
+    base = b"abcdef"
+    assert to_contents(memoryview(base)) is base
+    assert to_contents(memoryview(base)[1:3]) == b"bc"
+    with pytest.raises(TypeError):
+        to_contents(1)
@@ -0,0 +1,47 @@
+# tests/test_dispatcher.py
+import threading
+import time
+
+import pytest
+
+from dispatcher import DispatcherFullError, InFlightDispatcher
+
+
+def test_submit_limits_concurrency():
+    dispatcher = InFlightDispatcher(max_in_flight=3, max_queued=10)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(i):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return i * 2
+
+    try:
+        futures = [dispatcher.submit(work, i) for i in range(10)]
+        assert [f.result() for f in futures] == [i * 2 for i in range(10)]
+    finally:
+        dispatcher.shutdown()
+
+    assert peak == 3
+    assert dispatcher.pending == 0
+
+
+def test_submit_applies_backpressure_when_full():
+    dispatcher = InFlightDispatcher(max_in_flight=1, max_queued=1)
+    release = threading.Event()
+    try:
+        dispatcher.submit(release.wait)
+        dispatcher.submit(release.wait)
+        with pytest.raises(DispatcherFullError):
+            dispatcher.submit(release.wait, timeout=0.05)
+    finally:
+        release.set()
+        dispatcher.shutdown()
+
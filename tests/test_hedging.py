@@ -0,0 +1,151 @@
+# tests/test_hedging.py
+import threading
+import time
+
+import pytest
+
+from hedging import CallCancelled, Hedger, current_scope, wait_cancellable
+
+
+def _warm(hedger, latency=0.01, samples=20):
+    for _ in range(samples):
+        hedger.record(latency)
+
+
+def test_delay_is_percentile_of_recent_latencies():
+    hedger = Hedger(percentile=90, min_delay=0.0, min_samples=10)
+    try:
+        assert hedger.delay is None
+        for ms in range(1, 11):
+            hedger.record(ms / 1000)
+        assert hedger.delay == pytest.approx(0.009)
+
+        floor = Hedger(percentile=50, min_delay=0.5, min_samples=1)
+        floor.record(0.01)
+        assert floor.delay == 0.5
+        floor.close()
+    finally:
+        hedger.close()
+
+
+def test_no_hedge_while_warming_up_or_fast():
+    hedger = Hedger(max_rate=1.0)
+    try:
+        hedge_calls = []
+        result, hedged = hedger.call(lambda: "primary", lambda: hedge_calls.append(1))
+        assert (result, hedged) == ("primary", None)
+
+        _warm(hedger)
+        result, hedged = hedger.call(lambda: "primary", lambda: hedge_calls.append(1))
+        assert (result, hedged) == ("primary", None)
+        assert hedge_calls == [] and hedger.hedges == 0
+    finally:
+        hedger.close()
+
+
+def test_slow_primary_loses_to_hedge_and_is_cancelled():
+    hedger = Hedger(percentile=50, min_delay=0.0, max_rate=1.0)
+    _warm(hedger)
+    cancelled = threading.Event()
+
+    def slow():
+        scope = current_scope()
+        deadline = time.monotonic() + 2
+        while not scope.cancelled and time.monotonic() < deadline:
+            time.sleep(0.005)
+        if scope.cancelled:
+            cancelled.set()
+        return "slow"
+
+    try:
+        started = time.monotonic()
+        result, hedged = hedger.call(slow, lambda: "fast")
+        assert (result, hedged) == ("fast", True)
+        assert time.monotonic() - started < 0.5
+        assert cancelled.wait(1)
+        assert (hedger.hedges, hedger.wins) == (1, 1)
+    finally:
+        hedger.close()
+
+
+def test_hedge_rate_is_capped():
+    hedger = Hedger(percentile=50, min_delay=0.0, max_rate=0.25)
+    _warm(hedger)
+
+    def slow():
+        time.sleep(0.05)
+        return "slow"
+
+    try:
+        results = [hedger.call(slow, lambda: "fast") for _ in range(8)]
+    finally:
+        hedger.close()
+
+    # 8 requests earn 2 hedge tokens
+    assert [hedged for _, hedged in results].count(True) == 2
+    assert hedger.hedges == 2
+
+
+def test_refused_hedge_is_not_counted():
+    hedger = Hedger(percentile=50, min_delay=0.0, max_rate=0.5)
+    _warm(hedger)
+    hedge_calls = []
+
+    def slow():
+        time.sleep(0.05)
+        return "slow"
+
+    try:
+        # Two requests earn one hedge token; admit() refuses the hedge
+        hedger.call(slow, lambda: "fast")
+        result, hedged = hedger.call(slow, lambda: hedge_calls.append(1), admit=lambda: False)
+        assert (result, hedged) == ("slow", None)
+        assert hedge_calls == [] and hedger.hedges == 0
+        # The hedge token was kept: the next call may hedge
+        result, hedged = hedger.call(slow, lambda: "fast", admit=lambda: True)
+        assert (result, hedged) == ("fast", True)
+        assert hedger.hedges == 1
+    finally:
+        hedger.close()
+
+
+def test_both_failing_raises_primary_error():
+    hedger = Hedger(percentile=50, min_delay=0.0, max_rate=1.0)
+    _warm(hedger)
+
+    def primary():
+        time.sleep(0.05)
+        raise ValueError("primary")
+
+    def hedge():
+        raise KeyError("hedge")
+
+    try:
+        with pytest.raises(ValueError, match="primary"):
+            hedger.call(primary, hedge)
+    finally:
+        hedger.close()
+
+
+def test_wait_cancellable_outside_and_inside_a_scope():
+    from concurrent.futures import Future
+
+    done = Future()
+    done.set_result(1)
+    assert wait_cancellable(done) == 1
+
+    hedger = Hedger(percentile=50, min_delay=0.0, max_rate=1.0)
+    _warm(hedger)
+    pending = Future()
+
+    def waits_forever():
+        return wait_cancellable(pending)
+
+    try:
+        result, hedged = hedger.call(waits_forever, lambda: "hedge")
+        assert (result, hedged) == ("hedge", True)
+        # The loser's future was cancelled through its scope
+        assert pending.cancelled()
+    finally:
+        hedger.close()
+    assert issubclass(CallCancelled, RuntimeError)
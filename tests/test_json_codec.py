@@ -0,0 +1,88 @@
+# tests/test_json_codec.py
+import json
+
+import pytest
+
+from json_codec import available_codecs, get_codec
+
+CODECS = available_codecs()
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+DUMPS_CASES = [
+    {},
+    {"1": "c", "й": "b", "None": "d", "True": "e"},
+    {"s": "\x00\x1f\x7f\"\\/ \u2028 \U0001F600", "n": [0, -1, 2 ** 64, -2 ** 70]},
+    {"f": [1.0, 1e16, 1e-05, 0.1, float("nan"), float("inf")]},
+    # True and 1 are the same dict key, so each non-str key type gets its own case
+    {1: "int key"},
+    {True: "bool key"},
+    {None: "none key"},
+    {1.5: "float key"},
+    [("tuple", 1), {"deep": [[[{"x": None}]]]}],
+    "plain string",
+    12345678901234567890123,
+]
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("obj", DUMPS_CASES)
+def test_dumps_is_byte_identical_to_stdlib(name, obj):
+    assert get_codec(name).dumps(obj) == _stdlib_dumps(obj)
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_dumps_errors_like_stdlib(name):
+    codec = get_codec(name)
+    with pytest.raises(UnicodeEncodeError):
+        codec.dumps({"a": "\ud800"})
+    with pytest.raises(TypeError):
+        codec.dumps({"a": object()})
+
+
+LOADS_CASES = [
+    b'{"a": 1, "b": [true, false, null], "c": "\\u00e9\xd0\xb6"}',
+    b'{"a": 1, "b": 2, "a": 3}',
+    b'{"nan": NaN, "inf": -Infinity, "big": 123456789012345678901234567890}',
+    b'{"f": 1.5e300, "g": -0.0, "h": 1E400}',
+    b"  [1, 2.5, \"x\"]  ",
+]
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("data", LOADS_CASES)
+def test_loads_matches_stdlib(name, data):
+    expected = json.loads(data.decode("utf-8"))
+    result = get_codec(name).loads(data)
+    assert json.dumps(result) == json.dumps(expected)
+    assert list(result) == list(expected)
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("data, error", [
+    (b"\xef\xbb\xbf{}", json.JSONDecodeError),            # UTF-8 BOM
+    ('{"a": 1}'.encode("utf-16"), UnicodeDecodeError),     # not UTF-8
+    (b'{"a": \xff}', UnicodeDecodeError),
+    (b'{"a": 1,}', json.JSONDecodeError),
+    (b"", json.JSONDecodeError),
+])
+def test_loads_errors_like_stdlib(name, data, error):
+    with pytest.raises(error):
+        get_codec(name).loads(data)
+
+
+def test_loads_accepts_str_and_memoryview():
+    for name in CODECS:
+        codec = get_codec(name)
+        assert codec.loads('{"a": "é"}') == {"a": "é"}
+        assert codec.loads(memoryview(b'{"a": 1}')) == {"a": 1}
+
+
+def test_unknown_codec_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        get_codec("simdjson")
+    monkeypatch.setenv("NIFI_JSON_CODEC", "json")
+    assert get_codec().name == "json"
@@ -0,0 +1,68 @@
+# tests/test_llm_async_client.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from llm_async_client import AsyncLLMClient, call_llm_batch_httpx, call_llm_httpx
+from llm_stub_server import StubH2LLMServer, StubLLMServer
+
+
+def _call(server, client, user_text="ping"):
+    return call_llm_httpx(
+        host=server.host,
+        port=str(server.port),
+        system_prompt="",
+        temperature=0.0,
+        user_text=user_text,
+        session=client,
+        max_new_tokens=64,
+    )
+
+
+@pytest.mark.parametrize("shape", ["response", "generated_text", "results"])
+def test_http1_understands_response_shapes(shape):
+    client = AsyncLLMClient(http2=False)
+    try:
+        with StubLLMServer(shape=shape) as srv:
+            assert _call(srv, client) == "echo: ping"
+            assert srv.last_payload["max_new_tokens"] == 64
+    finally:
+        client.close()
+    client.close()  # idempotent
+
+
+def test_batch_and_http_errors():
+    client = AsyncLLMClient(http2=False)
+    try:
+        with StubLLMServer(fail_prompts={"bad"}) as srv:
+            texts = call_llm_batch_httpx(
+                srv.host, str(srv.port), "", 0.0, ["a", "bad"], session=client
+            )
+            with pytest.raises(httpx.HTTPStatusError):
+                client.run(client.post(f"http://{srv.host}:{srv.port}/nope", b"{}", 1.0, 1.0))
+    finally:
+        client.close()
+
+    assert texts[0] == "echo: a"
+    assert "rejected" in str(texts[1])
+
+
+def test_http2_multiplexes_concurrent_calls_over_one_connection():
+    pytest.importorskip("h2")
+    client = AsyncLLMClient(max_connections=4, http2=True)
+    try:
+        with StubH2LLMServer(latency=0.2) as srv:
+            started = time.monotonic()
+            with ThreadPoolExecutor(32) as pool:
+                results = list(pool.map(lambda i: _call(srv, client, f"p{i}"), range(32)))
+            elapsed = time.monotonic() - started
+    finally:
+        client.close()
+
+    assert client.http2
+    assert results == [f"echo: p{i}" for i in range(32)]
+    assert srv.connections == 1
+    assert srv.peak_streams > 16
+    assert elapsed < 32 * 0.2 / 4
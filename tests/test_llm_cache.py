@@ -0,0 +1,61 @@
+# tests/test_llm_cache.py
+from llm_cache import ResponseCache, cache_key
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_depends_on_every_field():
+    base = dict(endpoint="http://h:1/generate", system_prompt="s",
+                temperature=0.0, max_new_tokens=100, user_text="u")
+    key = cache_key(**base)
+    assert key == cache_key(**base)
+    for field, other in [("endpoint", "http://h:2/generate"), ("system_prompt", "t"),
+                         ("temperature", 0.5), ("max_new_tokens", 50), ("user_text", "v")]:
+        assert cache_key(**dict(base, **{field: other})) != key
+
+
+def test_lru_eviction_and_counters():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"      # 'a' is now most recently used
+    cache.put("c", "3")               # evicts 'b'
+
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert len(cache) == 2
+
+
+def test_ttl_expiry():
+    clock = _Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put("a", "1")
+    clock.now += 9
+    assert cache.get("a") == "1"
+    clock.now += 2
+    assert cache.get("a") is None
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    clock = _Clock()
+
+    cache = ResponseCache(max_entries=2, ttl=60, path=path, clock=clock)
+    for key, value in [("a", "1"), ("b", "2"), ("c", "3")]:
+        cache.put(key, value)         # disk is bounded too: 'c' drops 'a'
+        clock.now += 1
+    cache.close()
+
+    reopened = ResponseCache(max_entries=2, ttl=60, path=path, clock=clock)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == "3"
+    clock.now += 60
+    assert reopened.get("b") is None
+    reopened.close()
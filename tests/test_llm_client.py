@@ -0,0 +1,71 @@
+# tests/test_llm_client.py
+import pytest
+
+from json_codec import dumps
+from llm_client import build_payload, call_llm, create_session, parse_response, request_template
+from llm_stub_server import StubLLMServer
+
+
+@pytest.fixture
+def server():
+    with StubLLMServer() as srv:
+        yield srv
+
+
+def _call(server, **kwargs):
+    return call_llm(
+        host=server.host,
+        port=str(server.port),
+        system_prompt="",
+        temperature=0.0,
+        user_text="ping",
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("shape", ["response", "generated_text", "results"])
+def test_call_llm_understands_response_shapes(shape):
+    with StubLLMServer(shape=shape) as srv:
+        assert _call(srv) == "echo: ping"
+
+
+def test_session_reuses_one_connection(server):
+    session = create_session(pool_maxsize=2)
+    try:
+        for _ in range(5):
+            assert _call(server, session=session) == "echo: ping"
+    finally:
+        session.close()
+
+    assert server.requests == 5
+    assert server.connections == 1
+
+
+def test_keep_alive_disabled_opens_new_connections(server):
+    session = create_session(keep_alive=False)
+    try:
+        for _ in range(3):
+            _call(server, session=session)
+    finally:
+        session.close()
+
+    assert server.connections == 3
+
+
+@pytest.mark.parametrize("prompt", ["ping", "привет \"q\"\n", ["a", "б"]])
+def test_request_template_body_matches_full_payload(prompt):
+    system_prompt = "Ответь кратко: \U0001F600"
+    expected = build_payload(prompt, system_prompt, 0.7)
+    assert request_template(system_prompt, 0.7).body(prompt) == dumps(expected)
+
+    expected["stream"] = True
+    assert request_template(system_prompt, 0.7, stream=True).body(prompt) == dumps(expected)
+    assert request_template(system_prompt, 0.7) is request_template(system_prompt, 0.7)
+
+    expected = build_payload(prompt, system_prompt, 0.7, max_new_tokens=512)
+    assert expected["max_new_tokens"] == 512
+    assert request_template(system_prompt, 0.7, max_new_tokens=512).body(prompt) == dumps(expected)
+
+
+def test_unknown_response_shape_falls_back_to_json_text():
+    assert parse_response({"answer": "привет"}) == '{"answer":"привет"}'
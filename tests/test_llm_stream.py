@@ -0,0 +1,77 @@
+# tests/test_llm_stream.py
+import time
+
+import pytest
+import requests
+
+from llm_client import call_llm_stream
+from llm_stub_server import StubLLMServer
+
+
+def _stream(server, **kwargs):
+    return call_llm_stream(
+        host=server.host,
+        port=str(server.port),
+        system_prompt="",
+        temperature=0.0,
+        user_text="one two three",
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("stream_format", ["sse", "ndjson", "raw"])
+def test_stream_collects_all_tokens(stream_format):
+    with StubLLMServer(stream_format=stream_format) as srv:
+        result = _stream(srv)
+
+    assert bytes(result.content) == b"echo: one two three "
+    assert result.truncated is None
+    assert result.ttft is not None and result.ttft >= 0
+    if stream_format != "raw":
+        assert result.tokens == 4
+
+
+def test_stream_stops_at_token_budget():
+    with StubLLMServer(stream_repeat=1000) as srv:
+        result = _stream(srv, max_tokens=5)
+
+    assert result.tokens == 5
+    assert result.truncated == "max_tokens"
+    assert bytes(result.content) == b"echo: one two three echo: "
+
+
+def test_stream_stops_at_byte_budget_on_token_boundary():
+    with StubLLMServer(stream_repeat=1000) as srv:
+        result = _stream(srv, max_bytes=12)
+
+    assert bytes(result.content) == b"echo: one "
+    assert result.truncated == "max_bytes"
+
+
+def test_stream_deadline_keeps_partial_output():
+    with StubLLMServer(stream_repeat=1000, token_latency=0.01) as srv:
+        result = _stream(srv, deadline=0.1)
+
+    assert result.truncated == "deadline"
+    assert 0 < result.tokens < 4000
+    assert bytes(result.content).startswith(b"echo: ")
+
+
+def test_stream_deadline_caps_a_stalled_read():
+    # The gap between tokens is far longer than the deadline: the read is
+    # cut at the deadline, not after the whole read_timeout
+    with StubLLMServer(token_latency=1.0) as srv:
+        started = time.monotonic()
+        result = _stream(srv, deadline=0.2, read_timeout=10.0)
+        elapsed = time.monotonic() - started
+
+    assert result.truncated == "deadline"
+    assert result.tokens == 0
+    assert elapsed < 0.8
+
+
+def test_stream_absolute_deadline_is_shared_by_retries():
+    with StubLLMServer() as srv:
+        with pytest.raises(requests.Timeout):
+            _stream(srv, deadline_at=time.monotonic() - 0.1)
+        assert srv.requests == 0
@@ -0,0 +1,93 @@
+# tests/test_llm_stub_server.py
+import random
+import threading
+
+import pytest
+import requests
+
+from llm_client import call_llm
+from llm_stub_server import StubLLMServer, parse_latency
+
+
+def _post(server, prompt="ping", system_prompt=""):
+    return requests.post(
+        f"http://{server.host}:{server.port}/generate",
+        json={"prompt": prompt, "system_prompt": system_prompt}, timeout=5,
+    )
+
+
+def _call(server, prompt="ping"):
+    return call_llm(server.host, str(server.port), "", 0.0, prompt)
+
+
+@pytest.mark.parametrize("spec", [
+    "0.05", "uniform:0.01,0.02", "normal:0.1,0.5", "lognormal:0.1,0.5", "exp:0.1",
+    "bimodal:0.01,0.5,0.1",
+])
+def test_latency_distributions_are_non_negative(spec):
+    sample = parse_latency(spec, random.Random(0))
+    values = [sample() for _ in range(200)]
+    assert min(values) >= 0
+
+
+def test_latency_bimodal_share_and_bad_specs():
+    sample = parse_latency("bimodal:0.01,0.5,0.1", random.Random(0))
+    slow = sum(sample() == 0.5 for _ in range(2000))
+    assert 100 < slow < 300
+
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+    with pytest.raises(ValueError):
+        parse_latency("uniform:1")
+
+
+def test_injected_failures_carry_retry_after():
+    with StubLLMServer(fail_first=2, error_status=429, retry_after=0.5) as srv:
+        first, second, third = _post(srv), _post(srv), _post(srv)
+    assert [first.status_code, second.status_code, third.status_code] == [429, 429, 200]
+    assert first.headers["Retry-After"] == "0.5"
+    assert srv.stats()["errors_injected"] == 2
+
+
+def test_error_rate_is_seeded():
+    with StubLLMServer(error_rate=0.5, seed=1) as srv:
+        statuses = [_post(srv).status_code for _ in range(40)]
+    assert set(statuses) == {200, 503}
+    assert statuses.count(503) == srv.errors_injected
+
+
+def test_concurrency_limit_queues_then_rejects():
+    with StubLLMServer(latency=0.2, max_concurrency=2, max_queue=1) as srv:
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(_post(srv).status_code))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    # 2 answered at once, 1 waited for a slot, 2 rejected
+    assert sorted(statuses) == [200, 200, 200, 429, 429]
+    assert srv.peak_active == 2 and srv.rejected == 2
+
+
+def test_batched_requests_add_latency_per_prompt():
+    with StubLLMServer(item_latency=0.05) as srv:
+        resp = requests.post(f"http://{srv.host}:{srv.port}/generate",
+                             json={"prompt": ["a", "b", "c", "d"]}, timeout=5)
+    assert resp.elapsed.total_seconds() >= 0.2
+    assert [r["text"] for r in resp.json()["results"]] == ["echo: a", "echo: b", "echo: c", "echo: d"]
+
+
+def test_record_through_upstream_then_replay(tmp_path):
+    recording = tmp_path / "exchanges.ndjson"
+    with StubLLMServer(shape="generated_text") as real:
+        upstream = f"http://{real.host}:{real.port}/generate"
+        with StubLLMServer(upstream=upstream, record_path=str(recording)) as proxy:
+            assert _call(proxy, "hello") == "echo: hello"
+    assert real.requests == 1 and proxy.recorded == 1
+
+    # The recorded answer is served without the upstream
+    with StubLLMServer(replay_path=str(recording)) as replay:
+        assert _post(replay, "hello").json() == {"generated_text": "echo: hello"}
+        assert _call(replay, "other") == "echo: other"
+    assert replay.replayed == 1 and replay.replay_misses == 1
@@ -0,0 +1,60 @@
+# tests/test_llm_tokens.py
+import pytest
+
+from llm_tokens import (
+    TRUNCATION_MARKER,
+    estimate_tokens,
+    split_tokens,
+    truncate_tokens,
+)
+
+
+def test_estimate_tokens_counts_utf8_bytes():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("привет") == 3  # 12 bytes
+
+
+def test_truncate_strategies():
+    text = " ".join(f"w{i:03d}" for i in range(100))
+    assert truncate_tokens(text, 1000) is text
+
+    head = truncate_tokens(text, 10)
+    assert head == text[:40]
+    assert truncate_tokens(text, 10, "tail") == text[-40:]
+
+    both = truncate_tokens(text, 10, "head+tail")
+    assert both.startswith("w000") and both.endswith("w099")
+    assert TRUNCATION_MARKER in both
+    assert estimate_tokens(both) <= 10
+
+    with pytest.raises(ValueError):
+        truncate_tokens(text, 10, "middle")
+
+
+@pytest.mark.parametrize("strategy", ["head", "tail", "head+tail"])
+def test_truncate_cuts_on_character_boundaries(strategy):
+    text = "жёлтый🙂" * 50
+    for budget in range(1, 40):
+        cut = truncate_tokens(text, budget, strategy)
+        assert estimate_tokens(cut) <= budget
+        assert cut.replace(TRUNCATION_MARKER, "") in text or strategy == "head+tail"
+
+
+def test_split_tokens_overlapping_chunks():
+    words = [f"слово{i}" for i in range(500)]
+    text = " ".join(words)
+    assert split_tokens("short", 10) == ["short"]
+
+    chunks = split_tokens(text, 50, overlap_tokens=10)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    # Chunks end on word boundaries, every word is kept, neighbours overlap
+    assert all(chunk.endswith(" ") for chunk in chunks[:-1])
+    assert chunks[0].startswith("слово0 ") and chunks[-1].endswith("слово499")
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.split()[0] in prev.split()
+    assert set(" ".join(chunks).split()) == set(words)
+
+    no_overlap = split_tokens(text, 50)
+    assert "".join(no_overlap) == text
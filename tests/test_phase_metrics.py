@@ -0,0 +1,109 @@
+# tests/test_phase_metrics.py
+import socket
+import time
+import urllib.request
+
+from phase_metrics import (
+    NULL_TIMER,
+    MetricsRegistry,
+    PhaseTimer,
+    ProcessorMetrics,
+    parse_address,
+)
+
+
+class _Result:
+    def __init__(self, relationship="success"):
+        self.relationship = relationship
+        self.attributes = {"keep": "me"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_laps_add_up_and_exclude_nested_phases():
+    timer = PhaseTimer()
+    time.sleep(0.01)
+    timer.lap("read")
+    timer.add("http", 0.02)
+    time.sleep(0.03)
+    timer.lap("wait", exclude=("http",))
+    timer.size("in", 10)
+    timer.size("in", 5)
+    total = timer.finish()
+
+    assert timer.phases["read"] >= 0.01
+    # 30 ms lap minus the 20 ms of nested HTTP time
+    assert 0.005 <= timer.phases["wait"] < 0.03
+    assert timer.sizes == {"in": 15}
+    assert total >= timer.phases["read"] + timer.phases["wait"]
+
+    attributes = timer.attributes("llm")
+    assert set(attributes) == {
+        "llm.timing.read.ms", "llm.timing.http.ms", "llm.timing.wait.ms",
+        "llm.timing.total.ms", "llm.bytes.in",
+    }
+    assert attributes["llm.timing.http.ms"] == "20.000"
+
+
+def test_null_timer_records_nothing():
+    NULL_TIMER.lap("read")
+    NULL_TIMER.lap("wait", exclude=("http",))
+    NULL_TIMER.add("http", 1.0)
+    NULL_TIMER.size("in", 1)
+
+
+def test_registry_renders_prometheus_histograms():
+    registry = MetricsRegistry()
+    for seconds, relationship in ((0.0002, "success"), (0.003, "success"), (120.0, "failure")):
+        timer = PhaseTimer()
+        timer.add("http", seconds)
+        timer.size("in", 2000)
+        registry.observe('Proc"1', timer, relationship)
+
+    text = registry.render()
+    lines = text.splitlines()
+    assert "# TYPE nifi_python_phase_seconds histogram" in lines
+    assert 'nifi_python_phase_seconds_bucket{processor="Proc\\"1",phase="http",le="0.00025"} 1' in lines
+    assert 'nifi_python_phase_seconds_bucket{processor="Proc\\"1",phase="http",le="0.005"} 2' in lines
+    assert 'nifi_python_phase_seconds_bucket{processor="Proc\\"1",phase="http",le="+Inf"} 3' in lines
+    assert 'nifi_python_phase_seconds_count{processor="Proc\\"1",phase="http"} 3' in lines
+    assert 'nifi_python_payload_bytes_bucket{processor="Proc\\"1",kind="in",le="4096"} 3' in lines
+    assert 'nifi_python_flowfiles_total{processor="Proc\\"1",relationship="failure"} 1' in lines
+
+
+def test_parse_address():
+    assert parse_address("9464") == ("127.0.0.1", 9464)
+    assert parse_address("0.0.0.0:9464") == ("0.0.0.0", 9464)
+
+
+def test_endpoint_is_shared_and_stopped_by_last_user(tmp_path):
+    registry = MetricsRegistry()
+    port = _free_port()
+    first = ProcessorMetrics("A", "a", endpoint=str(port), registry=registry)
+    second = ProcessorMetrics("B", "b", attributes=True, endpoint=str(port), registry=registry)
+
+    result = second.finish(PhaseTimer(), _Result())
+    assert result.attributes["keep"] == "me" and "b.timing.total.ms" in result.attributes
+
+    first.close()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+        body = resp.read().decode("utf-8")
+    assert 'nifi_python_flowfiles_total{processor="B",relationship="success"} 1' in body
+
+    second.close()
+    # Port released: it can be bound again (as a restarted processor would)
+    with socket.socket() as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("127.0.0.1", port))
+
+
+def test_metrics_file_written_on_close(tmp_path):
+    path = tmp_path / "nifi.prom"
+    metrics = ProcessorMetrics("A", "a", path=str(path), registry=MetricsRegistry())
+    metrics.finish(PhaseTimer(), _Result("failure"))
+    metrics.close()
+    assert 'nifi_python_flowfiles_total{processor="A",relationship="failure"} 1' in path.read_text()
@@ -0,0 +1,98 @@
+# tests/test_prompt_template.py
+import pytest
+
+from prompt_template import PromptTemplate
+from request_config import RequestConfig
+
+
+class _FF:
+    def __init__(self, **attributes):
+        self.attributes = attributes
+        self.lookups = 0
+
+    def getAttribute(self, name):
+        self.lookups += 1
+        return self.attributes.get(name)
+
+
+class _Ctx:
+    def __init__(self, **props):
+        self.props = props
+        self.calls = 0
+
+    def getProperty(self, name):
+        self.calls += 1
+        return self.props.get(name, "")
+
+
+def test_static_text_renders_as_is():
+    template = PromptTemplate("Кратко, без ${ ")
+    assert template.is_static
+    assert template.render({}) == "Кратко, без ${ "
+
+
+def test_placeholders():
+    template = PromptTemplate("${doc.type}: answer in ${ lang }, ${lang}! ${content}")
+    assert template.attributes == ("doc.type", "lang", "content")
+    assert template.render({"doc.type": "a", "lang": "b", "content": "c"}) == "a: answer in b, b! c"
+
+    prompt = PromptTemplate("${doc.type}: ${content}", content=True)
+    assert prompt.attributes == ("doc.type",)
+    assert prompt.uses_content and not prompt.is_static
+    assert prompt.render({"doc.type": "акт"}, "текст") == "акт: текст"
+
+
+def test_request_config_static_and_dynamic():
+    ctx = _Ctx(**{"System Prompt": "Будь краток", "Temperature": "0"})
+    config = RequestConfig.from_context(ctx)
+    assert config.template is not None
+    flowfile = _FF()
+    assert config.resolve_attributes(flowfile) == ("Будь краток", 0.0, {})
+    assert config.render_prompt({}, "text") == "text"
+    assert ctx.calls == 4
+    assert flowfile.lookups == 0
+
+    dynamic = RequestConfig.from_context(
+        _Ctx(**{"System Prompt": "Язык: ${lang}", "Temperature": "${t}"})
+    )
+    assert dynamic.template is None
+    assert dynamic.resolve_attributes(_FF(lang="ru", t="0.2"))[:2] == ("Язык: ru", 0.2)
+    # Unparsable temperature falls back to the default
+    assert dynamic.resolve_attributes(_FF(t="hot"))[:2] == ("Язык: ", 0.7)
+
+
+def test_prompt_template_and_system_prompt_cache():
+    config = RequestConfig.from_context(_Ctx(**{
+        "System Prompt": "Тип: ${doc.type}",
+        "Prompt Template": "[${lang}] ${content} (${doc.type})",
+    }))
+    # Shared attributes are read once per FlowFile
+    assert config.attributes == ("doc.type", "lang")
+
+    first = _FF(**{"doc.type": "акт", "lang": "ru"})
+    system_prompt, temperature, values = config.resolve_attributes(first)
+    assert (system_prompt, temperature) == ("Тип: акт", 0.7)
+    assert config.render_prompt(values, "текст") == "[ru] текст (акт)"
+    assert first.lookups == 2
+
+    again, _, _ = config.resolve_attributes(_FF(**{"doc.type": "акт"}))
+    other, _, _ = config.resolve_attributes(_FF(**{"doc.type": "счёт"}))
+    assert again == "Тип: акт" and other == "Тип: счёт"
+    info = config.render_system_prompt.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+@pytest.mark.parametrize("text", [
+    "${filename:toUpper()}",
+    "Type: ${literal('x')}",
+    "${a:equals(${b})}",
+    "${ 'doc type' }",
+])
+def test_expression_language_is_rejected_not_blanked(text):
+    with pytest.raises(ValueError, match="Expression Language"):
+        PromptTemplate(text, content=True)
+
+
+def test_request_config_rejects_expression_language():
+    with pytest.raises(ValueError, match="filename:toUpper"):
+        RequestConfig.from_context(_Ctx(**{"System Prompt": "Файл: ${filename:toUpper()}"}))
@@ -0,0 +1,88 @@
+# tests/test_rate_limit.py
+import pytest
+
+from llm_tokens import estimate_tokens
+from rate_limit import RateLimiter, RateLimitTimeout, SharedTokenBucket, TokenBucket
+
+
+class _Clock:
+    """Fake clock; sleeping just advances time."""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("привет") == 3   # 12 UTF-8 bytes
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    clock = _Clock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        assert bucket.try_acquire(1) == 0.0
+    assert bucket.try_acquire(1) == pytest.approx(0.1)
+
+    assert bucket.acquire(3)
+    assert clock.now == pytest.approx(100.3)
+
+
+def test_bucket_times_out():
+    clock = _Clock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire(1, timeout=0)
+    assert not bucket.acquire(1, timeout=0.5)
+
+
+def test_limiter_raises_when_token_budget_missing():
+    clock = _Clock()
+    limiter = RateLimiter(
+        requests=TokenBucket(rate=100, capacity=100, clock=clock, sleep=clock.sleep),
+        tokens=TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep),
+    )
+    limiter.acquire(10, timeout=0)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(10, timeout=0.5)
+
+
+def test_limiter_gives_back_request_slot_on_token_timeout():
+    clock = _Clock()
+    requests = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+    limiter = RateLimiter(
+        requests=requests,
+        tokens=TokenBucket(rate=1, capacity=10, clock=clock, sleep=clock.sleep),
+    )
+    limiter.acquire(10, timeout=0)
+    clock.now += 1.0
+    with pytest.raises(RateLimitTimeout, match="token budget"):
+        limiter.acquire(10, timeout=0)
+    # No call was made: the request slot is still there
+    assert requests.try_acquire(1) == 0.0
+
+
+def test_shared_bucket_state_is_shared_through_file(tmp_path):
+    clock = _Clock()
+    path = str(tmp_path / "llm.ratelimit")
+    first = SharedTokenBucket(path, rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+    second = SharedTokenBucket(path, rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+    other_slot = SharedTokenBucket(path, rate=1, capacity=2, slot=1, clock=clock)
+    try:
+        assert first.try_acquire(1) == 0.0
+        assert second.try_acquire(1) == 0.0
+        assert first.try_acquire(1) > 0        # budget used up by both
+        assert other_slot.try_acquire(2) == 0.0
+        second.release(1)
+        assert first.try_acquire(1) == 0.0      # given back through the file
+    finally:
+        for bucket in (first, second, other_slot):
+            bucket.close()
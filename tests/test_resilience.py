@@ -0,0 +1,137 @@
+# tests/test_resilience.py
+import httpx
+import pytest
+import requests
+
+from rate_limit import RateLimiter, RateLimitTimeout, TokenBucket
+from resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    call_with_retry,
+    is_retryable,
+    retry_after_seconds,
+)
+
+
+def _http_error(status, retry_after=None):
+    resp = requests.Response()
+    resp.status_code = status
+    if retry_after is not None:
+        resp.headers["Retry-After"] = retry_after
+    return requests.HTTPError(f"{status}", response=resp)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_is_retryable_classification():
+    assert is_retryable(requests.ConnectionError())
+    assert is_retryable(requests.Timeout())
+    assert is_retryable(_http_error(503))
+    assert is_retryable(_http_error(429))
+    assert not is_retryable(_http_error(400))
+    assert not is_retryable(ValueError("bad json"))
+
+
+def test_is_retryable_httpx_errors():
+    request = httpx.Request("POST", "http://llm/generate")
+    assert is_retryable(httpx.ConnectError("refused", request=request))
+    assert is_retryable(httpx.ReadTimeout("slow", request=request))
+    for status, retryable in ((503, True), (400, False)):
+        response = httpx.Response(status, headers={"Retry-After": "2"}, request=request)
+        error = httpx.HTTPStatusError(str(status), request=request, response=response)
+        assert is_retryable(error) is retryable
+        assert retry_after_seconds(error) == 2.0
+
+
+def test_retry_until_success_and_honour_retry_after():
+    errors = [_http_error(503, retry_after="3"), requests.ConnectionError()]
+    sleeps = []
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    result = call_with_retry(fn, max_retries=2, initial_backoff=0.1,
+                             max_backoff=5.0, sleep=sleeps.append)
+
+    assert result == "ok"
+    assert sleeps[0] == 3.0            # Retry-After wins over backoff
+    assert 0 <= sleeps[1] <= 5.0       # jittered exponential backoff
+
+
+def test_non_retryable_error_is_raised_immediately():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise _http_error(400)
+
+    with pytest.raises(requests.HTTPError):
+        call_with_retry(fn, max_retries=3, sleep=lambda _s: None)
+    assert len(calls) == 1
+
+
+def test_retry_after_http_date_in_the_past_is_zero():
+    exc = _http_error(503, retry_after="Wed, 21 Oct 2015 07:28:00 GMT")
+    assert retry_after_seconds(exc) == 0.0
+
+
+def test_circuit_opens_fails_fast_and_recovers_after_probe():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+    def down():
+        raise requests.ConnectionError("down")
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            call_with_retry(down, max_retries=0, breaker=breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(lambda: "ok", max_retries=3, breaker=breaker)
+
+    clock.now += 10
+    assert call_with_retry(lambda: "ok", breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_half_open_probe_reopens_circuit():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+
+    clock.now += 5
+    breaker.before_call()                          # the single probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()                      # concurrent caller
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_rate_limit_timeout_in_half_open_probe_keeps_circuit_open():
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+
+    limiter = RateLimiter(requests=TokenBucket(rate=0.001, capacity=1))
+    limiter.acquire(0)                             # budget used up
+    calls = []
+    with pytest.raises(RateLimitTimeout):
+        call_with_retry(lambda: calls.append(1), max_retries=2, breaker=breaker,
+                        before_attempt=lambda: limiter.acquire(0, timeout=0))
+
+    # The server was never contacted: no success recorded, circuit not closed
+    assert calls == []
+    assert breaker.state == CircuitBreaker.OPEN
+    # The next caller is the probe
+    assert call_with_retry(lambda: "ok", breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,83 @@
+# tests/test_swap.py
+from collections import OrderedDict
+
+import pytest
+
+from swap import count_collided_keys, swap_columns, swap_grouped, swap_many, swap_top_level
+
+RECORDS = [
+    {},
+    {"a": 1, "b": 2, "c": 1},
+    {"a": "x", "b": "y", "c": "x"},
+    {"t": True, "n": None, "one": 1, "f": 1.0, "s": "True", "z": "None"},
+    OrderedDict([("a", 1), ("b", 1)]),
+    {"big": 10 ** 30, "neg": -0.0},
+]
+
+
+class _Str(str):
+    def __str__(self):
+        return "custom"
+
+
+def test_swap_many_matches_scalar_loop():
+    expected = [swap_top_level(obj) for obj in RECORDS]
+    result = swap_many(RECORDS)
+    assert result == expected
+    assert [list(r) for r in result] == [list(e) for e in expected]
+
+
+def test_swap_many_handles_subclasses_like_scalar_loop():
+    obj = {"a": _Str("v")}
+    assert swap_many([obj]) == [swap_top_level(obj)] == [{"custom": "a"}]
+
+
+def test_swap_many_errors():
+    bad = [{"a": 1}, {"a": [1]}, [1], {1: "x"}]
+    with pytest.raises(ValueError, match="Unsupported value type for key 'a': list"):
+        swap_many(bad)
+
+    result = swap_many(bad, return_errors=True)
+    assert result[0] == {"1": "a"}
+    assert all(isinstance(r, ValueError) for r in result[1:])
+
+
+def test_swap_columns_matches_rows():
+    columns = {"a": [1, "x", None], "b": [1, True, "None"], "c": ["1", 2.5, None]}
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    assert swap_columns(columns) == swap_many(rows)
+
+
+def test_swap_columns_accepts_to_pydict_and_validates():
+    class _Table:
+        def to_pydict(self):
+            return {"a": ["x", "y"]}
+
+    assert swap_columns(_Table()) == [{"x": "a"}, {"y": "a"}]
+    with pytest.raises(ValueError, match="same length"):
+        swap_columns({"a": [1], "b": [1, 2]})
+    with pytest.raises(ValueError, match="for key 'b': dict"):
+        swap_columns({"a": [1], "b": [{}]})
+
+
+def test_swap_grouped_keeps_collided_keys_in_order():
+    obj = {"a": 1, "b": 2, "c": 1, "d": "1", "e": 2, "f": None}
+    result = swap_grouped(obj)
+
+    assert result.swapped == {"1": ["a", "c", "d"], "2": ["b", "e"], "None": "f"}
+    assert list(result.swapped) == list(swap_top_level(obj))
+    assert result.collisions == len(obj) - len(result.swapped) == 3
+    assert result.collided_keys == count_collided_keys(obj) == 2
+
+
+def test_swap_grouped_without_collisions_equals_plain_swap():
+    obj = {"a": 1, "b": "x", "c": True}
+    assert swap_grouped(obj) == (swap_top_level(obj), 0, 0)
+    assert count_collided_keys(obj) == 0
+
+
+def test_swap_grouped_errors_like_swap_top_level():
+    with pytest.raises(ValueError, match="must be an object"):
+        swap_grouped([1])
+    with pytest.raises(ValueError, match="Unsupported value type for key 'a': dict"):
+        swap_grouped({"a": {}})
@@ -0,0 +1,73 @@
+# tests/test_swap_nested.py
+import sys
+
+import pytest
+
+from swap import swap_top_level
+from swap_nested import iter_leaves, swap_deep
+
+DOC = {
+    "a": {"b": [1, 2, {"c": "x"}]},
+    "d": None,
+    "e": {"f": {}, "g": []},
+    "h": [[True]],
+}
+
+
+def test_paths_in_document_order():
+    assert list(iter_leaves(DOC)) == [
+        ("a.b[0]", 1),
+        ("a.b[1]", 2),
+        ("a.b[2].c", "x"),
+        ("d", None),
+        ("e.f", {}),
+        ("e.g", []),
+        ("h[0][0]", True),
+    ]
+
+
+def test_separator_and_max_depth():
+    assert list(iter_leaves(DOC, separator="/", max_depth=2)) == [
+        ("a/b", [1, 2, {"c": "x"}]),
+        ("d", None),
+        ("e/f", {}),
+        ("e/g", []),
+        ("h[0]", [True]),
+    ]
+    assert swap_deep(DOC, max_depth=1).swapped["[[true]]"] == "h"
+
+
+def test_flat_object_swaps_like_swap_top_level():
+    obj = {"a": 1, "b": "x", "c": 1, "d": 2.5, "e": None}
+    assert swap_deep(obj).swapped == swap_top_level(obj)
+
+
+def test_collisions_last_wins_or_grouped():
+    obj = {"a": {"x": 1, "y": 1}, "b": [1, 2], "c": 2}
+    plain = swap_deep(obj)
+    assert plain.swapped == {"1": "b[0]", "2": "c"}
+    assert (plain.collisions, plain.collided_keys) == (3, 2)
+
+    grouped = swap_deep(obj, group=True)
+    assert grouped.swapped == {"1": ["a.x", "a.y", "b[0]"], "2": ["b[1]", "c"]}
+    assert (grouped.collisions, grouped.collided_keys) == (3, 2)
+
+
+def test_deeper_than_recursion_limit():
+    depth = sys.getrecursionlimit() * 3
+    doc = leaf = {}
+    for _ in range(depth):
+        leaf["k"] = {}
+        leaf = leaf["k"]
+    leaf["k"] = "bottom"
+
+    (path, value), = iter_leaves(doc)
+    assert value == "bottom"
+    assert path == ".".join(["k"] * (depth + 1))
+
+
+def test_errors():
+    with pytest.raises(ValueError, match="must be an object"):
+        list(iter_leaves([1]))
+    with pytest.raises(ValueError, match="Unsupported value type for key 'a.b\\[0\\]': set"):
+        swap_deep({"a": {"b": [set()]}})
@@ -0,0 +1,64 @@
+# tests/test_swap_records.py
+import pytest
+
+from swap_records import (
+    ERROR_DECODE,
+    ERROR_NOT_OBJECT,
+    ERROR_VALUE,
+    INVALID_DROP,
+    INVALID_KEEP,
+    swap_ndjson,
+)
+
+DATA = (
+    b'{"a": 1, "b": 2, "c": 1}\n'
+    b"\n"
+    b'{"x": "\xd0\xb9"}\r\n'
+    b"[1, 2]\n"
+    b'{"bad": [1]}\n'
+    b"{oops\n"
+    b'{"z": true}'
+)
+
+
+def test_swaps_each_record_and_drops_bad_ones():
+    result = swap_ndjson(DATA, INVALID_DROP)
+
+    assert bytes(result.content) == (
+        b'{"1":"c","2":"b"}\n'
+        b'{"\xd0\xb9":"x"}\n'
+        b'{"True":"z"}\n'
+    )
+    assert result.records == 6
+    assert result.failed == 3
+    assert result.errors == {ERROR_NOT_OBJECT: 1, ERROR_VALUE: 1, ERROR_DECODE: 1}
+    assert result.failed_lines == [4, 5, 6]
+
+
+def test_keep_copies_bad_records_unchanged():
+    result = swap_ndjson(DATA, INVALID_KEEP)
+    lines = bytes(result.content).split(b"\n")
+    assert lines[2:5] == [b"[1, 2]", b'{"bad": [1]}', b"{oops"]
+
+
+def test_empty_content_and_invalid_utf8():
+    assert swap_ndjson(b"").records == 0
+    result = swap_ndjson(b'{"a": "\xff"}\n{"lone": "\\ud800"}\n')
+    assert result.errors == {ERROR_DECODE: 2}
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        swap_ndjson(b"{}", "ignore")
+
+
+def test_batches_keep_record_order():
+    lines = [b'{"k": %d}' % i if i % 7 else b"[%d]" % i for i in range(3000)]
+    result = swap_ndjson(b"\n".join(lines), INVALID_KEEP)
+
+    out = bytes(result.content).split(b"\n")[:-1]
+    assert len(out) == 3000
+    assert out[1] == b'{"1":"k"}'
+    assert out[2995] == b'{"2995":"k"}'
+    assert out[7] == b"[7]"
+    assert result.failed == len(range(0, 3000, 7))
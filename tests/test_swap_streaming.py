@@ -0,0 +1,83 @@
+# tests/test_swap_streaming.py
+import json
+
+import pytest
+
+from swap import swap_grouped, swap_top_level
+from swap_streaming import DuplicateKeysError, iter_chunks, swap_stream
+
+
+def _reference(data: bytes) -> bytes:
+    swapped = swap_top_level(json.loads(data.decode("utf-8")))
+    return json.dumps(swapped, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+CASES = [
+    b"{}",
+    b' \n{ "a" : 1 , "b":2,"c":1 }\n',
+    '{"ключ": "значение", "emoji": "\U0001F600", "esc": "a\\"b\\\\c\\u00e9"}'.encode("utf-8"),
+    b'{"t": true, "f": false, "n": null, "x": 1.50, "e": -2e10, "big": 123456789012345678901234}',
+    b'{"a": "True", "b": true, "c": "None", "d": null}',
+    b'{"nan": NaN, "inf": -Infinity}',
+]
+
+
+@pytest.mark.parametrize("data", CASES)
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64 * 1024])
+def test_matches_in_memory_path_for_any_chunking(data, chunk_size):
+    out, original, result, _ = swap_stream(iter_chunks(data, chunk_size))
+    assert bytes(out) == _reference(data)
+    assert original == len(json.loads(data))
+    assert result == len(json.loads(out))
+
+
+def test_large_document_with_long_values():
+    obj = {f"k{i}": ("v" * (i % 50)) + str(i % 700) for i in range(5000)}
+    obj["long"] = "x" * 300_000
+    data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    out = swap_stream(iter_chunks(data, 4096)).content
+    assert bytes(out) == _reference(data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64 * 1024])
+def test_grouped_matches_swap_grouped(chunk_size):
+    obj = {"a": 1, "b": "x", "c": 1, "d": "1", "e": "x", "f": None}
+    data = json.dumps(obj).encode("utf-8")
+    expected = swap_grouped(obj)
+
+    result = swap_stream(iter_chunks(data, chunk_size), group=True)
+    assert bytes(result.content) == json.dumps(
+        expected.swapped, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    assert result.collided_keys == expected.collided_keys == 2
+    assert result.original_size - result.result_size == expected.collisions == 3
+
+    # Same counters when the last key wins
+    plain = swap_stream(iter_chunks(data, chunk_size))
+    assert plain.collided_keys == 2
+    assert plain.result_size == result.result_size
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"[1, 2]", "must be an object"),
+    (b'{"a": [1]}', "Unsupported value type for key 'a': list"),
+    (b'{"a": {"b": 1}}', "Unsupported value type for key 'a': dict"),
+    (b'{"a": 1', "delimiter"),
+    (b'{"a" 1}', "':' delimiter"),
+    (b'{"a": 1} x', "Extra data"),
+    (b'{a: 1}', "double quotes"),
+    (b"", "must be an object"),
+])
+def test_invalid_input_raises_value_error(data, message):
+    with pytest.raises(ValueError, match=message):
+        swap_stream(iter_chunks(data, 2))
+
+
+def test_invalid_utf8_raises():
+    with pytest.raises(UnicodeDecodeError):
+        swap_stream([b'{"a": "\xff"}'])
+
+
+def test_duplicate_input_keys_are_reported():
+    with pytest.raises(DuplicateKeysError):
+        swap_stream([b'{"a": 1, "b": 2, "a": 3}'])
@@ -0,0 +1,139 @@
+# tests/test_transform_profiler.py
+import os
+import pstats
+import time
+
+import pytest
+
+import transform_profiler
+from transform_profiler import CPROFILE, SAMPLING, TransformProfiler
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return "done"
+
+
+def _sleepy(seconds):
+    time.sleep(seconds)
+    return "slept"
+
+
+class _Ctx:
+    def __init__(self, **props):
+        self._props = props
+
+    def getProperty(self, name):
+        return self._props.get(name)
+
+
+def test_from_context_is_off_without_directory(tmp_path):
+    assert TransformProfiler.from_context(_Ctx(), "P") is None
+    assert TransformProfiler.from_context(
+        _Ctx(**{"Profile Directory": str(tmp_path), "Profile Fraction": "0"}), "P"
+    ) is None
+    profiler = TransformProfiler.from_context(
+        _Ctx(**{"Profile Directory": str(tmp_path / "new"), "Profiler": "bogus"}), "P"
+    )
+    try:
+        assert profiler.mode == SAMPLING and profiler.fraction == 0.01
+        assert (tmp_path / "new").is_dir()
+    finally:
+        profiler.close()
+
+    with pytest.raises(ValueError):
+        TransformProfiler("P", str(tmp_path), mode="perf")
+
+
+def test_sampling_writes_collapsed_stacks_with_blocking_frames(tmp_path):
+    profiler = TransformProfiler("P", str(tmp_path), fraction=1.0, max_overhead=1.0,
+                                 interval=3600, sample_interval=0.001)
+    try:
+        assert profiler.run(_sleepy, 0.1) == "slept"
+    finally:
+        path = profiler.close()
+
+    assert os.path.basename(path).startswith(f"P-{os.getpid()}-") and path.endswith(".collapsed")
+    lines = open(path).read().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    # Wall-clock samples: the sleeping frame is the leaf, the caller below it
+    assert stack.split(";")[-1].startswith("_sleepy (test_transform_profiler.py:")
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) >= 10
+    assert profiler.profiled == 1 and profiler.files_written == 1
+    # Nothing collected since: no empty file
+    assert profiler.dump() is None
+
+
+def test_cprofile_merges_calls_into_pstats(tmp_path):
+    profiler = TransformProfiler("P", str(tmp_path), fraction=1.0, mode=CPROFILE,
+                                 max_overhead=1.0, interval=3600)
+    try:
+        for _ in range(3):
+            assert profiler.run(_busy, 0.001) == "done"
+    finally:
+        path = profiler.close()
+
+    assert path.endswith(".pstats")
+    stats = pstats.Stats(path)
+    calls = {func[2]: stat[1] for func, stat in stats.stats.items()}
+    assert calls["_busy"] == 3
+
+
+def test_fraction_and_overhead_budget(tmp_path):
+    profiler = TransformProfiler("P", str(tmp_path), fraction=1.0, mode=CPROFILE,
+                                 max_overhead=0.1, interval=3600)
+    try:
+        # The first call spends the whole budget, the next ones run unprofiled
+        for _ in range(5):
+            profiler.run(_busy, 0.02)
+    finally:
+        profiler.close()
+    assert profiler.calls == 5
+    assert profiler.profiled == 1 and profiler.skipped == 4
+
+    rare = TransformProfiler("P", str(tmp_path), fraction=0.1, mode=CPROFILE,
+                             max_overhead=1.0, interval=3600)
+    try:
+        for _ in range(1000):
+            rare.run(len, "x")
+    finally:
+        rare.close()
+    assert 50 < rare.profiled < 150
+
+
+def test_old_files_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(transform_profiler, "MAX_FILES", 2)
+    profiler = TransformProfiler("P", str(tmp_path), fraction=1.0, mode=CPROFILE,
+                                 max_overhead=1.0, interval=3600)
+    try:
+        for _ in range(4):
+            profiler.run(_busy, 0.001)
+            profiler.dump()
+    finally:
+        profiler.close()
+    assert profiler.files_written == 4
+    assert len(list(tmp_path.glob("P-*.pstats"))) == 2
+
+
+def test_files_of_other_processes_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(transform_profiler, "MAX_FILES", 2)
+    # Left behind by earlier workers of the same processor
+    for pid in (1, 2, 3):
+        old = tmp_path / f"P-{pid}-20240101T000000.pstats"
+        old.write_bytes(b"")
+        os.utime(old, (1, 1))
+    other = tmp_path / "Q-1-20240101T000000.pstats"
+    other.write_bytes(b"")
+    profiler = TransformProfiler("P", str(tmp_path), fraction=1.0, mode=CPROFILE,
+                                 max_overhead=1.0, interval=3600)
+    try:
+        profiler.run(_busy, 0.001)
+    finally:
+        path = profiler.close()
+
+    kept = sorted(p.name for p in tmp_path.glob("P-*.pstats"))
+    assert len(kept) == 2 and os.path.basename(path) in kept
+    # Another processor's files are not touched
+    assert other.exists()